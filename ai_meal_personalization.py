@@ -3,10 +3,10 @@
 Unique Feature: Uses ML to learn child preferences and optimize meal plans over time
 """
 
-import json
-import sqlite3
 from datetime import datetime, timedelta
-from collections import defaultdict
+
+from database import CHILD_AFFINITY_SQL
+from db_pool import get_connection
 
 class MealPersonalizationEngine:
     """
@@ -19,44 +19,20 @@ class MealPersonalizationEngine:
     def analyze_child_preferences(self, child_id):
         """
         Analyze what foods a child likes/dislikes based on meal feedback
-        """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get all feedback for this child's meal plans
-        cursor.execute("""
-            SELECT mf.rating, mf.comments, mp.plan_data
-            FROM meal_feedback mf
-            JOIN meal_plans mp ON mf.plan_id = mp.id
-            WHERE mp.id IN (
-                SELECT plan_id FROM child_meal_plans WHERE child_id = ?
-            )
-        """, (child_id,))
-        
-        feedback_data = cursor.fetchall()
-        
-        # Analyze ingredients from high-rated vs low-rated meals
-        liked_ingredients = defaultdict(int)
-        disliked_ingredients = defaultdict(int)
-        
-        for rating, comments, plan_data in feedback_data:
-            plan = json.loads(plan_data)
-            
-            for day, meals in plan.get('weekly_plan', {}).items():
-                for meal_type, meal_data in meals.items():
-                    for item in meal_data.get('items', []):
-                        ingredient = item['ingredient']
-                        
-                        if rating >= 4:  # Liked
-                            liked_ingredients[ingredient] += 1
-                        elif rating <= 2:  # Disliked
-                            disliked_ingredients[ingredient] += 1
         
+        Reads the child_ingredient_affinity counters that save_feedback keeps
+        up to date: per ingredient, how often it was served in this child's
+        well/poorly rated plans.
+        """
+        conn = get_connection(self.db_path)
+        rows = conn.execute(CHILD_AFFINITY_SQL, (child_id,)).fetchall()
         conn.close()
         
+        liked = sorted(((name, count) for name, count, _ in rows if count), key=lambda x: x[1], reverse=True)
+        disliked = sorted(((name, count) for name, _, count in rows if count), key=lambda x: x[1], reverse=True)
         return {
-            'liked': dict(sorted(liked_ingredients.items(), key=lambda x: x[1], reverse=True)[:10]),
-            'disliked': dict(sorted(disliked_ingredients.items(), key=lambda x: x[1], reverse=True)[:10])
+            'liked': dict(liked[:10]),
+            'disliked': dict(disliked[:10])
         }
     
     def predict_meal_acceptance(self, child_id, proposed_ingredients):
@@ -87,7 +63,7 @@ class MealPersonalizationEngine:
         preferences = self.analyze_child_preferences(child_id)
         
         # Get ingredients, prioritizing liked ones
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -0,0 +1,119 @@
+"""
+Bulk Export Benchmark
+Time to first byte, total time and peak memory of a month of plans as a
+ZIP of PDFs: built in memory from a DataFrame against bulk_export's
+streamed archive with a render process pool
+
+The database holds --plans copies of one generated plan spread over a
+month. Each mode runs in a fresh interpreter, with SQLite mmap off, and
+reports how far the export raised peak RSS (ru_maxrss of the web process,
+not pool workers) above what it was after imports. Archive chunks are
+counted and discarded as a client would receive them.
+
+Run from the repository root:
+    python benchmarks/bench_bulk_export.py [--plans 500 2000] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import database as db
+import db_pool
+import meal_optimizer as mo
+
+EXPORT_SCRIPT = """
+import io, json, resource, sys, time, zipfile
+sys.path.insert(0, {repo!r})
+import pandas as pd
+import database as db
+import db_pool
+db.DATABASE_PATH = {db!r}
+db_pool.MMAP_SIZE_BYTES = 0  # keep mapped database pages out of RSS
+from bulk_export import stream_zip, entry_info
+from export_cache import render_plan_row
+
+def in_memory():
+    # Before: every row into a DataFrame, the whole archive in a BytesIO
+    conn = db.get_connection()
+    df = pd.read_sql_query("SELECT * FROM meal_plans WHERE created_at >= ? AND created_at < ?",
+                           conn, params=('2025-03-01', '2025-04-01'))
+    conn.close()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for row in df.to_dict('records'):
+            archive.writestr(entry_info(row, 'pdf'), render_plan_row(row, 'pdf'))
+    yield buffer.getvalue()
+
+def streamed():
+    return stream_zip(db.iter_meal_plans('2025-03-01', '2025-04-01'), 'pdf', max_workers={workers})
+
+baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+start = time.perf_counter()
+first_byte = None
+size = 0
+for chunk in {mode}():
+    if chunk and first_byte is None:
+        first_byte = time.perf_counter() - start
+    size += len(chunk)
+print(json.dumps({{'seconds': time.perf_counter() - start, 'first_byte': first_byte, 'mb': size / 1e6,
+                   'added_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - baseline_mb}}))
+"""
+
+
+def seed_plans(num_plans):
+    """num_plans copies of one generated plan, created across March 2025"""
+    optimizer = mo.MealOptimizer(db.get_all_ingredients(), budget=2000, num_children=20, age_group='3-6 years')
+    ingredients = db.get_all_ingredients()['name'].tolist()[:12]
+    meal_plan = optimizer.generate_meal_plan(ingredients)
+    plan_data = json.dumps({
+        'weekly_plan': meal_plan['weekly_plan'],
+        'selected_ingredients': ingredients,
+        'weekly_nutrition': meal_plan['weekly_nutrition'],
+        'daily_requirements': meal_plan['daily_requirements']
+    }, default=str)
+    plan_ids = db.save_meal_plans([
+        {'plan_name': f"Centre {i}", 'budget': 2000, 'num_children': 20, 'age_group': '3-6 years',
+         'total_cost': meal_plan['total_cost'], 'nutrition_score': meal_plan['nutrition_score'],
+         'plan_data': plan_data}
+        for i in range(num_plans)
+    ])
+    conn = db.get_connection()
+    conn.executemany("UPDATE meal_plans SET created_at = ? WHERE id = ?", [
+        (f"2025-03-{i % 31 + 1:02d} {i % 24:02d}:00:00", plan_id) for i, plan_id in enumerate(plan_ids)
+    ])
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--plans', type=int, nargs='+', default=[500, 2000], help='Plans in the month')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='PDF render processes')
+    args = parser.parse_args()
+
+    print(f"{'Plans':>6} {'Mode':<10} {'ZIP (MB)':>9} {'First byte (s)':>15} {'Total (s)':>10} {'Added RSS (MB)':>15}")
+    print("-" * 70)
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_plans in args.plans:
+            db.DATABASE_PATH = os.path.join(tmp, f"bench_{num_plans}.db")
+            db.initialize_database()
+            seed_plans(num_plans)
+            db_pool.close_all()
+
+            for mode in ['in_memory', 'streamed']:
+                script = EXPORT_SCRIPT.format(repo=REPO_DIR, db=db.DATABASE_PATH, mode=mode, workers=args.workers)
+                result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+                stats = json.loads(result.stdout.strip().splitlines()[-1])
+                print(f"{num_plans:>6} {mode:<10} {stats['mb']:>9.1f} {stats['first_byte']:>15.2f} "
+                      f"{stats['seconds']:>10.2f} {stats['added_rss_mb']:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Child Affinity Benchmark
+Reading a child's liked/disliked ingredients by re-aggregating all their
+feedback against the child_ingredient_affinity counters
+
+The database holds --plans copies of one generated plan, all made for
+one child and each rated once. "aggregate" joins feedback, plan links and
+plan items on every read as analyze_child_preferences did; "counters"
+is the current analyze_child_preferences. save_feedback is timed too, as
+it now also updates the counters.
+
+Run from the repository root:
+    python benchmarks/bench_child_affinity.py [--plans 50 500] [--repeat 50]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+import db_pool
+import meal_optimizer as mo
+from ai_meal_personalization import MealPersonalizationEngine
+
+CHILD_ID = 1
+
+
+def aggregate_preferences(child_id):
+    conn = db.get_connection()
+    rows = conn.execute("""
+        SELECT i.name,
+               SUM(CASE WHEN mf.rating >= 4 THEN 1 ELSE 0 END) AS liked,
+               SUM(CASE WHEN mf.rating <= 2 THEN 1 ELSE 0 END) AS disliked
+        FROM child_meal_plans cmp
+        JOIN meal_feedback mf ON mf.plan_id = cmp.plan_id
+        JOIN meal_plan_items mpi ON mpi.plan_id = cmp.plan_id
+        JOIN ingredients i ON i.id = mpi.ingredient_id
+        WHERE cmp.child_id = ?
+        GROUP BY mpi.ingredient_id
+    """, (child_id,)).fetchall()
+    conn.close()
+    return rows
+
+
+def median_ms(run, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--plans', type=int, nargs='+', default=[50, 500], help="Rated plans of the child")
+    parser.add_argument('--repeat', type=int, default=50, help='Runs per measurement')
+    args = parser.parse_args()
+
+    meal_plan = None
+    print(f"{'Plans':>6} {'aggregate (ms)':>15} {'counters (ms)':>14} {'Speedup':>8} {'save_feedback (ms)':>19}")
+    print("-" * 66)
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_plans in args.plans:
+            db.DATABASE_PATH = os.path.join(tmp, f"bench_{num_plans}.db")
+            db.initialize_database()
+            if meal_plan is None:
+                optimizer = mo.MealOptimizer(db.get_all_ingredients(), budget=2000, num_children=20,
+                                             age_group='3-6 years')
+                meal_plan = optimizer.generate_meal_plan()
+                plan_data = json.dumps({'weekly_plan': meal_plan['weekly_plan']}, default=str)
+            plan_ids = db.save_meal_plans([
+                {'plan_name': f"Week {i}", 'budget': 2000, 'num_children': 20, 'age_group': '3-6 years',
+                 'total_cost': meal_plan['total_cost'], 'nutrition_score': meal_plan['nutrition_score'],
+                 'plan_data': plan_data}
+                for i in range(num_plans)
+            ])
+            for i, plan_id in enumerate(plan_ids):
+                db.link_child_plan(CHILD_ID, plan_id)
+                db.save_feedback(plan_id, [5, 1, 3][i % 3], "")
+
+            engine = MealPersonalizationEngine(db.DATABASE_PATH)
+            aggregate_ms = median_ms(lambda: aggregate_preferences(CHILD_ID), args.repeat)
+            counters_ms = median_ms(lambda: engine.analyze_child_preferences(CHILD_ID), args.repeat)
+            save_ms = median_ms(lambda: db.save_feedback(plan_ids[-1], 5, ""), args.repeat)
+            print(f"{num_plans:>6} {aggregate_ms:>15.2f} {counters_ms:>14.2f} "
+                  f"{aggregate_ms / counters_ms:>7.1f}x {save_ms:>19.2f}")
+            db_pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Export Benchmark
+Download latency of /api/export-{csv,pdf,json} rendering on every request
+against the export cache, with and without a conditional GET
+
+Generates a plan through /api/generate-plan, then downloads each format
+--downloads times per mode with the Flask test client. In "render" mode
+the cache deletes the file before each download, so every request renders
+as the export routes did before the cache.
+
+Run from the repository root:
+    python benchmarks/bench_exports.py [--downloads 50]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+import db_pool
+from export_cache import ExportCache, FORMATS
+
+
+class RenderEveryTime(ExportCache):
+    """Export cache that forgets each file before serving it"""
+
+    def get(self, plan_id, fmt):
+        name = self.filename(plan_id, fmt)
+        with self._lock:
+            self._files.pop(name, None)
+        if os.path.exists(os.path.join(self.directory, name)):
+            os.remove(os.path.join(self.directory, name))
+        return super().get(plan_id, fmt)
+
+
+def median_ms(run, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--downloads', type=int, default=50, help='Downloads per format and mode')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        os.chdir(tmp)  # flask_app creates its own tables relative to the cwd
+        import flask_app
+
+        client = flask_app.app.test_client()
+        response = client.post('/api/generate-plan', json={
+            'num_children': 20, 'budget': 2000, 'age_group': '3-6 years',
+            'ingredients': db.get_all_ingredients()['name'].tolist()[:12]
+        })
+        assert response.status_code == 200, response.get_json()
+        export_cache = flask_app.export_cache
+
+        rows = []
+        for fmt in FORMATS:
+            url = f"/api/export-{fmt}"
+            flask_app.export_cache = RenderEveryTime(os.path.join(tmp, 'uncached'))
+            render = median_ms(lambda: client.get(url).close(), args.downloads)
+            flask_app.export_cache = export_cache
+            etag = client.get(url).headers['ETag']
+            cached = median_ms(lambda: client.get(url).close(), args.downloads)
+            not_modified = median_ms(lambda: client.get(url, headers={'If-None-Match': etag}).close(),
+                                     args.downloads)
+            rows.append((fmt, render, cached, not_modified))
+
+        stats = export_cache.stats()
+        db_pool.close_all()
+        flask_app.job_queue.stop(timeout=5)
+
+    print(f"Median ms per download ({args.downloads} downloads per cell)")
+    print(f"{'Format':<8} {'render':>9} {'cached':>9} {'304':>9} {'Speedup':>8}")
+    print("-" * 47)
+    for fmt, render, cached, not_modified in rows:
+        print(f"{fmt:<8} {render:>9.2f} {cached:>9.2f} {not_modified:>9.2f} {render / cached:>7.1f}x")
+    print(f"Export cache: {stats['renders']} renders, {stats['hits']} hits")
+
+
+if __name__ == "__main__":
+    main()
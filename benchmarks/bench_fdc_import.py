@@ -0,0 +1,135 @@
+"""
+FDC Import Benchmark
+Throughput and peak memory of fdc_local.import_fdc on synthetic Branded
+Foods-style CSV downloads of increasing size, plus lookup latency from the
+imported store
+
+Each import runs in a fresh interpreter so its peak RSS (ru_maxrss) is its
+own. Bounded-memory streaming shows up as peak RSS staying flat while the
+download grows.
+
+Run from the repository root:
+    python benchmarks/bench_fdc_import.py [--foods 20000 100000] [--nutrients 20]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import db_pool
+from fdc_local import LocalFDCStore
+from usda_api import USDAFoodAPI, FDCResponseCache
+
+WORDS = ['rice', 'wheat', 'lentil', 'millet', 'chickpea', 'peanut', 'banana', 'spinach',
+         'milk', 'jaggery', 'crisps', 'flour', 'roasted', 'salted', 'organic', 'sweet']
+
+# Descriptions draw words with Zipf-like frequencies, as real food names do;
+# WORDS are placed from rank 20 down so each matches roughly 0.1-2% of foods
+VOCABULARY_SIZE = 5000
+SYLLABLES = [c + v for c in 'bdgklmnprstv' for v in 'aeiou']
+
+IMPORT_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {repo!r})
+from fdc_local import import_fdc
+start = time.perf_counter()
+counts = import_fdc([{source!r}], {db!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{'counts': counts, 'seconds': seconds,
+                   'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def make_vocabulary(rng):
+    """(words, weights): pseudo-words with WORDS at ranks 20, 40, ..., weight 1/rank"""
+    words = list(dict.fromkeys(
+        ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(VOCABULARY_SIZE * 2)
+    ))
+    words = [word for word in words if word not in WORDS][:VOCABULARY_SIZE]
+    for position, word in enumerate(WORDS):
+        words.insert(20 * (position + 1), word)
+    return words, [1 / rank for rank in range(1, len(words) + 1)]
+
+
+def write_branded_download(folder, num_foods, num_nutrients, seed=0):
+    """Synthetic branded_food CSV download with num_nutrients values per food"""
+    rng = random.Random(seed)
+    vocabulary, weights = make_vocabulary(rng)
+    os.makedirs(folder)
+    with open(os.path.join(folder, 'nutrient.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'name', 'unit_name', 'nutrient_nbr', 'rank'])
+        for i in range(num_nutrients):
+            writer.writerow([1000 + i, f"Nutrient {i}", 'G', 200 + i, 100 * i])
+
+    with open(os.path.join(folder, 'food.csv'), 'w', newline='') as food, \
+            open(os.path.join(folder, 'branded_food.csv'), 'w', newline='') as branded, \
+            open(os.path.join(folder, 'food_nutrient.csv'), 'w', newline='') as food_nutrient:
+        foods, brands, values = csv.writer(food), csv.writer(branded), csv.writer(food_nutrient)
+        foods.writerow(['fdc_id', 'data_type', 'description', 'food_category_id', 'publication_date'])
+        brands.writerow(['fdc_id', 'brand_owner', 'branded_food_category', 'gtin_upc', 'ingredients',
+                         'serving_size', 'serving_size_unit', 'household_serving_fulltext'])
+        values.writerow(['id', 'fdc_id', 'nutrient_id', 'amount'])
+        row_id = 0
+        for fdc_id in range(1, num_foods + 1):
+            name = ' '.join(rng.choices(vocabulary, weights, k=4)).upper()
+            foods.writerow([fdc_id, 'branded_food', name, '', '2024-04-18'])
+            brands.writerow([fdc_id, f"Brand {fdc_id % 500}", 'Snacks', f"{fdc_id:012d}",
+                             ', '.join(rng.choices(vocabulary, weights, k=6)).upper(), 30, 'g', '1 packet'])
+            for i in range(num_nutrients):
+                row_id += 1
+                values.writerow([row_id, fdc_id, 1000 + i, round(rng.uniform(0, 50), 2)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--foods', type=int, nargs='+', default=[20000, 100000],
+                        help='Download sizes (foods) to import')
+    parser.add_argument('--nutrients', type=int, default=20, help='Nutrient values per food')
+    parser.add_argument('--lookups', type=int, default=200, help='Searches + details to time')
+    args = parser.parse_args()
+
+    print(f"{'Foods':>9} {'CSV (MB)':>9} {'Rows':>11} {'Seconds':>8} {'Rows/s':>10} {'Peak RSS (MB)':>14}")
+    print("-" * 66)
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_foods in args.foods:
+            folder = os.path.join(tmp, f"branded_{num_foods}")
+            write_branded_download(folder, num_foods, args.nutrients)
+            csv_mb = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder)) / 1e6
+            db_path = os.path.join(tmp, f"fdc_{num_foods}.db")
+
+            result = subprocess.run(
+                [sys.executable, '-c', IMPORT_SCRIPT.format(repo=REPO_DIR, source=folder, db=db_path)],
+                capture_output=True, text=True, check=True
+            )
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            rows = sum(stats['counts'].values())
+            print(f"{num_foods:>9,} {csv_mb:>9.1f} {rows:>11,} {stats['seconds']:>8.1f} "
+                  f"{rows / stats['seconds']:>10,.0f} {stats['peak_rss_mb']:>14.1f}")
+
+        # Lookups from the largest store, offline with an empty response cache
+        api = USDAFoodAPI(None, offline=True, local=LocalFDCStore(db_path),
+                          cache=FDCResponseCache(os.path.join(tmp, 'usda_cache.db')))
+        rng = random.Random(1)
+        start = time.perf_counter()
+        for _ in range(args.lookups):
+            found = api.search_foods(rng.choice(WORDS), data_types=['Branded'])
+            if found:
+                api.get_nutrition_summary(found[0]['fdc_id'])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"\nLocal search + details ({args.foods[-1]:,} foods): "
+              f"{elapsed_ms / args.lookups:.2f} ms per lookup over {args.lookups} lookups")
+        db_pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Growth Data Endpoint Benchmark
+Requests/sec on /api/growth-data/<id> with a fresh sqlite3 connection per
+query (the previous database.get_connection) against the pooled
+thread-local connections from db_pool
+
+Each request runs three queries (history, latest measurement and chart
+data); the rest of its time is pandas and JSON work. The benchmark uses a
+throwaway database in a temporary directory and the Flask test client, so
+no server is needed.
+
+Run from the repository root:
+    python benchmarks/bench_growth_data.py [--requests 500] [--children 50]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+import db_pool
+from data_generators import seed_children, seed_growth_tracking
+
+
+def requests_per_second(client, child_ids, num_requests):
+    """Hit /api/growth-data/<id> round-robin and return requests/sec"""
+    start = time.perf_counter()
+    for i in range(num_requests):
+        response = client.get(f"/api/growth-data/{child_ids[i % len(child_ids)]}")
+        assert response.status_code == 200, response.data
+    return num_requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help='Requests per mode')
+    parser.add_argument('--children', type=int, default=50, help='Children in the test database')
+    parser.add_argument('--measurements', type=int, default=12, help='Measurements per child')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        os.chdir(tmp)  # flask_app creates its own tables relative to the cwd
+        import flask_app
+
+        child_ids = seed_children(args.children)
+        seed_growth_tracking(child_ids, args.measurements)
+        client = flask_app.app.test_client()
+        pooled_get_connection = db.get_connection
+
+        # Before: new connection per call, default rollback journal
+        db_pool.close_all()
+        plain = sqlite3.connect(db.DATABASE_PATH)
+        plain.execute("PRAGMA journal_mode=DELETE")
+        plain.close()
+        db.get_connection = lambda: sqlite3.connect(db.DATABASE_PATH)
+        requests_per_second(client, child_ids, 20)  # warm up
+        before = requests_per_second(client, child_ids, args.requests)
+
+        # After: pooled thread-local connection (switches the file to WAL)
+        db.get_connection = pooled_get_connection
+        requests_per_second(client, child_ids, 20)
+        after = requests_per_second(client, child_ids, args.requests)
+
+        db_pool.close_all()
+        flask_app.job_queue.stop(timeout=5)
+
+    print(f"{'Mode':<28} {'Requests/sec':>12}")
+    print("-" * 41)
+    print(f"{'connect per query':<28} {before:>12.1f}")
+    print(f"{'pooled thread-local':<28} {after:>12.1f}")
+    print(f"Speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
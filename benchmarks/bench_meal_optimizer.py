@@ -0,0 +1,61 @@
+"""
+Meal Optimizer Benchmark
+Compares per-meal mode (28 solves) against whole-week mode (1 solve)
+
+Catalogs whose week can't meet the calorie targets within the budget are
+reported as infeasible in whole-week mode.
+
+Run from the repository root:
+    python benchmarks/bench_meal_optimizer.py [--runs 20] [--solver cbc|highs]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meal_optimizer import MealOptimizer, SOLVER_BACKENDS
+from data_generators import make_ingredients
+
+CATALOG_SIZES = [10, 30, 80]
+
+
+def time_plan(optimizer, runs, **kwargs):
+    """Return latencies (ms) of repeated generate_meal_plan calls"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        optimizer.generate_meal_plan(**kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20, help='Plans generated per scenario')
+    parser.add_argument('--solver', choices=list(SOLVER_BACKENDS), default='cbc', help='LP solver backend')
+    args = parser.parse_args()
+    
+    print(f"{'Ingredients':>11} {'Mode':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'Score':>7}")
+    print("-" * 52)
+    
+    for n in CATALOG_SIZES:
+        optimizer = MealOptimizer(make_ingredients(n), budget=3000, num_children=20, solver=args.solver)
+        for mode, whole_week in [('per-meal', False), ('whole-week', True)]:
+            try:
+                latencies = time_plan(optimizer, args.runs, whole_week=whole_week)
+            except ValueError:
+                # Whole-week mode raises when no week fits the budget
+                print(f"{n:>11} {mode:>10} {'infeasible':>29}")
+                continue
+            score = optimizer.generate_meal_plan(whole_week=whole_week)['nutrition_score']
+            print(f"{n:>11} {mode:>10} {np.percentile(latencies, 50):>10.1f} "
+                  f"{np.percentile(latencies, 99):>10.1f} {score:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Meal Model Build Micro-benchmark
+Compares LP construction from precomputed NumPy coefficient arrays against
+the previous row-by-row (iterrows) construction in _generate_meal
+
+The whole catalog is offered to a single lunch model (no sampling), so the
+numbers show how construction scales with catalog size. Only model build
+time is measured; nothing is solved.
+
+Run from the repository root:
+    python benchmarks/bench_model_build.py [--runs 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from pulp import LpProblem, LpMaximize, LpVariable, lpSum
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meal_optimizer import MealOptimizer
+from data_generators import make_ingredients
+
+CATALOG_SIZES = [25, 250, 2500]
+
+
+def build_model_iterrows(optimizer, meal_ingredients, meal_type, meal_budget):
+    """Model construction as previously done in MealOptimizer._generate_meal"""
+    prob = LpProblem(f"Meal_Optimization_{meal_type}", LpMaximize)
+    
+    ingredient_vars = {}
+    for idx, row in meal_ingredients.iterrows():
+        ingredient_vars[row['name']] = LpVariable(f"qty_{row['name']}", lowBound=0, upBound=200)
+    
+    prob += lpSum([
+        ingredient_vars[row['name']] * (
+            row['protein_per_100g'] * 2 +
+            row['fiber_per_100g'] +
+            row['iron_per_100g'] * 0.5 +
+            row['calcium_per_100g'] * 0.01
+        ) / 100
+        for idx, row in meal_ingredients.iterrows()
+    ])
+    
+    prob += lpSum([
+        ingredient_vars[row['name']] * (row['cost_per_kg'] / 1000) * optimizer.num_children
+        for idx, row in meal_ingredients.iterrows()
+    ]) <= meal_budget
+    
+    target_calories = optimizer.daily_requirements['calories'] * optimizer.meal_distribution[meal_type]
+    prob += lpSum([
+        ingredient_vars[row['name']] * row['calories_per_100g'] / 100
+        for idx, row in meal_ingredients.iterrows()
+    ]) >= target_calories * 0.8
+    
+    prob += lpSum([
+        ingredient_vars[row['name']] * row['calories_per_100g'] / 100
+        for idx, row in meal_ingredients.iterrows()
+    ]) <= target_calories * 1.3
+    
+    return prob, ingredient_vars
+
+
+def median_ms(func, runs):
+    """Median wall time of func() in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Repetitions per measurement')
+    args = parser.parse_args()
+    
+    meal_budget = 2000 / 7 * 0.40
+    
+    print(f"{'Ingredients':>11} {'Arrays (ms)':>12} {'iterrows (ms)':>14} {'vectorized (ms)':>16} {'Speedup':>8}")
+    print("-" * 66)
+    
+    for n in CATALOG_SIZES:
+        ingredients = make_ingredients(n)
+        optimizer = MealOptimizer(ingredients, budget=2000, num_children=20)
+        positions = optimizer.ingredients_df.index.to_numpy()
+        
+        # One-off cost paid per optimizer
+        setup = median_ms(optimizer._build_coefficients, args.runs)
+        legacy = median_ms(
+            lambda: build_model_iterrows(optimizer, optimizer.ingredients_df, 'lunch', meal_budget),
+            args.runs
+        )
+        vectorized = median_ms(
+            lambda: optimizer._build_meal_model(positions, 'lunch', meal_budget),
+            args.runs
+        )
+        print(f"{n:>11} {setup:>12.2f} {legacy:>14.2f} {vectorized:>16.2f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Plan Items Benchmark
+Shopping list and all-plans ingredient usage computed by walking the
+plan_data JSON against SQL aggregates over meal_plan_items
+
+The database holds --plans copies of one generated plan. "json" parses
+plan_data and sums items in Python as the shopping list route did;
+"sql" uses get_shopping_list / get_ingredient_usage.
+
+Run from the repository root:
+    python benchmarks/bench_plan_items.py [--plans 200 1000] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+import db_pool
+import meal_optimizer as mo
+
+
+def json_totals(plan_rows):
+    """Grams per ingredient over plan_data texts, walked in Python"""
+    totals = defaultdict(float)
+    for (plan_data,) in plan_rows:
+        for day_plan in json.loads(plan_data)['weekly_plan'].values():
+            for meal_data in day_plan['meals'].values():
+                for item in meal_data['items']:
+                    totals[item['ingredient']] += item['total_quantity_g']
+    return totals
+
+
+def json_shopping_list(plan_id):
+    conn = db.get_connection()
+    rows = conn.execute("SELECT plan_data FROM meal_plans WHERE id = ?", (plan_id,)).fetchall()
+    conn.close()
+    return json_totals(rows)
+
+
+def json_usage():
+    conn = db.get_connection()
+    rows = conn.execute("SELECT plan_data FROM meal_plans").fetchall()
+    conn.close()
+    return sorted(json_totals(rows).items(), key=lambda item: -item[1])[:10]
+
+
+def median_ms(run, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return np.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--plans', type=int, nargs='+', default=[200, 1000], help='Saved plans')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement')
+    args = parser.parse_args()
+
+    optimizer = None
+    print(f"{'Plans':>6} {'Query':<15} {'json (ms)':>10} {'sql (ms)':>10} {'Speedup':>8}")
+    print("-" * 53)
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_plans in args.plans:
+            db.DATABASE_PATH = os.path.join(tmp, f"bench_{num_plans}.db")
+            db.initialize_database()
+            if optimizer is None:
+                optimizer = mo.MealOptimizer(db.get_all_ingredients(), budget=2000, num_children=20,
+                                             age_group='3-6 years')
+                meal_plan = optimizer.generate_meal_plan()
+                plan_data = json.dumps({'weekly_plan': meal_plan['weekly_plan']}, default=str)
+            plan_ids = db.save_meal_plans([
+                {'plan_name': f"Centre {i}", 'budget': 2000, 'num_children': 20, 'age_group': '3-6 years',
+                 'total_cost': meal_plan['total_cost'], 'nutrition_score': meal_plan['nutrition_score'],
+                 'plan_data': plan_data}
+                for i in range(num_plans)
+            ])
+
+            for name, before, after in [
+                ('shopping list', lambda: json_shopping_list(plan_ids[-1]), lambda: db.get_shopping_list(plan_ids[-1])),
+                ('usage', json_usage, lambda: db.get_ingredient_usage(10)),
+            ]:
+                json_ms = median_ms(before, args.repeat)
+                sql_ms = median_ms(after, args.repeat)
+                print(f"{num_plans:>6} {name:<15} {json_ms:>10.2f} {sql_ms:>10.2f} {json_ms / sql_ms:>7.1f}x")
+            db_pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Search Benchmark
+Latency of the FTS5 searches in search_index.py against the LIKE
+'%term%' scans they replaced
+
+Health information is padded to --health-rows synthetic entries and the
+local FDC store is a synthetic Branded Foods-style import of --foods
+foods, both worded from a Zipf-distributed vocabulary. Each query is
+timed end to end as the API routes run it (db.search_health_info for
+/api/search-health, USDAFoodAPI.search_foods with a local store for
+/api/usda-search).
+
+Run from the repository root:
+    python benchmarks/bench_search.py [--health-rows 20000] [--foods 100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+import db_pool
+from bench_fdc_import import make_vocabulary, write_branded_download
+from fdc_local import import_fdc, LocalFDCStore
+from usda_api import USDAFoodAPI, FDCResponseCache
+
+HEALTH_QUERIES = ['fever', 'diarrhea', 'malnut', 'cough', 'skin rash']
+FOOD_QUERIES = ['rice', 'peanut', 'salted mil', 'jaggery', 'organik']
+
+
+def like_health_search(search_term):
+    """search_health_info as it was before the FTS index"""
+    conn = db.get_connection()
+    df = pd.read_sql_query("""
+        SELECT * FROM health_information
+        WHERE disease_name LIKE ? OR symptoms LIKE ? OR category LIKE ?
+        ORDER BY disease_name
+    """, conn, params=(f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
+    conn.close()
+    return df
+
+
+def like_food_search(store, query, page_size=10):
+    """LocalFDCStore.search as first imported: every word LIKE '%word%'"""
+    words = query.split()
+    conn = db_pool.get_connection(store.db_path)
+    rows = conn.execute(f"""
+        SELECT fdc_id, description FROM food
+        WHERE {' AND '.join(['description LIKE ?'] * len(words))}
+        ORDER BY description NOT LIKE ?, length(description), description
+        LIMIT ?
+    """, [f"%{word}%" for word in words] + [f"{query}%", page_size]).fetchall()
+    conn.close()
+    return rows
+
+
+def pad_health_information(rows, seed=0):
+    """Add synthetic entries (pseudo-word names and symptoms) until there are rows in total"""
+    rng = random.Random(seed)
+    vocabulary, weights = make_vocabulary(rng)
+    conn = db.get_connection()
+    existing = conn.execute(
+        "SELECT category, prevention, treatment, precautions, age_group, severity FROM health_information"
+    ).fetchall()
+    missing = rows - len(existing)
+    if missing > 0:
+        padding = []
+        for i in range(missing):
+            category, *rest = existing[i % len(existing)]
+            padding.append((' '.join(rng.choices(vocabulary, weights, k=2)).title(), category,
+                            ', '.join(rng.choices(vocabulary, weights, k=8)), *rest))
+        conn.executemany("""
+            INSERT INTO health_information
+            (disease_name, category, symptoms, prevention, treatment, precautions, age_group, severity)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, padding)
+        conn.commit()
+    conn.close()
+
+
+def time_queries(run, queries, repeat):
+    """Median milliseconds per query over repeat rounds"""
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            run(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    return np.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--health-rows', type=int, default=20000, help='health_information rows')
+    parser.add_argument('--foods', type=int, default=100000, help='Foods in the local FDC store')
+    parser.add_argument('--repeat', type=int, default=20, help='Rounds of each query list')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = os.path.join(tmp, 'nutrition_advisor.db')
+        db.initialize_database()
+        pad_health_information(args.health_rows)
+
+        folder = os.path.join(tmp, 'branded')
+        write_branded_download(folder, args.foods, num_nutrients=5)
+        import_fdc([folder], os.path.join(tmp, 'fdc_local.db'))
+        store = LocalFDCStore(os.path.join(tmp, 'fdc_local.db'))
+        api = USDAFoodAPI(None, offline=True, local=store,
+                          cache=FDCResponseCache(os.path.join(tmp, 'usda_cache.db')))
+
+        rows = [
+            (f"health search ({args.health_rows:,} rows)",
+             time_queries(like_health_search, HEALTH_QUERIES, args.repeat),
+             time_queries(db.search_health_info, HEALTH_QUERIES, args.repeat)),
+            (f"food search ({args.foods:,} foods)",
+             time_queries(lambda q: like_food_search(store, q), FOOD_QUERIES, args.repeat),
+             time_queries(lambda q: api.search_foods(q, data_types=['Branded']), FOOD_QUERIES, args.repeat)),
+        ]
+        db_pool.close_all()
+
+    print(f"Median per query ({len(HEALTH_QUERIES)} queries x {args.repeat} rounds)")
+    print(f"{'Search':<34} {'LIKE (ms)':>10} {'FTS5 (ms)':>10} {'Speedup':>8}")
+    print("-" * 65)
+    for name, like_ms, fts_ms in rows:
+        print(f"{name:<34} {like_ms:>10.2f} {fts_ms:>10.2f} {like_ms / fts_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Session Bytes Benchmark
+Request bytes per page view with cookie sessions holding the generated
+plan against the SQLite session store holding only its id
+
+Generates a plan through /api/generate-plan, then browses a round of
+pages and exports with the Flask test client. Request bytes are the
+request line plus headers the client sends, most of which is the session
+cookie. Browsers drop cookies over 4096 bytes, so the cookie-session plan
+is also checked against that limit.
+
+Run from the repository root:
+    python benchmarks/bench_session_bytes.py [--ingredients 12] [--whole-week]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import session
+from flask.sessions import SecureCookieSessionInterface
+
+import database as db
+import db_pool
+
+PAGE_VIEWS = ['/', '/analytics', '/about', '/api/plan-cache/stats',
+              '/api/export-json', '/api/export-csv', '/api/export-pdf']
+BROWSER_COOKIE_LIMIT = 4096
+
+
+def request_bytes(response):
+    """Bytes of the request line and headers the client sent"""
+    environ = response.request.environ
+    size = len(f"{environ['REQUEST_METHOD']} {environ['PATH_INFO']} HTTP/1.1\r\n")
+    for key, value in environ.items():
+        if key.startswith('HTTP_'):
+            size += len(f"{key[5:].replace('_', '-').title()}: {value}\r\n")
+    return size
+
+
+def browse(client, ingredients, whole_week):
+    """(cookie bytes, request bytes per page view, failed pages) after generating a plan"""
+    response = client.post('/api/generate-plan', json={
+        'num_children': 20, 'budget': 2000, 'age_group': '3-6 years',
+        'ingredients': ingredients, 'whole_week': whole_week
+    })
+    assert response.status_code == 200, response.get_json()
+
+    sizes, failed = [], []
+    for path in PAGE_VIEWS:
+        response = client.get(path)
+        sizes.append(request_bytes(response))
+        if response.status_code != 200:
+            failed.append(path)
+    cookie = response.request.environ.get('HTTP_COOKIE', '')
+    return len(cookie), sum(sizes) / len(sizes), failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--ingredients', type=int, default=12, help='Ingredients selected for the plan')
+    parser.add_argument('--whole-week', action='store_true', help='Optimize the week as one problem')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_PATH = os.path.join(tmp, "bench.db")
+        os.chdir(tmp)  # flask_app creates its own tables relative to the cwd
+        import flask_app
+
+        ingredients = db.get_all_ingredients()['name'].tolist()[:args.ingredients]
+        store_interface = flask_app.app.session_interface
+        remember_plan = flask_app.remember_plan
+
+        # Before: signed cookie session carrying the whole plan
+        def remember_whole_plan(plan_id):
+            row = db.get_meal_plan(plan_id)
+            session.update(current_plan=db.meal_plan_from_row(row), plan_id=plan_id,
+                           num_children=row['num_children'], budget=row['budget'])
+
+        flask_app.app.session_interface = SecureCookieSessionInterface()
+        flask_app.remember_plan = remember_whole_plan
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # werkzeug warns about the oversized cookie
+            before = browse(flask_app.app.test_client(), ingredients, args.whole_week)
+
+        # After: server-side session, cookie holds the session id
+        flask_app.app.session_interface = store_interface
+        flask_app.remember_plan = remember_plan
+        after = browse(flask_app.app.test_client(), ingredients, args.whole_week)
+
+        db_pool.close_all()
+        flask_app.job_queue.stop(timeout=5)
+
+    print(f"Plan over {len(ingredients)} ingredients, {len(PAGE_VIEWS)} page views after generating it")
+    print(f"{'Session':<24} {'Cookie (B)':>10} {'Request (B/view)':>17} {'Fits browser':>13}")
+    print("-" * 67)
+    for name, (cookie, per_view, failed) in [('signed cookie', before), ('SQLite store', after)]:
+        fits = 'yes' if cookie <= BROWSER_COOKIE_LIMIT else 'no'
+        print(f"{name:<24} {cookie:>10,} {per_view:>17,.0f} {fits:>13}")
+        if failed:
+            print(f"  non-200 pages: {', '.join(failed)}")
+    print(f"Reduction: {before[1] / after[1]:.1f}x fewer request bytes per page view")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Worker Startup Benchmark
+Time-to-first-request for a fresh process importing flask_app, and which
+of its imports cost the most (from python -X importtime)
+
+Each run starts a new interpreter in a temporary directory with an
+already-migrated database (as a gunicorn worker would find it), imports
+flask_app and serves GET / with the Flask test client. --preload also
+loads every lazy subsystem before the request, which approximates the old
+eager startup.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--runs 5] [--top 15] [--preload]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {repo!r})
+import flask_app
+imported = time.perf_counter()
+if {preload!r}:
+    flask_app.subsystems.preload()
+response = flask_app.app.test_client().get('/')
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+flask_app.job_queue.stop(timeout=5)
+print(json.dumps({{'import_ms': (imported - start) * 1000, 'first_request_ms': (done - imported) * 1000}}))
+"""
+
+
+def parse_importtime(stderr):
+    """(total_ms, [(module, cumulative_ms)]) for flask_app and its direct imports"""
+    direct = []
+    total_ms = None
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if depth == 0:
+            if name == 'flask_app':
+                total_ms = int(cumulative) / 1000
+                break
+            direct = []  # imports of an earlier top-level module
+        elif depth == 1:
+            direct.append((name, int(cumulative) / 1000))
+    return total_ms, sorted(direct, key=lambda item: -item[1])
+
+
+def run_worker(workdir, preload):
+    """One fresh interpreter; returns wall time, script timings and importtime output"""
+    script = WORKER_SCRIPT.format(repo=REPO_DIR, preload=preload)
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=workdir, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return wall_ms, timings, result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh processes to time')
+    parser.add_argument('--top', type=int, default=15, help='Slowest direct imports of flask_app to list')
+    parser.add_argument('--preload', action='store_true', help='Load all lazy subsystems before the request')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Migrate first so the runs don't include creating the database
+        subprocess.run(
+            [sys.executable, '-c', f"import sys; sys.path.insert(0, {REPO_DIR!r}); "
+                                   "import database; database.initialize_database()"],
+            cwd=tmp, capture_output=True, check=True
+        )
+
+        walls, imports, requests = [], [], []
+        for _ in range(args.runs):
+            wall_ms, timings, stderr = run_worker(tmp, args.preload)
+            walls.append(wall_ms)
+            imports.append(timings['import_ms'])
+            requests.append(timings['first_request_ms'])
+
+    importtime_ms, direct = parse_importtime(stderr)
+
+    print(f"Worker startup ({args.runs} runs{', subsystems preloaded' if args.preload else ''})")
+    print(f"{'Stage':<34} {'median (ms)':>12}")
+    print("-" * 47)
+    print(f"{'import flask_app':<34} {np.median(imports):>12.1f}")
+    print(f"{'first GET /':<34} {np.median(requests):>12.1f}")
+    print(f"{'process start to exit':<34} {np.median(walls):>12.1f}")
+
+    if importtime_ms is not None and args.top:
+        print(f"\n-X importtime: flask_app {importtime_ms:.1f} ms cumulative (last run)")
+        print(f"{'Direct import':<34} {'cumulative (ms)':>16}")
+        print("-" * 51)
+        for name, ms in direct[:args.top]:
+            print(f"{name:<34} {ms:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
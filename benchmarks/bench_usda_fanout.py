@@ -0,0 +1,120 @@
+"""
+USDA Fan-out Benchmark
+Latency of USDAFoodAPI.compare_foods against a local stub FoodData Central
+server that adds a fixed delay to every request
+
+Compares the old one-food-at-a-time pattern (search, then details, for
+each food in turn) with compare_foods (concurrent searches plus one bulk
+/foods request). Both start with an empty response cache, so every
+request reaches the stub server.
+
+Run from the repository root:
+    python benchmarks/bench_usda_fanout.py [--foods 10] [--latency-ms 100]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_pool
+from usda_api import USDAFoodAPI, FDCResponseCache
+
+
+def make_stub_server(num_foods, latency):
+    """Stub FDC server with foods 'Food 0'..'Food n-1'; returns (server, request counter)"""
+    foods = {
+        fdc_id: {'fdcId': fdc_id, 'description': f"Food {fdc_id}", 'foodNutrients': [
+            {'nutrient': {'name': 'Protein', 'unitName': 'g'}, 'amount': fdc_id % 25}
+        ]}
+        for fdc_id in range(num_foods)
+    }
+    requests_seen = []
+
+    class StubFDC(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # allow keep-alive
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.endswith('/foods/search'):
+                fdc_id = int(parse_qs(url.query)['query'][0].split()[-1])
+                self.reply({'foods': [foods[fdc_id]]})
+            else:
+                self.reply(foods[int(url.path.rsplit('/', 1)[1])])
+
+        def do_POST(self):
+            ids = json.loads(self.rfile.read(int(self.headers['Content-Length'])))['fdcIds']
+            self.reply([foods[i] for i in ids])
+
+        def reply(self, body):
+            requests_seen.append(self.path)
+            time.sleep(latency)
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubFDC)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests_seen
+
+
+def one_at_a_time(api, food_names):
+    """The previous compare_foods: search then details, per food, sequentially"""
+    results = {}
+    for food_name in food_names:
+        search_results = api.search_foods(food_name, page_size=1)
+        if search_results:
+            summary = api.get_nutrition_summary(search_results[0]['fdc_id'])
+            if summary:
+                results[food_name] = summary
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--foods', type=int, default=10, help='Foods to compare')
+    parser.add_argument('--latency-ms', type=float, default=100, help='Delay per stub request')
+    args = parser.parse_args()
+
+    server, requests_seen = make_stub_server(args.foods, args.latency_ms / 1000)
+    base_url = f"http://127.0.0.1:{server.server_port}/fdc/v1"
+    food_names = [f"Food {i}" for i in range(args.foods)]
+
+    print(f"Comparing {args.foods} foods, {args.latency_ms:.0f} ms per request")
+    print(f"{'Mode':<32} {'Time (ms)':>10} {'Requests':>9}")
+    print("-" * 53)
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, run in [('one food at a time', one_at_a_time),
+                          ('compare_foods (fan-out + bulk)', USDAFoodAPI.compare_foods)]:
+            api = USDAFoodAPI("bench-key", base_url=base_url,
+                              cache=FDCResponseCache(os.path.join(tmp, f"{len(timings)}.db")))
+            requests_seen.clear()
+            start = time.perf_counter()
+            results = run(api, food_names)
+            timings[mode] = (time.perf_counter() - start) * 1000
+            assert len(results) == args.foods
+            print(f"{mode:<32} {timings[mode]:>10.1f} {len(requests_seen):>9}")
+        db_pool.close_all()
+
+    server.shutdown()
+    before, after = timings.values()
+    print(f"Speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Synthetic Data Generators for Benchmarks
+Ingredients, children, growth measurements and mandi prices at any scale
+
+make_ingredients() returns a DataFrame for optimizer-only benchmarks; the
+seed_* functions write rows into the database at database.DATABASE_PATH, so
+point that at a throwaway file first.
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+
+# Category mix roughly matching the sample ingredients in database.py
+CATEGORY_WEIGHTS = {
+    'Grains': 0.15,
+    'Pulses': 0.15,
+    'Vegetables': 0.20,
+    'Dairy': 0.10,
+    'Fruits': 0.20,
+    'Leafy Vegetables': 0.10,
+    'Nutrition Rich': 0.10
+}
+
+VILLAGES = ['Hubli', 'Dharwad', 'Gadag', 'Haveri', 'Belgaum']
+
+
+def make_ingredients(n, seed=0):
+    """Generate a synthetic ingredient catalog with n rows"""
+    rng = np.random.default_rng(seed)
+    categories = rng.choice(
+        list(CATEGORY_WEIGHTS.keys()), size=n, p=list(CATEGORY_WEIGHTS.values())
+    )
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'name': [f"Ingredient {i}" for i in range(n)],
+        'category': categories,
+        'cost_per_kg': rng.uniform(20, 150, n).round(1),
+        'protein_per_100g': rng.uniform(0.5, 25, n).round(1),
+        'carbs_per_100g': rng.uniform(2, 80, n).round(1),
+        'fat_per_100g': rng.uniform(0.1, 20, n).round(1),
+        'calories_per_100g': rng.uniform(50, 400, n).round(0),
+        'fiber_per_100g': rng.uniform(0, 15, n).round(1),
+        'iron_per_100g': rng.uniform(0, 10, n).round(1),
+        'calcium_per_100g': rng.uniform(0, 300, n).round(0)
+    })
+
+
+def seed_ingredients(n, seed=0):
+    """Add n synthetic ingredients to the database; returns their names"""
+    df = make_ingredients(n, seed).drop(columns=['id'])
+    df['name'] = [f"Synthetic {name}" for name in df['name']]
+
+    conn = db.get_connection()
+    columns = list(df.columns)
+    conn.executemany(
+        f"INSERT OR IGNORE INTO ingredients ({', '.join(columns)}) "
+        f"VALUES ({', '.join('?' for _ in columns)})",
+        df.itertuples(index=False, name=None)
+    )
+    conn.commit()
+    conn.close()
+    return df['name'].tolist()
+
+
+def seed_children(n, seed=0):
+    """Add n children born 0-5 years ago; returns their ids"""
+    rng = np.random.default_rng(seed)
+    today = date.today()
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    child_ids = []
+    for i in range(n):
+        dob = today - timedelta(days=int(rng.integers(30, 5 * 365)))
+        cursor.execute("""
+            INSERT INTO children (name, date_of_birth, gender, parent_name, phone_number, village)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (f"Child {i}", dob.isoformat(), rng.choice(['Male', 'Female']),
+              f"Parent {i}", "9999999999", VILLAGES[i % len(VILLAGES)]))
+        child_ids.append(cursor.lastrowid)
+    conn.commit()
+    conn.close()
+    return child_ids
+
+
+def seed_growth_tracking(child_ids, measurements_per_child, seed=0):
+    """Add monthly weight/height measurements for each child"""
+    rng = np.random.default_rng(seed)
+
+    conn = db.get_connection()
+    rows = []
+    for child_id, dob in conn.execute(
+        f"SELECT id, date_of_birth FROM children WHERE id IN ({', '.join('?' for _ in child_ids)})",
+        list(child_ids)
+    ).fetchall():
+        born = date.fromisoformat(dob)
+        weight, height = 3.0 + rng.random(), 49.0 + rng.random() * 3
+        for m in range(measurements_per_child):
+            weight += rng.uniform(0.05, 0.6)
+            height += rng.uniform(0.3, 2.5)
+            bmi = weight / (height / 100) ** 2
+            rows.append((child_id, (born + timedelta(days=30 * (m + 1))).isoformat(),
+                         round(weight, 2), round(height, 1), round(bmi, 2)))
+
+    conn.executemany("""
+        INSERT INTO growth_tracking (child_id, measurement_date, weight_kg, height_cm, bmi)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+    return len(rows)
+
+
+def seed_food_prices(ingredient_names, days, seed=0):
+    """Add one mandi price per ingredient per day for the last `days` days"""
+    rng = np.random.default_rng(seed)
+    today = date.today()
+
+    conn = db.get_connection()
+    # Read by mandi_price_forecasting but not created by initialize_database
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS food_prices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ingredient_name TEXT NOT NULL,
+            village TEXT,
+            price_per_kg REAL NOT NULL,
+            month TEXT,
+            year INTEGER,
+            source TEXT,
+            recorded_date DATE
+        )
+    """)
+
+    rows = []
+    for name in ingredient_names:
+        price = rng.uniform(20, 150)
+        drift = rng.normal(0, 0.2)
+        for d in range(days, 0, -1):
+            day = today - timedelta(days=d)
+            price = max(5.0, price + drift + rng.normal(0, 1))
+            rows.append((name, VILLAGES[d % len(VILLAGES)], round(price, 2),
+                         day.strftime('%B'), day.year, 'Synthetic', day.isoformat()))
+
+    conn.executemany("""
+        INSERT INTO food_prices
+        (ingredient_name, village, price_per_kg, month, year, source, recorded_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    db.create_indexes(conn)
+    conn.commit()
+    conn.close()
+    return len(rows)
@@ -0,0 +1,291 @@
+"""
+Benchmark Suite
+Times the optimizer, database layer, exports, forecasting and main API
+routes against synthetic data, and saves the results as JSON
+
+Each scenario is run a few times after a warm-up call and reported as
+min/median/mean/p95 in milliseconds. Results from two runs (e.g. before and
+after a change) can be compared with --compare.
+
+Run from the repository root:
+    python benchmarks/run_benchmarks.py [--scale small|medium|large] [--runs 5]
+        [--only optimizer] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import database as db
+import db_pool
+from data_generators import seed_ingredients, seed_children, seed_growth_tracking, seed_food_prices
+
+# Extra synthetic rows added on top of the sample data
+SCALES = {
+    'small': {'ingredients': 100, 'children': 50, 'measurements': 12, 'price_days': 90},
+    'medium': {'ingredients': 500, 'children': 500, 'measurements': 24, 'price_days': 180},
+    'large': {'ingredients': 2000, 'children': 5000, 'measurements': 24, 'price_days': 365}
+}
+
+# Ingredients offered to the optimizer and API scenarios
+PLAN_INGREDIENTS = 30
+
+SCENARIOS = []
+
+
+def scenario(name):
+    """
+    Register a benchmark scenario
+
+    The decorated function receives the seeded context dict and returns the
+    zero-argument callable to time (setup work stays outside the timing).
+    """
+    def register(setup):
+        SCENARIOS.append((name, setup))
+        return setup
+    return register
+
+
+@scenario('optimizer.generate_meal_plan[per-meal]')
+def bench_plan_per_meal(ctx):
+    import meal_optimizer as mo
+    optimizer = mo.MealOptimizer(db.get_all_ingredients(), budget=3000, num_children=20)
+    return lambda: optimizer.generate_meal_plan(ctx['plan_ingredients'])
+
+
+@scenario('optimizer.generate_meal_plan[whole-week]')
+def bench_plan_whole_week(ctx):
+    import meal_optimizer as mo
+    optimizer = mo.MealOptimizer(db.get_all_ingredients(), budget=3000, num_children=20)
+    return lambda: optimizer.generate_meal_plan(ctx['plan_ingredients'], whole_week=True)
+
+
+@scenario('utils.export_to_pdf')
+def bench_export_pdf(ctx):
+    from utils import export_to_pdf
+    return lambda: export_to_pdf(ctx['meal_plan'], 20, 3000)
+
+
+@scenario('database.get_growth_chart_data')
+def bench_growth_chart(ctx):
+    child_ids = iter_cycle(ctx['child_ids'])
+    return lambda: db.get_growth_chart_data(next(child_ids))
+
+
+@scenario('database.get_growth_series')
+def bench_growth_series(ctx):
+    child_ids = iter_cycle(ctx['child_ids'])
+    return lambda: db.get_growth_series(next(child_ids))
+
+
+@scenario('database.get_all_ingredients')
+def bench_all_ingredients(ctx):
+    return db.get_all_ingredients
+
+
+@scenario('predictive.screen_malnutrition_risk')
+def bench_risk_screening(ctx):
+    from predictive_analytics import PredictiveAnalytics
+    return PredictiveAnalytics(db.DATABASE_PATH).screen_malnutrition_risk
+
+
+@scenario('mandi.forecast_price')
+def bench_forecast_price(ctx):
+    from mandi_price_forecasting import MandiPriceForecaster
+    forecaster = MandiPriceForecaster(db.DATABASE_PATH)
+    names = iter_cycle(ctx['priced_ingredients'])
+    return lambda: forecaster.forecast_price(next(names), days_ahead=7)
+
+
+@scenario('api GET /')
+def bench_api_index(ctx):
+    client = ctx['client']
+    return lambda: check(client.get('/'))
+
+
+@scenario('api POST /api/generate-plan[cached]')
+def bench_api_generate_cached(ctx):
+    client = ctx['client']
+    body = {'ingredients': ctx['plan_ingredients'], 'budget': 3000, 'num_children': 20}
+    return lambda: check(client.post('/api/generate-plan', json=body))
+
+
+@scenario('api POST /api/generate-plan[uncached]')
+def bench_api_generate_uncached(ctx):
+    client = ctx['client']
+    budgets = iter(range(3000, 10 ** 9))
+    # A new budget every call defeats the plan cache
+    return lambda: check(client.post('/api/generate-plan', json={
+        'ingredients': ctx['plan_ingredients'], 'budget': next(budgets), 'num_children': 20
+    }))
+
+
+@scenario('api GET /api/growth-data/<id>')
+def bench_api_growth_data(ctx):
+    client = ctx['client']
+    child_ids = iter_cycle(ctx['child_ids'])
+    return lambda: check(client.get(f"/api/growth-data/{next(child_ids)}"))
+
+
+@scenario('api GET /analytics')
+def bench_api_analytics(ctx):
+    client = ctx['client']
+    return lambda: check(client.get('/analytics'))
+
+
+def iter_cycle(items):
+    """Endless round-robin over items"""
+    while True:
+        yield from items
+
+
+def check(response):
+    """Fail loudly instead of timing error pages"""
+    if response.status_code not in (200, 304):
+        raise RuntimeError(f"HTTP {response.status_code}: {response.data[:200]!r}")
+    return response
+
+
+def time_scenario(func, runs):
+    """Timing stats (ms) for runs calls of func, after one warm-up call"""
+    func()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.array(timings)
+    return {
+        'runs': runs,
+        'min_ms': round(float(timings.min()), 3),
+        'median_ms': round(float(np.median(timings)), 3),
+        'mean_ms': round(float(timings.mean()), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3)
+    }
+
+
+def build_context(scale):
+    """Seed a fresh database in the cwd and return what scenarios need"""
+    db.initialize_database()
+    synthetic = seed_ingredients(scale['ingredients'])
+    child_ids = seed_children(scale['children'])
+    seed_growth_tracking(child_ids, scale['measurements'])
+    seed_food_prices(synthetic[:20], scale['price_days'])
+
+    import meal_optimizer as mo
+    plan_ingredients = db.get_all_ingredients()['name'].tolist()[:PLAN_INGREDIENTS]
+    optimizer = mo.MealOptimizer(db.get_all_ingredients(), budget=3000, num_children=20)
+
+    import flask_app
+    return {
+        'plan_ingredients': plan_ingredients,
+        'meal_plan': optimizer.generate_meal_plan(plan_ingredients),
+        'child_ids': child_ids,
+        'priced_ingredients': synthetic[:20],
+        'client': flask_app.app.test_client(),
+        'flask_app': flask_app
+    }
+
+
+def git_commit():
+    """Short hash of the checked-out commit, if available"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print median ratios against a previous results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    print(f"\nCompared with {baseline_path} ({baseline['metadata'].get('commit')})")
+    print(f"{'Scenario':<45} {'Before (ms)':>12} {'After (ms)':>11} {'Ratio':>7}")
+    print("-" * 78)
+    for name, stats in results['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if not before or 'median_ms' not in before or 'median_ms' not in stats:
+            continue
+        ratio = stats['median_ms'] / before['median_ms'] if before['median_ms'] else float('nan')
+        flag = '  slower' if ratio > 1.1 else ('  faster' if ratio < 0.9 else '')
+        print(f"{name:<45} {before['median_ms']:>12.2f} {stats['median_ms']:>11.2f} {ratio:>6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=list(SCALES), default='small', help='Synthetic data size')
+    parser.add_argument('--runs', type=int, default=5, help='Timed calls per scenario')
+    parser.add_argument('--only', default='', help='Run scenarios whose name contains this text')
+    parser.add_argument('--output', help='Results JSON file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    args = parser.parse_args()
+
+    scale = SCALES[args.scale]
+    results = {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'scale_params': scale
+        },
+        'scenarios': {}
+    }
+
+    start_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app and feature modules use nutrition_advisor.db in the cwd
+        os.chdir(tmp)
+        db.DATABASE_PATH = os.path.join(tmp, "nutrition_advisor.db")
+        print(f"Seeding {args.scale} dataset: {scale}")
+        ctx = build_context(scale)
+
+        print(f"\n{'Scenario':<45} {'median (ms)':>12} {'p95 (ms)':>10}")
+        print("-" * 69)
+        for name, setup in SCENARIOS:
+            if args.only not in name:
+                continue
+            try:
+                stats = time_scenario(setup(ctx), args.runs)
+            except Exception as e:
+                results['scenarios'][name] = {'error': str(e)}
+                print(f"{name:<45} {'error: ' + str(e)[:40]}")
+                continue
+            results['scenarios'][name] = stats
+            print(f"{name:<45} {stats['median_ms']:>12.2f} {stats['p95_ms']:>10.2f}")
+
+        ctx['flask_app'].job_queue.stop(timeout=5)
+        db_pool.close_all()
+        os.chdir(start_dir)
+
+    output = args.output or os.path.join(
+        BENCH_DIR, 'results', f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Bulk Export
+Many saved meal plans as one ZIP archive, streamed while it is built
+
+stream_zip() writes each plan's export into a zipfile.ZipFile over a
+write-only stream and yields the compressed bytes as soon as each entry
+is written, so the response starts at once and memory stays flat however
+many plans are exported. PDFs are rendered in a process pool with a
+bounded number in flight and written in completion order; CSV and JSON
+are cheap enough to render inline. Exports already in the ExportCache are
+reused, but bulk renders are not added to it so one large export doesn't
+evict every recent download.
+"""
+
+import io
+import multiprocessing
+import os
+import zipfile
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from export_cache import render_plan_row
+
+# Renders queued per worker process; bounds the plans held in memory
+IN_FLIGHT_PER_WORKER = 2
+
+
+class _ChunkStream(io.RawIOBase):
+    """Write-only, unseekable stream whose written bytes are collected with take()"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def entry_info(row, fmt):
+    """ZipInfo for a plan: <created date>/plan_<id>.<fmt>, dated when the plan was saved"""
+    created = str(row['created_at'] or '')
+    info = zipfile.ZipInfo(f"{created[:10] or 'undated'}/plan_{row['id']}.{fmt}")
+    try:
+        info.date_time = datetime.fromisoformat(created).timetuple()[:6]
+    except ValueError:
+        pass
+    info.compress_type = zipfile.ZIP_STORED if fmt == 'pdf' else zipfile.ZIP_DEFLATED
+    return info
+
+
+def iter_entries(rows, fmt, cache=None, max_workers=None):
+    """
+    (ZipInfo, bytes) for each row that has a plan to export
+
+    PDFs not found in cache are rendered across max_workers processes
+    (default: CPU count) and come back in completion order.
+    """
+    if fmt != 'pdf':
+        for row in rows:
+            data = (cache.read(row['id'], fmt) if cache else None) or render_plan_row(row, fmt)
+            if data is not None:
+                yield entry_info(row, fmt), data
+        return
+
+    max_workers = max_workers or os.cpu_count() or 1
+    # Spawned, not forked: the web app has live worker threads, pooled SQLite
+    # connections and the rows cursor open while this runs
+    pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+    pending = {}
+    try:
+        for row in rows:
+            data = cache.read(row['id'], fmt) if cache else None
+            if data is not None:
+                yield entry_info(row, fmt), data
+                continue
+
+            pending[pool.submit(render_plan_row, row, fmt)] = entry_info(row, fmt)
+            if len(pending) >= max_workers * IN_FLIGHT_PER_WORKER:
+                yield from _finished(pending)
+
+        while pending:
+            yield from _finished(pending)
+    finally:
+        # Don't keep rendering if the client went away
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _finished(pending):
+    """Wait for at least one render and take the finished ones out of pending"""
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        info = pending.pop(future)
+        data = future.result()
+        if data is not None:
+            yield info, data
+
+
+def stream_zip(rows, fmt, cache=None, max_workers=None):
+    """
+    Yield a ZIP archive of the rows' fmt exports in chunks, one per entry
+
+    Args:
+        rows: Iterable of meal_plans rows (dicts), e.g. db.iter_meal_plans()
+        fmt: Export format (export_cache.FORMATS)
+        cache: Optional ExportCache to take already rendered exports from
+        max_workers: PDF render processes (default: CPU count)
+    """
+    stream = _ChunkStream()
+    with zipfile.ZipFile(stream, 'w') as archive:
+        for info, data in iter_entries(rows, fmt, cache, max_workers):
+            archive.writestr(info, data)
+            yield stream.take()
+    yield stream.take()
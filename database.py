@@ -4,169 +4,233 @@ Handles SQLite database operations for ingredients and meal plans
 """
 
 import sqlite3
+import json
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
 
+import db_pool
+import growth_standards
+import migrations
+import search_index
+
 DATABASE_PATH = "nutrition_advisor.db"
 
+# Secondary indexes for the hot lookups: name -> (table, columns). The
+# trailing columns make them covering for the queries in HOT_QUERIES.
+INDEXES = {
+    'idx_growth_tracking_child_date': (
+        'growth_tracking', ['child_id', 'measurement_date', 'weight_kg', 'height_cm', 'bmi']
+    ),
+    'idx_immunisation_status_due': ('immunisation_schedule', ['status', 'due_date', 'child_id']),
+    'idx_immunisation_child_status': ('immunisation_schedule', ['child_id', 'status', 'due_date']),
+    'idx_children_village': ('children', ['village']),
+    'idx_food_prices_ingredient_date': (
+        'food_prices', ['ingredient_name', 'recorded_date', 'price_per_kg', 'village', 'source']
+    ),
+    'idx_food_waste_anganwadi_date': (
+        'food_waste', ['anganwadi_id', 'date', 'ingredient_name', 'quantity_wasted_g', 'reason']
+    ),
+    'idx_meal_plans_created': ('meal_plans', ['created_at']),
+    'idx_meal_plan_items_plan': ('meal_plan_items', ['plan_id', 'ingredient_id', 'total_g', 'cost']),
+    'idx_meal_plan_items_ingredient': ('meal_plan_items', ['ingredient_id', 'plan_id', 'total_g'])
+}
+
+# Hot lookups, run by the functions named in each comment and by
+# check_query_plans(), so the checked SQL is the SQL that runs.
+
+# get_growth_series
+GROWTH_SERIES_SQL = """
+    SELECT gt.*, c.name as child_name, c.date_of_birth, c.gender
+    FROM growth_tracking gt
+    JOIN children c ON gt.child_id = c.id
+    WHERE gt.child_id = ?
+    ORDER BY gt.measurement_date ASC, gt.id ASC
+"""
+
+# get_latest_growth
+LATEST_GROWTH_SQL = """
+    SELECT * FROM growth_tracking
+    WHERE child_id = ?
+    ORDER BY measurement_date DESC
+    LIMIT 1
+"""
+
+# PredictiveAnalytics.predict_malnutrition_risk
+RISK_HISTORY_SQL = """
+    SELECT measurement_date, weight_kg, height_cm, bmi
+    FROM growth_tracking
+    WHERE child_id = ?
+    ORDER BY measurement_date DESC
+    LIMIT ?
+"""
+
+# get_pending_immunisations
+PENDING_IMMUNISATIONS_SQL = """
+    SELECT i.id, c.name, c.parent_name, c.phone_number, c.village,
+           i.vaccine_name, i.due_date, i.notes, i.reminder_sent
+    FROM immunisation_schedule i
+    JOIN children c ON i.child_id = c.id
+    WHERE i.status = 'Pending'
+    ORDER BY i.due_date
+"""
+
+# PredictiveAnalytics.immunization_coverage_prediction
+VILLAGE_IMMUNISATION_SQL = """
+    SELECT 
+        c.id, c.name, c.date_of_birth,
+        COUNT(i.id) as total_vaccines,
+        SUM(CASE WHEN i.status = 'Completed' THEN 1 ELSE 0 END) as completed_vaccines,
+        SUM(CASE WHEN i.due_date < date('now') AND i.status != 'Completed' THEN 1 ELSE 0 END) as overdue_vaccines
+    FROM children c
+    LEFT JOIN immunisation_schedule i ON c.id = i.child_id
+    WHERE c.village = ?
+    GROUP BY c.id
+"""
+
+# MandiPriceForecaster.get_historical_prices
+PRICE_HISTORY_SQL = """
+    SELECT 
+        recorded_date as date,
+        price_per_kg as price,
+        village,
+        source
+    FROM food_prices 
+    WHERE ingredient_name = ?
+    AND recorded_date >= date('now', '-' || ? || ' days')
+    ORDER BY recorded_date
+"""
+
+# PredictiveAnalytics.forecast_food_waste
+WASTE_HISTORY_SQL = """
+    SELECT date, ingredient_name, quantity_wasted_g, reason
+    FROM food_waste
+    WHERE anganwadi_id = ?
+    AND date >= date('now', '-90 days')
+    ORDER BY date
+"""
+
+# iter_meal_plans
+MEAL_PLANS_BY_DATE_SQL = """
+    SELECT * FROM meal_plans
+    WHERE created_at >= ? AND created_at < ?
+    ORDER BY created_at, id
+"""
+
+# get_shopping_list
+SHOPPING_LIST_SQL = """
+    SELECT i.name, i.category, totals.total_g, totals.cost
+    FROM (
+        SELECT ingredient_id, SUM(total_g) AS total_g, SUM(cost) AS cost
+        FROM meal_plan_items
+        WHERE plan_id = ?
+        GROUP BY ingredient_id
+    ) totals
+    JOIN ingredients i ON i.id = totals.ingredient_id
+    ORDER BY i.name
+"""
+
+# get_plan_category_totals
+PLAN_CATEGORY_TOTALS_SQL = """
+    SELECT i.category, SUM(mpi.total_g)
+    FROM meal_plan_items mpi
+    JOIN ingredients i ON i.id = mpi.ingredient_id
+    WHERE mpi.plan_id = ?
+    GROUP BY i.category
+"""
+
+# MealPersonalizationEngine.analyze_child_preferences
+CHILD_AFFINITY_SQL = """
+    SELECT i.name, a.liked, a.disliked
+    FROM child_ingredient_affinity a
+    JOIN ingredients i ON i.id = a.ingredient_id
+    WHERE a.child_id = ?
+"""
+
+# Queries that must not scan a whole table: name -> (sql, sample params),
+# checked by check_query_plans()
+HOT_QUERIES = {
+    'growth history': (GROWTH_SERIES_SQL, (1,)),
+    'latest growth': (LATEST_GROWTH_SQL, (1,)),
+    'malnutrition risk': (RISK_HISTORY_SQL, (1, 6)),
+    'pending immunisations': (PENDING_IMMUNISATIONS_SQL, ()),
+    'village immunisation coverage': (VILLAGE_IMMUNISATION_SQL, ('Hubli',)),
+    'mandi price history': (PRICE_HISTORY_SQL, ('Rice', 90)),
+    'food waste history': (WASTE_HISTORY_SQL, (1,)),
+    'meal plans by date': (MEAL_PLANS_BY_DATE_SQL, ('2025-01-01', '2025-02-01')),
+    'shopping list': (SHOPPING_LIST_SQL, (1,)),
+    'plan category totals': (PLAN_CATEGORY_TOTALS_SQL, (1,)),
+    'child affinity': (CHILD_AFFINITY_SQL, (1,))
+}
+
 def get_connection():
-    """Create and return a database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    return conn
+    """Get this thread's pooled database connection (close() returns it to the pool)"""
+    return db_pool.get_connection(DATABASE_PATH)
 
 def initialize_database():
-    """Initialize database with tables and sample data"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Create ingredients table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS ingredients (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE,
-            category TEXT NOT NULL,
-            cost_per_kg REAL NOT NULL,
-            protein_per_100g REAL,
-            carbs_per_100g REAL,
-            fat_per_100g REAL,
-            calories_per_100g REAL,
-            fiber_per_100g REAL,
-            iron_per_100g REAL,
-            calcium_per_100g REAL,
-            serving_size_g REAL DEFAULT 100,
-            is_vegetarian INTEGER DEFAULT 1,
-            is_vegan INTEGER DEFAULT 0,
-            allergens TEXT,
-            dietary_tags TEXT
-        )
-    """)
-    
-    # Create meal_plans table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS meal_plans (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            plan_name TEXT,
-            budget REAL,
-            num_children INTEGER,
-            age_group TEXT,
-            total_cost REAL,
-            nutrition_score REAL,
-            plan_data TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Create feedback table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS meal_feedback (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            plan_id INTEGER,
-            rating INTEGER,
-            comments TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (plan_id) REFERENCES meal_plans(id)
-        )
-    """)
-    
-    # Create children table for immunisation tracking
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS children (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            date_of_birth DATE NOT NULL,
-            gender TEXT,
-            parent_name TEXT,
-            phone_number TEXT,
-            address TEXT,
-            village TEXT,
-            health_notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-    
-    # Create immunisation schedule table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS immunisation_schedule (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            child_id INTEGER,
-            vaccine_name TEXT NOT NULL,
-            due_date DATE NOT NULL,
-            administered_date DATE,
-            status TEXT DEFAULT 'Pending',
-            notes TEXT,
-            reminder_sent INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (child_id) REFERENCES children(id)
-        )
-    """)
-    
-    # Create health information table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS health_information (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            disease_name TEXT NOT NULL,
-            category TEXT,
-            symptoms TEXT,
-            prevention TEXT,
-            treatment TEXT,
-            precautions TEXT,
-            age_group TEXT,
-            severity TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    """Create or upgrade the database schema and sample data (see migrations.py)"""
+    applied = migrations.migrate(DATABASE_PATH)
+    if applied:
+        print(f"✅ Database initialized successfully! (schema version {applied[-1]})")
+
+def create_indexes(conn):
+    """
+    Create any missing INDEXES on the tables that exist
     
-    # Create growth tracking table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS growth_tracking (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            child_id INTEGER NOT NULL,
-            measurement_date DATE NOT NULL,
-            weight_kg REAL NOT NULL,
-            height_cm REAL NOT NULL,
-            bmi REAL,
-            head_circumference_cm REAL,
-            muac_cm REAL,
-            notes TEXT,
-            measured_by TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (child_id) REFERENCES children(id)
-        )
-    """)
+    Migrations that add a table with an entry in INDEXES call this (and
+    commit) after creating it.
     
-    # Create dietary preferences table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS dietary_preferences (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            child_id INTEGER NOT NULL,
-            is_vegetarian INTEGER DEFAULT 0,
-            is_vegan INTEGER DEFAULT 0,
-            is_halal INTEGER DEFAULT 0,
-            is_kosher INTEGER DEFAULT 0,
-            allergies TEXT,
-            food_dislikes TEXT,
-            medical_restrictions TEXT,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (child_id) REFERENCES children(id)
-        )
-    """)
-    
-    conn.commit()
+    Returns:
+        Names of the indexes created
+    """
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
     
-    # Check if ingredients table is empty
-    cursor.execute("SELECT COUNT(*) FROM ingredients")
-    if cursor.fetchone()[0] == 0:
-        insert_sample_ingredients(conn)
+    created = []
+    for name, (table, columns) in INDEXES.items():
+        if table in tables and name not in existing:
+            conn.execute(f"CREATE INDEX {name} ON {table}({', '.join(columns)})")
+            created.append(name)
+    if created:
+        conn.execute("ANALYZE")
+    return created
+
+def check_query_plans():
+    """
+    Run EXPLAIN QUERY PLAN on HOT_QUERIES and flag full table scans
     
-    # Check if health_information table is empty
-    cursor.execute("SELECT COUNT(*) FROM health_information")
-    if cursor.fetchone()[0] == 0:
-        insert_health_information(conn)
+    A SCAN of a table without an index is a full scan; scanning a covering
+    index or a subquery is fine. Queries on tables that don't exist are
+    skipped.
     
-    conn.close()
-    print("✅ Database initialized successfully!")
+    Returns:
+        Dict of query name -> {'plan': [steps], 'full_scans': [steps]}
+        ('skipped' holds the reason instead when the query can't be planned)
+    """
+    conn = get_connection()
+    report = {}
+    try:
+        for name, (sql, params) in HOT_QUERIES.items():
+            try:
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            except sqlite3.OperationalError as e:
+                report[name] = {'skipped': str(e)}
+                continue
+            plan = [row[3] for row in rows]
+            # Subqueries show up as "MATERIALIZE totals" / "CO-ROUTINE totals", then "SCAN totals"
+            subqueries = {step.split(' ', 1)[1] for step in plan if step.startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+            report[name] = {
+                'plan': plan,
+                'full_scans': [
+                    step for step in plan
+                    if step.startswith('SCAN ') and ' USING ' not in step
+                    and step[len('SCAN '):] not in subqueries and '(subquery' not in step
+                ]
+            }
+    finally:
+        conn.close()
+    return report
 
 def insert_sample_ingredients(conn):
     """Insert sample Indian ingredients with nutritional data"""
@@ -267,7 +331,6 @@ def insert_sample_ingredients(conn):
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, ingredients)
     
-    conn.commit()
     print(f"✅ Inserted {len(ingredients)} sample ingredients")
 
 def get_all_ingredients():
@@ -282,30 +345,286 @@ def get_ingredients_by_category():
     df = get_all_ingredients()
     return df.groupby('category')['name'].apply(list).to_dict()
 
+def get_data_version(name):
+    """Get the change counter for a table (bumped by triggers on every change)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT version FROM data_versions WHERE name = ?", (name,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+def plan_item_rows(plan_id, plan_data):
+    """meal_plan_items values (plan_id, day, meal, qty_per_child_g, total_g, cost, ingredient name) of a plan_data JSON text"""
+    weekly_plan = json.loads(plan_data).get('weekly_plan', {}) if plan_data else {}
+    return [
+        (plan_id, day, meal, item['quantity_per_child_g'], item['total_quantity_g'], item['cost'], item['ingredient'])
+        for day, day_plan in weekly_plan.items()
+        for meal, meal_data in day_plan.get('meals', {}).items()
+        for item in meal_data.get('items', [])
+    ]
+
+def insert_plan_items(cursor, plan_id, plan_data):
+    """Write a plan's rows of meal_plan_items on cursor (the caller commits); unknown ingredient names are skipped"""
+    cursor.executemany("""
+        INSERT INTO meal_plan_items (plan_id, day, meal, ingredient_id, qty_per_child_g, total_g, cost)
+        SELECT ?, ?, ?, id, ?, ?, ? FROM ingredients WHERE name = ?
+    """, plan_item_rows(plan_id, plan_data))
+
 def save_meal_plan(plan_name, budget, num_children, age_group, total_cost, 
-                   nutrition_score, plan_data):
+                   nutrition_score, plan_data, input_hash=None):
     """Save a generated meal plan to database"""
     conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
         INSERT INTO meal_plans 
-        (plan_name, budget, num_children, age_group, total_cost, nutrition_score, plan_data)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (plan_name, budget, num_children, age_group, total_cost, nutrition_score, plan_data))
+        (plan_name, budget, num_children, age_group, total_cost, nutrition_score, plan_data, input_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (plan_name, budget, num_children, age_group, total_cost, nutrition_score, plan_data, input_hash))
     
     plan_id = cursor.lastrowid
+    insert_plan_items(cursor, plan_id, plan_data)
     conn.commit()
     conn.close()
     return plan_id
 
+def save_meal_plans(plans):
+    """
+    Save many generated meal plans in a single transaction
+    
+    Args:
+        plans: List of dicts with the same keys as save_meal_plan's arguments
+    
+    Returns:
+        List of new plan ids, in the same order as plans
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    plan_ids = []
+    try:
+        for plan in plans:
+            cursor.execute("""
+                INSERT INTO meal_plans 
+                (plan_name, budget, num_children, age_group, total_cost, nutrition_score, plan_data, input_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (plan['plan_name'], plan['budget'], plan['num_children'], plan['age_group'],
+                  plan['total_cost'], plan['nutrition_score'], plan['plan_data'],
+                  plan.get('input_hash')))
+            plan_ids.append(cursor.lastrowid)
+            insert_plan_items(cursor, cursor.lastrowid, plan['plan_data'])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    return plan_ids
+
+def get_meal_plan_by_input_hash(input_hash):
+    """Get the most recent meal plan generated from the given inputs"""
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT * FROM meal_plans
+        WHERE input_hash = ?
+        ORDER BY id DESC
+        LIMIT 1
+    """, (input_hash,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def get_meal_plan(plan_id):
+    """Get a saved meal plan row by id"""
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    row = conn.execute("SELECT * FROM meal_plans WHERE id = ?", (plan_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+def meal_plan_from_row(row):
+    """Rebuild the optimizer's meal plan result from a meal_plans row (None for old rows without nutrition)"""
+    plan_data = json.loads(row['plan_data'])
+    if 'weekly_nutrition' not in plan_data or 'daily_requirements' not in plan_data:
+        return None
+    
+    return {
+        'weekly_plan': plan_data['weekly_plan'],
+        'total_cost': row['total_cost'],
+        'weekly_nutrition': plan_data['weekly_nutrition'],
+        'nutrition_score': row['nutrition_score'],
+        'daily_requirements': plan_data['daily_requirements']
+    }
+
+def iter_meal_plans(start=None, end=None, batch_size=100):
+    """
+    Yield saved meal plan rows (dicts) created in [start, end), oldest first
+    
+    Rows come batch_size at a time from one open cursor, so any number of
+    plans can be streamed without holding them all in memory. Don't use
+    the database from the same thread until the iterator is exhausted or
+    closed.
+    
+    Args:
+        start, end: 'YYYY-MM-DD' (or full timestamp) bounds; None for open-ended
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(MEAL_PLANS_BY_DATE_SQL, (start or '0000-01-01', end or '9999-12-31'))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+    finally:
+        conn.close()
+
+def create_job(job_id, job_type, params, total=0):
+    """Queue a background job"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO jobs (id, job_type, status, params, total)
+        VALUES (?, ?, 'queued', ?, ?)
+    """, (job_id, job_type, json.dumps(params), total))
+    conn.commit()
+    conn.close()
+    return job_id
+
+def claim_next_job():
+    """
+    Atomically mark the oldest queued job as running and return it
+    
+    Returns:
+        Job dict (with params decoded), or None if the queue is empty
+    """
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    try:
+        # Take the write lock before reading so two workers can't claim the same job
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            SELECT * FROM jobs
+            WHERE status = 'queued'
+            ORDER BY created_at, rowid
+            LIMIT 1
+        """)
+        row = cursor.fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        
+        cursor.execute("""
+            UPDATE jobs SET status = 'running', started_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (row['id'],))
+        conn.commit()
+    finally:
+        conn.close()
+    
+    job = dict(row)
+    job['status'] = 'running'
+    job['params'] = json.loads(job['params']) if job['params'] else {}
+    return job
+
+def update_job_progress(job_id, progress, total):
+    """Record how far a running job has got"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE jobs SET progress = ?, total = ? WHERE id = ?",
+                   (progress, total, job_id))
+    conn.commit()
+    conn.close()
+
+def finish_job(job_id, result=None, error=None):
+    """Mark a job as done (with its result) or failed (with an error message)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE jobs
+        SET status = ?, result = ?, error = ?, finished_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, ('failed' if error else 'done',
+          json.dumps(result, default=str) if result is not None else None,
+          error, job_id))
+    conn.commit()
+    conn.close()
+
+def requeue_stale_jobs(max_age_minutes=30):
+    """Put jobs left 'running' by a worker that died back on the queue"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE jobs SET status = 'queued', progress = 0, started_at = NULL
+        WHERE status = 'running' AND started_at < datetime('now', ?)
+    """, (f'-{int(max_age_minutes)} minutes',))
+    count = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return count
+
+def get_job(job_id):
+    """Get a job by id, with params and result decoded"""
+    conn = get_connection()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+    row = cursor.fetchone()
+    conn.close()
+    
+    if not row:
+        return None
+    job = dict(row)
+    job['params'] = json.loads(job['params']) if job['params'] else {}
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
 def get_recent_meal_plans(limit=10):
-    """Get recent meal plans"""
+    """Get recent meal plans (without the plan_data JSON; see get_meal_plan)"""
     conn = get_connection()
-    df = pd.read_sql_query(
-        f"SELECT * FROM meal_plans ORDER BY created_at DESC LIMIT {limit}", 
-        conn
-    )
+    df = pd.read_sql_query(f"""
+        SELECT id, plan_name, budget, num_children, age_group, total_cost, nutrition_score, created_at
+        FROM meal_plans ORDER BY created_at DESC LIMIT {int(limit)}
+    """, conn)
+    conn.close()
+    return df
+
+def get_shopping_list(plan_id):
+    """Total grams and cost of each ingredient in a saved plan, by ingredient name"""
+    conn = get_connection()
+    rows = conn.execute(SHOPPING_LIST_SQL, (plan_id,)).fetchall()
+    conn.close()
+    return [{'ingredient': name, 'category': category, 'quantity_g': total_g, 'cost': cost}
+            for name, category, total_g, cost in rows]
+
+def get_plan_category_totals(plan_id):
+    """Total grams per ingredient category in a saved plan"""
+    conn = get_connection()
+    rows = conn.execute(PLAN_CATEGORY_TOTALS_SQL, (plan_id,)).fetchall()
+    conn.close()
+    return dict(rows)
+
+def get_ingredient_usage(limit=10):
+    """Most used ingredients across all saved plans: total kg, cost and number of plans"""
+    conn = get_connection()
+    df = pd.read_sql_query("""
+        SELECT i.name AS ingredient, i.category,
+               ROUND(SUM(mpi.total_g) / 1000, 1) AS total_kg,
+               ROUND(SUM(mpi.cost), 2) AS total_cost,
+               COUNT(DISTINCT mpi.plan_id) AS plans
+        FROM meal_plan_items mpi
+        JOIN ingredients i ON i.id = mpi.ingredient_id
+        GROUP BY mpi.ingredient_id
+        ORDER BY total_kg DESC
+        LIMIT ?
+    """, conn, params=(int(limit),))
     conn.close()
     return df
 
@@ -318,10 +637,76 @@ def save_feedback(plan_id, rating, comments):
         INSERT INTO meal_feedback (plan_id, rating, comments)
         VALUES (?, ?, ?)
     """, (plan_id, rating, comments))
+    update_child_affinity(cursor, plan_id, rating)
     
     conn.commit()
     conn.close()
 
+def update_child_affinity(cursor, plan_id, rating, child_id=None):
+    """
+    Count one rating of a plan into child_ingredient_affinity (the caller commits)
+    
+    Each item of the plan adds 1 to liked (rating >= 4) or disliked
+    (rating <= 2) of its ingredient, for every child the plan was made for
+    (or just child_id).
+    """
+    liked, disliked = int(rating >= 4), int(rating <= 2)
+    if not (liked or disliked):
+        return
+    cursor.execute(f"""
+        INSERT INTO child_ingredient_affinity (child_id, ingredient_id, liked, disliked)
+        SELECT cmp.child_id, mpi.ingredient_id, COUNT(*) * ?, COUNT(*) * ?
+        FROM child_meal_plans cmp
+        JOIN meal_plan_items mpi ON mpi.plan_id = cmp.plan_id
+        WHERE cmp.plan_id = ? {'AND cmp.child_id = ?' if child_id is not None else ''}
+        GROUP BY cmp.child_id, mpi.ingredient_id
+        ON CONFLICT (child_id, ingredient_id) DO UPDATE SET
+            liked = liked + excluded.liked,
+            disliked = disliked + excluded.disliked
+    """, (liked, disliked, plan_id) + ((child_id,) if child_id is not None else ()))
+
+def link_child_plan(child_id, plan_id):
+    """Record that a plan was made for a child, counting feedback the plan already has into their affinity"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR IGNORE INTO child_meal_plans (child_id, plan_id) VALUES (?, ?)", (child_id, plan_id))
+    if cursor.rowcount:
+        ratings = cursor.execute("SELECT rating FROM meal_feedback WHERE plan_id = ?", (plan_id,)).fetchall()
+        for (rating,) in ratings:
+            update_child_affinity(cursor, plan_id, rating, child_id)
+    conn.commit()
+    conn.close()
+
+def rebuild_child_affinity(conn=None):
+    """
+    Recompute child_ingredient_affinity from all feedback, plan links and plan items
+    
+    Returns:
+        Number of (child, ingredient) rows written
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        conn.execute("DELETE FROM child_ingredient_affinity")
+        count = conn.execute("""
+            INSERT INTO child_ingredient_affinity (child_id, ingredient_id, liked, disliked)
+            SELECT cmp.child_id, mpi.ingredient_id,
+                   SUM(CASE WHEN mf.rating >= 4 THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN mf.rating <= 2 THEN 1 ELSE 0 END)
+            FROM child_meal_plans cmp
+            JOIN meal_feedback mf ON mf.plan_id = cmp.plan_id
+            JOIN meal_plan_items mpi ON mpi.plan_id = cmp.plan_id
+            WHERE mf.rating >= 4 OR mf.rating <= 2
+            GROUP BY cmp.child_id, mpi.ingredient_id
+        """).rowcount
+        if own_conn:
+            conn.commit()
+        return count
+    finally:
+        if own_conn:
+            conn.close()
+
 def get_analytics_data():
     """Get analytics data for admin dashboard"""
     conn = get_connection()
@@ -458,7 +843,6 @@ def insert_health_information(conn):
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     """, health_data)
     
-    conn.commit()
     print("✅ Health information added successfully!")
 
 # Child and Immunisation Management Functions
@@ -501,14 +885,7 @@ def add_immunisation(child_id, vaccine_name, due_date, notes=""):
 def get_pending_immunisations():
     """Get all pending immunisations"""
     conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT i.id, c.name, c.parent_name, c.phone_number, c.village,
-               i.vaccine_name, i.due_date, i.notes, i.reminder_sent
-        FROM immunisation_schedule i
-        JOIN children c ON i.child_id = c.id
-        WHERE i.status = 'Pending'
-        ORDER BY i.due_date
-    """, conn)
+    df = pd.read_sql_query(PENDING_IMMUNISATIONS_SQL, conn)
     conn.close()
     return df
 
@@ -540,15 +917,24 @@ def get_health_info_by_category(category=None):
     return df
 
 def search_health_info(search_term):
-    """Search health information by disease name or symptoms"""
+    """Search health information by disease name, symptoms or category, best matches first"""
     conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT * FROM health_information 
-        WHERE disease_name LIKE ? OR symptoms LIKE ? OR category LIKE ?
-        ORDER BY disease_name
-    """, conn, params=(f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
+    ids = [row[0] for row in search_index.fts_search(
+        conn, 'health_fts', search_term, search_index.ranked_sql('health', limit=False)
+    )]
+    df = pd.read_sql_query(
+        f"SELECT * FROM health_information WHERE id IN ({', '.join('?' * len(ids))})",
+        conn, params=ids
+    )
     conn.close()
-    return df
+    return df.set_index('id', drop=False).loc[ids].reset_index(drop=True)
+
+def search_all(query, sources=None, limit=10):
+    """Full-text search over ingredients, health information and recipes (see search_index.py)"""
+    conn = get_connection()
+    results = search_index.search(conn, query, sources, limit)
+    conn.close()
+    return results
 
 # Growth Tracking Functions
 def add_growth_measurement(child_id, measurement_date, weight_kg, height_cm, 
@@ -590,53 +976,127 @@ def get_child_growth_history(child_id):
 def get_latest_growth(child_id):
     """Get the most recent growth measurement for a child"""
     conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT * FROM growth_tracking
-        WHERE child_id = ?
-        ORDER BY measurement_date DESC
-        LIMIT 1
-    """, conn, params=(child_id,))
+    df = pd.read_sql_query(LATEST_GROWTH_SQL, conn, params=(child_id,))
     conn.close()
     return df.to_dict('records')[0] if len(df) > 0 else None
 
 def calculate_who_z_scores(age_months, weight_kg, height_cm, gender):
     """
     Calculate WHO Z-scores for weight-for-age, height-for-age, and weight-for-height
-    This is a simplified version - in production, use WHO growth standards tables
+    Uses the WHO 2006 growth standards (see growth_standards.py)
     """
-    # Simplified WHO growth standards (approximate values)
-    # In production, use actual WHO tables from: https://www.who.int/tools/child-growth-standards
-    
-    z_scores = {
-        'weight_for_age': 0,
-        'height_for_age': 0,
-        'weight_for_height': 0,
-        'status': 'Normal'
+    scores = calculate_who_z_scores_series([age_months], [weight_kg], [height_cm], [gender])
+    
+    def value(column):
+        z = scores[column].iloc[0]
+        return None if pd.isna(z) else float(z)
+    
+    return {
+        'weight_for_age': value('weight_for_age'),
+        'height_for_age': value('height_for_age'),
+        'weight_for_height': value('weight_for_height'),
+        'status': scores['status'].iloc[0]
     }
+
+def calculate_who_z_scores_series(age_months, weight_kg, height_cm, gender, age_days=None, muac_cm=None):
+    """
+    Vectorized calculate_who_z_scores for many measurements at once
     
-    # Simplified calculation (replace with actual WHO standards)
-    if gender.lower() == 'male':
-        expected_weight = 3.3 + (age_months * 0.45)  # Rough approximation
-        expected_height = 50 + (age_months * 1.5)
-    else:
-        expected_weight = 3.2 + (age_months * 0.42)
-        expected_height = 49.5 + (age_months * 1.4)
+    Args:
+        age_months, weight_kg, height_cm, gender: Equal-length sequences
+        age_days: Exact ages in days (preferred over age_months when known)
+        muac_cm: Optional mid-upper arm circumference
     
-    # Calculate z-scores (simplified)
-    z_scores['weight_for_age'] = round((weight_kg - expected_weight) / (expected_weight * 0.15), 2)
-    z_scores['height_for_age'] = round((height_cm - expected_height) / (expected_height * 0.08), 2)
+    Returns:
+        DataFrame with weight_for_age, height_for_age, weight_for_height,
+        bmi_for_age, muac_for_age and status columns
+    
+    Weight-for-age and height-for-age outside the WHO tables (over 10 and
+    19 years, or sex unknown) fall back to the approximations used before
+    the WHO tables. Status follows weight-for-age, or BMI-for-age where
+    WHO has no weight-for-age reference (5-19 years).
+    """
+    if age_days is None:
+        age_days = growth_standards.age_months_to_days(age_months)
+    
+    scores = growth_standards.calculate_zscores(
+        age_days, gender, weight_kg=weight_kg, height_cm=height_cm, muac_cm=muac_cm
+    )
+    approximate = _approximate_z_scores(age_months, weight_kg, height_cm, gender)
+    weight_for_age = scores['waz'].round(2).to_numpy()
+    height_for_age = scores['haz'].round(2).to_numpy()
+    bmi_for_age = scores['baz'].round(2).to_numpy()
+    status_z = np.where(np.isnan(weight_for_age), bmi_for_age, weight_for_age)
+    weight_for_age = np.where(np.isnan(weight_for_age), approximate['weight_for_age'], weight_for_age)
+    height_for_age = np.where(np.isnan(height_for_age), approximate['height_for_age'], height_for_age)
+    status_z = np.where(np.isnan(status_z), weight_for_age, status_z)
     
     # Determine nutritional status
-    if z_scores['weight_for_age'] < -3:
-        z_scores['status'] = 'Severely Underweight'
-    elif z_scores['weight_for_age'] < -2:
-        z_scores['status'] = 'Underweight'
-    elif z_scores['weight_for_age'] > 2:
-        z_scores['status'] = 'Overweight'
-    else:
-        z_scores['status'] = 'Normal'
+    status = np.select(
+        [status_z < -3, status_z < -2, status_z > 2],
+        ['Severely Underweight', 'Underweight', 'Overweight'],
+        default='Normal'
+    )
     
-    return z_scores
+    return pd.DataFrame({
+        'weight_for_age': weight_for_age,
+        'height_for_age': height_for_age,
+        'weight_for_height': scores['whz'].round(2).to_numpy(),
+        'bmi_for_age': bmi_for_age,
+        'muac_for_age': scores['muacz'].round(2).to_numpy(),
+        'status': status
+    })
+
+def _approximate_z_scores(age_months, weight_kg, height_cm, gender):
+    """Linear weight/height-for-age approximations, for children the WHO tables don't cover"""
+    age_months = np.asarray(age_months, dtype=float)
+    weight_kg = pd.to_numeric(pd.Series(weight_kg), errors='coerce').to_numpy(dtype=float)
+    height_cm = pd.to_numeric(pd.Series(height_cm), errors='coerce').to_numpy(dtype=float)
+    is_male = pd.Series(gender, dtype=object).fillna('').str.lower().to_numpy() == 'male'
+    
+    expected_weight = np.where(is_male, 3.3 + age_months * 0.45, 3.2 + age_months * 0.42)
+    expected_height = np.where(is_male, 50 + age_months * 1.5, 49.5 + age_months * 1.4)
+    return {
+        'weight_for_age': np.round((weight_kg - expected_weight) / (expected_weight * 0.15), 2),
+        'height_for_age': np.round((height_cm - expected_height) / (expected_height * 0.08), 2)
+    }
+
+def get_growth_series(child_id):
+    """
+    Get a child's full growth series in one query, oldest first
+    
+    Adds age_months, monthly weight/height velocity (change since the
+    previous measurement) and WHO z-scores for every measurement.
+    """
+    conn = get_connection()
+    df = pd.read_sql_query(GROWTH_SERIES_SQL, conn, params=(child_id,))
+    conn.close()
+    
+    if len(df) == 0:
+        return df
+    
+    measured = pd.to_datetime(df['measurement_date'])
+    born = pd.to_datetime(df['date_of_birth'])
+    df['age_months'] = ((measured - born).dt.days / 30.44).astype(int)
+    
+    # Months between measurements (same-day repeats count as one month)
+    months = measured.diff().dt.days / 30.44
+    months = months.where(months > 0, 1)
+    df['weight_velocity'] = (df['weight_kg'].diff() / months).round(2)
+    df['height_velocity'] = (df['height_cm'].diff() / months).round(2)
+    
+    scores = calculate_who_z_scores_series(
+        df['age_months'], df['weight_kg'], df['height_cm'], df['gender'],
+        age_days=(measured - born).dt.days, muac_cm=df['muac_cm']
+    )
+    df['weight_for_age_z'] = scores['weight_for_age'].to_numpy()
+    df['height_for_age_z'] = scores['height_for_age'].to_numpy()
+    df['weight_for_height_z'] = scores['weight_for_height'].to_numpy()
+    df['bmi_for_age_z'] = scores['bmi_for_age'].to_numpy()
+    df['muac_for_age_z'] = scores['muac_for_age'].to_numpy()
+    df['who_status'] = scores['status'].to_numpy()
+    
+    return df
 
 def get_growth_chart_data(child_id):
     """Get formatted data for growth charts"""
@@ -666,7 +1126,26 @@ def get_growth_chart_data(child_id):
     return df
 
 if __name__ == "__main__":
+    import sys
+    
     # Initialize database when run directly
     initialize_database()
+    
+    if '--check-query-plans' in sys.argv:
+        full_scans = 0
+        for name, result in check_query_plans().items():
+            if 'skipped' in result:
+                print(f"⏭️  {name}: skipped ({result['skipped']})")
+            elif result['full_scans']:
+                full_scans += 1
+                print(f"❌ {name}: full table scan ({'; '.join(result['full_scans'])})")
+            else:
+                print(f"✅ {name}: {'; '.join(result['plan'])}")
+        sys.exit(1 if full_scans else 0)
+    
+    if '--rebuild-child-affinity' in sys.argv:
+        print(f"✅ Rebuilt child_ingredient_affinity: {rebuild_child_affinity()} rows")
+        sys.exit(0)
+    
     print("\n📊 Sample data:")
     print(get_all_ingredients().head())
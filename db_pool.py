@@ -0,0 +1,138 @@
+"""
+SQLite Connection Pool
+Shared, thread-local SQLite connections for database.py and the feature modules
+
+Opening a connection costs a file open, schema parse and a cold page cache,
+which used to be paid on every query. get_connection() instead hands each
+thread one long-lived connection per database file, configured once with
+WAL journaling (readers don't block the writer), synchronous=NORMAL, a
+larger page cache and memory-mapped reads.
+
+Callers keep the usual pattern:
+
+    conn = get_connection(path)
+    ...
+    conn.close()
+
+close() only returns the connection to the pool: any uncommitted
+transaction is rolled back and row_factory is reset, exactly as if a fresh
+connection had been opened next time. Checkouts are counted, so a helper
+that gets and closes the connection inside a caller's open transaction
+leaves that transaction alone; only the outermost close() resets it.
+Request and job boundaries call release_thread() to reset connections
+whose user raised before close().
+"""
+
+import os
+import sqlite3
+import threading
+import weakref
+
+# Negative cache_size is in KiB
+CACHE_SIZE_KB = 16 * 1024
+MMAP_SIZE_BYTES = 256 * 1024 * 1024
+BUSY_TIMEOUT_SECONDS = 30
+
+_local = threading.local()
+# Weak, so a finished thread's connection is closed when its thread-local goes away
+_all_connections = weakref.WeakSet()
+_registry_lock = threading.Lock()
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection whose close() returns it to the pool"""
+
+    closed = False
+    # get_connection() calls not yet matched by close()
+    checkouts = 0
+
+    def close(self):
+        self.checkouts = max(self.checkouts - 1, 0)
+        if self.checkouts == 0:
+            self.reset()
+
+    def reset(self):
+        """Discard uncommitted changes and per-caller settings"""
+        if self.in_transaction:
+            self.rollback()
+        self.row_factory = None
+
+    def really_close(self):
+        """Close the underlying SQLite connection"""
+        self.closed = True
+        super().close()
+
+
+def _open(db_path):
+    """Open and configure a new pooled connection"""
+    conn = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT_SECONDS,
+        factory=PooledConnection,
+        # Only ever used by the thread that opened it; close_all() may run elsewhere
+        check_same_thread=False
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE_BYTES}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+    with _registry_lock:
+        _all_connections.add(conn)
+    return conn
+
+
+def get_connection(db_path):
+    """
+    Get this thread's connection to db_path, opening it on first use
+
+    Args:
+        db_path: SQLite database file (relative paths resolve against the cwd)
+
+    Returns:
+        PooledConnection; call close() when done to hand it back
+    """
+    key = db_path if db_path == ':memory:' else os.path.abspath(db_path)
+
+    # Connections must not be shared with a forked child (e.g. a process pool)
+    if getattr(_local, 'pid', None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.connections = {}
+
+    conn = _local.connections.get(key)
+    if conn is None or conn.closed:
+        conn = _open(db_path)
+        _local.connections[key] = conn
+    conn.checkouts += 1
+    return conn
+
+
+def release_thread():
+    """Reset all of this thread's connections, including checkouts never closed"""
+    if getattr(_local, 'pid', None) != os.getpid():
+        return
+
+    for conn in _local.connections.values():
+        if not conn.closed:
+            conn.checkouts = 0
+            conn.reset()
+
+
+def close_all():
+    """Close every pooled connection (all threads), e.g. before deleting the database"""
+    with _registry_lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+
+    for conn in connections:
+        try:
+            conn.really_close()
+        except sqlite3.Error:
+            pass
+
+
+def pool_size():
+    """Number of open pooled connections across all threads"""
+    with _registry_lock:
+        return len(_all_connections)
@@ -0,0 +1,184 @@
+"""
+Export Cache
+Rendered CSV, PDF and JSON downloads of saved meal plans, kept on disk
+
+A saved plan never changes, so each format is rendered at most once per
+plan id and the file is served as is afterwards (send_file handles
+ETag/Last-Modified from the file). The directory is bounded to max_bytes;
+the least recently served files are deleted first.
+
+Bump RENDER_VERSION when a renderer's output changes, so files rendered
+by the old code are no longer served (they age out through eviction).
+"""
+
+import io
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import database as db
+import meal_optimizer as mo
+from utils import export_to_pdf
+
+RENDER_VERSION = 1
+
+DEFAULT_MAX_MB = 200
+
+
+def render_csv(meal_plan, num_children, budget):
+    output = io.StringIO()
+    mo.format_meal_plan_for_display(meal_plan).to_csv(output, index=False)
+    return output.getvalue().encode()
+
+
+def render_pdf(meal_plan, num_children, budget):
+    return export_to_pdf(meal_plan, num_children, budget)
+
+
+def render_json(meal_plan, num_children, budget):
+    return json.dumps(meal_plan, indent=2, default=str).encode()
+
+
+# format: (renderer(meal_plan, num_children, budget) -> bytes, mimetype)
+FORMATS = {
+    'csv': (render_csv, 'text/csv'),
+    'pdf': (render_pdf, 'application/pdf'),
+    'json': (render_json, 'application/json'),
+}
+
+
+def render_plan_row(row, fmt):
+    """Render a meal_plans row (dict) as fmt bytes, or None if the row has no plan to render"""
+    meal_plan = db.meal_plan_from_row(row)
+    if meal_plan is None:
+        return None
+    renderer, _ = FORMATS[fmt]
+    return renderer(meal_plan, row['num_children'], row['budget'])
+
+
+class ExportCache:
+    """Size-bounded LRU directory of rendered plan exports"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = os.path.abspath(directory or os.environ.get('EXPORT_CACHE_DIR', 'export_cache'))
+        if max_bytes is None:
+            max_bytes = float(os.environ.get('EXPORT_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.renders = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._rendering = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Files left by an earlier run, oldest first, stand in for recency
+        self._files = OrderedDict()
+        existing = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                existing.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self._files[name] = size
+        self._evict()
+
+    def filename(self, plan_id, fmt):
+        return f"plan_{int(plan_id)}_v{RENDER_VERSION}.{fmt}"
+
+    def get(self, plan_id, fmt):
+        """
+        Path of the rendered export, rendering it on first request
+
+        Returns:
+            File path, or None if there is no saved plan with that id
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'")
+
+        name = self.filename(plan_id, fmt)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if name in self._files and os.path.exists(path):
+                self._files.move_to_end(name)
+                self.hits += 1
+                return path
+            # One render per file; concurrent requests for it wait on the first
+            render_lock = self._rendering.setdefault(name, threading.Lock())
+
+        with render_lock:
+            try:
+                if not os.path.exists(path):
+                    data = self._render(plan_id, fmt)
+                    if data is None:
+                        return None
+                    self._write(path, data)
+                    with self._lock:
+                        self.renders += 1
+                with self._lock:
+                    self._files[name] = os.path.getsize(path)
+                    self._files.move_to_end(name)
+                    self._evict(keep=name)
+            finally:
+                with self._lock:
+                    self._rendering.pop(name, None)
+        return path
+
+    def prerender(self, plan_id, formats=None):
+        """Render exports of a just-saved plan ahead of the first download"""
+        for fmt in formats or FORMATS:
+            self.get(plan_id, fmt)
+
+    def stats(self):
+        """Render/hit counters and disk usage"""
+        with self._lock:
+            return {
+                'renders': self.renders,
+                'hits': self.hits,
+                'files': len(self._files),
+                'bytes': sum(self._files.values()),
+                'max_bytes': self.max_bytes
+            }
+
+    def read(self, plan_id, fmt):
+        """Bytes of an already rendered export, or None (never renders)"""
+        name = self.filename(plan_id, fmt)
+        try:
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if name in self._files:
+                self._files.move_to_end(name)
+            self.hits += 1
+        return data
+
+    def _render(self, plan_id, fmt):
+        row = db.get_meal_plan(plan_id)
+        return render_plan_row(row, fmt) if row else None
+
+    def _write(self, path, data):
+        """Write via a temporary file so readers never see a partial export"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.render-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _evict(self, keep=None):
+        """Delete least recently used files until the directory fits max_bytes (caller holds _lock)"""
+        total = sum(self._files.values())
+        for name in list(self._files):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            total -= self._files.pop(name)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,480 @@
+"""
+Local FoodData Central Store
+Offline copy of the USDA FDC bulk downloads in normalized SQLite tables
+
+import_fdc() streams the CSV or JSON downloads from
+https://fdc.nal.usda.gov/download-datasets (unzipped folder, the .zip
+itself or a .json file) into food, nutrient, food_nutrient and portion
+tables, CHUNK_ROWS rows at a time. Only the small lookup files
+(food_category.csv, measure_unit.csv) are held in memory, so even the
+multi-GB Branded Foods download imports in bounded memory. Re-importing a
+release replaces its rows.
+
+LocalFDCStore reads the tables back as FDC API-shaped JSON, so USDAFoodAPI
+(see its local argument) can answer searches and food details without a
+network round trip. Searches use the food_fts full-text index (BM25,
+prefixes, aliases and typo fallback as in search_index.py), rebuilt at the
+end of each import.
+
+Kept in its own file (USDA_LOCAL_DB, default fdc_local.db) like the
+response cache:
+
+    python fdc_local.py FoodData_Central_sr_legacy_food_csv_2018-04.zip [--db fdc_local.db]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import time
+import zipfile
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import search_index
+from db_pool import get_connection
+
+# Rows per executemany/commit while importing
+CHUNK_ROWS = 10000
+
+# Characters read at a time from JSON downloads
+JSON_CHUNK_CHARS = 1 << 20
+
+# FDC CSV data_type values -> the dataType names the API uses
+DATA_TYPES = {
+    'foundation_food': 'Foundation',
+    'sr_legacy_food': 'SR Legacy',
+    'branded_food': 'Branded',
+    'survey_fndds_food': 'Survey (FNDDS)',
+    'experimental_food': 'Experimental'
+}
+
+# CSV unit names are upper case; the API's are not
+UNIT_NAMES = {'UG': 'µg', 'IU': 'IU', 'KJ': 'kJ'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS food (
+    fdc_id INTEGER PRIMARY KEY,
+    data_type TEXT,
+    description TEXT NOT NULL,
+    category TEXT,
+    brand_owner TEXT
+);
+
+CREATE TABLE IF NOT EXISTS nutrient (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    unit_name TEXT,
+    rank REAL
+);
+
+CREATE TABLE IF NOT EXISTS food_nutrient (
+    fdc_id INTEGER NOT NULL,
+    nutrient_id INTEGER NOT NULL,
+    amount REAL,
+    PRIMARY KEY (fdc_id, nutrient_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS portion (
+    fdc_id INTEGER NOT NULL,
+    portion_id INTEGER NOT NULL,
+    description TEXT,
+    gram_weight REAL,
+    PRIMARY KEY (fdc_id, portion_id)
+) WITHOUT ROWID;
+"""
+
+# Built after a bulk load rather than maintained row by row
+INDEXES = {
+    'idx_food_data_type': "food(data_type, description)"
+}
+
+# Full-text index over food (external content, rebuilt after each import).
+# data_type is indexed so a data type filter narrows the matches inside
+# FTS5, before BM25 ranks them, rather than after; it isn't searched.
+FOOD_FTS_COLUMNS = ['description', 'brand_owner', 'category', 'data_type']
+FOOD_FTS_WEIGHTS = [10.0, 2.0, 1.0, 0.0]
+
+# Filter data types inside FTS5 only when they are less than this share of foods
+FTS_TYPE_FILTER_MAX_SHARE = 0.5
+
+# PRAGMA user_version once food_fts has been built
+SEARCH_INDEX_VERSION = 1
+
+
+def create_schema(conn):
+    conn.executescript(SCHEMA)
+    for name, target in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+    search_index.create_fts_table(conn, 'food_fts', FOOD_FTS_COLUMNS, content='food', content_rowid='fdc_id')
+    conn.commit()
+
+
+def rebuild_search_index(conn):
+    """Re-index every food in food_fts"""
+    conn.execute("INSERT INTO food_fts (food_fts) VALUES ('rebuild')")
+    conn.execute(f"PRAGMA user_version = {SEARCH_INDEX_VERSION}")
+    conn.commit()
+
+
+def _number(value) -> Optional[float]:
+    """float for a CSV/JSON value, None for blanks"""
+    if value is None or value == '':
+        return None
+    return float(value)
+
+
+def _unit(name: Optional[str]) -> str:
+    name = name or ''
+    return UNIT_NAMES.get(name.upper(), name.lower())
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[List]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _members(source: str) -> Dict[str, Callable]:
+    """{file name: function opening it as text} for a folder, .zip or single file"""
+    def text(opener):
+        return lambda: io.TextIOWrapper(opener(), encoding='utf-8', newline='')
+
+    if os.path.isdir(source):
+        return {name: text(lambda path=os.path.join(source, name): open(path, 'rb'))
+                for name in os.listdir(source)}
+    if zipfile.is_zipfile(source):
+        archive = zipfile.ZipFile(source)
+        # Downloads nest their files in a folder named after the release
+        return {os.path.basename(info.filename): text(lambda info=info: archive.open(info))
+                for info in archive.infolist() if not info.is_dir()}
+    return {os.path.basename(source): text(lambda: open(source, 'rb'))}
+
+
+def iter_json_foods(stream, chunk_chars: int = JSON_CHUNK_CHARS) -> Iterator[Dict]:
+    """
+    Foods of an FDC JSON download ({"FoundationFoods": [...]}) one at a time
+
+    Decodes one array element at a time from a sliding buffer, so memory is
+    bounded by the largest single food rather than the file size.
+    """
+    decoder = json.JSONDecoder()
+    separator = re.compile(r'[\s,]*')
+    buffer = ''
+    while '[' not in buffer:
+        chunk = stream.read(chunk_chars)
+        if not chunk:
+            return
+        buffer += chunk
+    pos = buffer.index('[') + 1
+
+    while True:
+        pos = separator.match(buffer, pos).end()
+        if buffer.startswith(']', pos):
+            return
+        if pos < len(buffer):
+            try:
+                food, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                pass  # element continues in the next chunk
+            else:
+                yield food
+                pos = end
+                continue
+        chunk = stream.read(chunk_chars)
+        if not chunk:
+            raise ValueError("FDC JSON file ended inside the foods array")
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+class _Importer:
+    """Bulk-load connection and row counts for one import_fdc call"""
+
+    def __init__(self, db_path: str, chunk_rows: int):
+        self.chunk_rows = chunk_rows
+        self.counts = {'food': 0, 'nutrient': 0, 'food_nutrient': 0, 'portion': 0}
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        create_schema(self.conn)
+        for name in INDEXES:
+            self.conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def insert(self, table: str, sql: str, rows: Iterable):
+        for chunk in _chunks(rows, self.chunk_rows):
+            self.conn.executemany(sql, chunk)
+            self.conn.commit()
+            self.counts[table] += len(chunk)
+
+    def finish(self) -> Dict[str, int]:
+        create_schema(self.conn)  # rebuilds the indexes
+        rebuild_search_index(self.conn)
+        self.conn.execute("ANALYZE")
+        self.conn.commit()
+        self.conn.close()
+        return self.counts
+
+    # CSV downloads
+
+    def import_csv(self, files: Dict[str, Callable]):
+        def rows(name):
+            with files[name]() as f:
+                yield from csv.DictReader(f)
+
+        categories = {row['id']: row['description'] for row in rows('food_category.csv')} \
+            if 'food_category.csv' in files else {}
+        units = {row['id']: row['name'] for row in rows('measure_unit.csv')} \
+            if 'measure_unit.csv' in files else {}
+
+        if 'nutrient.csv' in files:
+            self.insert('nutrient', "INSERT OR REPLACE INTO nutrient VALUES (?, ?, ?, ?)", (
+                (int(row['id']), row['name'], _unit(row['unit_name']), _number(row.get('rank')))
+                for row in rows('nutrient.csv')
+            ))
+        if 'food.csv' in files:
+            self.insert('food', "INSERT OR REPLACE INTO food VALUES (?, ?, ?, ?, NULL)", (
+                (int(row['fdc_id']), DATA_TYPES.get(row['data_type'], row['data_type']),
+                 row['description'], categories.get(row.get('food_category_id')))
+                for row in rows('food.csv')
+            ))
+        if 'branded_food.csv' in files:
+            self._import_branded((
+                (int(row['fdc_id']), row.get('brand_owner'), row.get('branded_food_category'),
+                 row.get('household_serving_fulltext'), row.get('serving_size'),
+                 row.get('serving_size_unit'))
+                for row in rows('branded_food.csv')
+            ))
+        if 'food_nutrient.csv' in files:
+            self.insert('food_nutrient', "INSERT OR REPLACE INTO food_nutrient VALUES (?, ?, ?)", (
+                (int(row['fdc_id']), int(row['nutrient_id']), _number(row['amount']))
+                for row in rows('food_nutrient.csv')
+            ))
+        if 'food_portion.csv' in files:
+            self.insert('portion', "INSERT OR REPLACE INTO portion VALUES (?, ?, ?, ?)", (
+                (int(row['fdc_id']), int(row['id']), self._portion_description(
+                    row.get('portion_description'), row.get('amount'),
+                    units.get(row.get('measure_unit_id')), row.get('modifier')
+                 ), _number(row.get('gram_weight')))
+                for row in rows('food_portion.csv')
+            ))
+
+    def _import_branded(self, rows: Iterable):
+        """Brand/category updates for branded_food rows plus one portion per serving size"""
+        servings = []
+        def updates():
+            for fdc_id, owner, category, household, size, size_unit in rows:
+                if size and (size_unit or '').lower() == 'g':
+                    servings.append((fdc_id, 0, household or f"{size} g", _number(size)))
+                yield owner or None, category or None, fdc_id
+
+        # servings fills while updates() is consumed, one chunk at a time
+        for chunk in _chunks(updates(), self.chunk_rows):
+            self.conn.executemany(
+                "UPDATE food SET brand_owner = ?, category = COALESCE(?, category) WHERE fdc_id = ?", chunk
+            )
+            self.insert('portion', "INSERT OR REPLACE INTO portion VALUES (?, ?, ?, ?)", servings)
+            servings.clear()
+
+    @staticmethod
+    def _portion_description(description, amount, unit, modifier) -> str:
+        """portion_description, or e.g. '1 cup, chopped' built from its parts"""
+        if description and description != 'Quantity not specified':
+            return description
+        unit = unit if unit and unit != 'undetermined' else ''
+        amount = f"{float(amount):g}" if amount else ''
+        return ' '.join(part for part in (amount, unit, modifier or '') if part).strip()
+
+    # JSON downloads
+
+    def import_json(self, stream):
+        foods, nutrients, food_nutrients, portions = [], {}, [], []
+
+        def flush():
+            self.insert('nutrient', "INSERT OR REPLACE INTO nutrient VALUES (?, ?, ?, ?)",
+                        nutrients.values())
+            self.insert('food', "INSERT OR REPLACE INTO food VALUES (?, ?, ?, ?, ?)", foods)
+            self.insert('food_nutrient', "INSERT OR REPLACE INTO food_nutrient VALUES (?, ?, ?)",
+                        food_nutrients)
+            self.insert('portion', "INSERT OR REPLACE INTO portion VALUES (?, ?, ?, ?)", portions)
+            for rows in (foods, nutrients, food_nutrients, portions):
+                rows.clear()
+
+        for food in iter_json_foods(stream):
+            fdc_id = food['fdcId']
+            category = food.get('foodCategory') or food.get('brandedFoodCategory')
+            if isinstance(category, dict):
+                category = category.get('description')
+            foods.append((fdc_id, food.get('dataType'), food.get('description', ''),
+                          category, food.get('brandOwner')))
+
+            for item in food.get('foodNutrients', []):
+                nutrient = item.get('nutrient', {})
+                if 'id' not in nutrient or 'amount' not in item:
+                    continue
+                nutrients[nutrient['id']] = (nutrient['id'], nutrient.get('name', ''),
+                                             _unit(nutrient.get('unitName')), nutrient.get('rank'))
+                food_nutrients.append((fdc_id, nutrient['id'], item['amount']))
+
+            for position, portion in enumerate(food.get('foodPortions', []), start=1):
+                portions.append((fdc_id, portion.get('id', position), self._portion_description(
+                    portion.get('portionDescription'), portion.get('amount'),
+                    portion.get('measureUnit', {}).get('name'), portion.get('modifier')
+                ), portion.get('gramWeight')))
+            if food.get('servingSize') and (food.get('servingSizeUnit') or '').lower() == 'g':
+                portions.append((fdc_id, 0, food.get('householdServingFullText')
+                                 or f"{food['servingSize']} g", food['servingSize']))
+
+            if len(food_nutrients) >= self.chunk_rows or len(foods) >= self.chunk_rows:
+                flush()
+        flush()
+        # nutrient rows are re-sent with every chunk; count distinct ones
+        self.counts['nutrient'] = self.conn.execute("SELECT COUNT(*) FROM nutrient").fetchone()[0]
+
+
+def import_fdc(sources: List[str], db_path: Optional[str] = None,
+               chunk_rows: int = CHUNK_ROWS) -> Dict[str, int]:
+    """
+    Import FDC bulk downloads into the local store
+
+    Args:
+        sources: Unzipped CSV folders, .zip downloads (CSV or JSON) or .json files
+        db_path: Local store path (default USDA_LOCAL_DB or fdc_local.db)
+        chunk_rows: Rows inserted per transaction
+
+    Returns:
+        Rows imported per table
+    """
+    importer = _Importer(db_path or os.environ.get('USDA_LOCAL_DB', 'fdc_local.db'), chunk_rows)
+    try:
+        for source in sources:
+            files = _members(source)
+            json_files = [name for name in files if name.endswith('.json')]
+            if json_files:
+                for name in json_files:
+                    with files[name]() as stream:
+                        importer.import_json(stream)
+            else:
+                importer.import_csv(files)
+    except Exception:
+        importer.conn.close()
+        raise
+    return importer.finish()
+
+
+class LocalFDCStore:
+    """Read side of the local store, returning FDC API-shaped JSON"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get('USDA_LOCAL_DB', 'fdc_local.db')
+        conn = get_connection(self.db_path)
+        create_schema(conn)
+        # Stores imported before food_fts existed
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SEARCH_INDEX_VERSION:
+            rebuild_search_index(conn)
+        # Share of foods per data type, to decide where search() filters
+        counts = dict(conn.execute("SELECT data_type, COUNT(*) FROM food GROUP BY data_type").fetchall())
+        self.type_shares = {data_type: count / sum(counts.values()) for data_type, count in counts.items()}
+        conn.close()
+
+    def count(self) -> int:
+        conn = get_connection(self.db_path)
+        count = conn.execute("SELECT COUNT(*) FROM food").fetchone()[0]
+        conn.close()
+        return count
+
+    def search(self, query: str, page_size: int = 10,
+               data_types: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Best matches for query (see search_index.match_expression) as in a
+        /foods/search response's 'foods' list, optionally of some data types
+        """
+        data_types = data_types or []
+        # Matching data_type inside FTS5 saves ranking other types' foods,
+        # but intersecting with most of the store (Branded) costs more than
+        # it saves. The join checks data_type exactly either way.
+        require = ''
+        if data_types and sum(self.type_shares.get(t, 0) for t in data_types) < FTS_TYPE_FILTER_MAX_SHARE:
+            require = f"data_type : ({' OR '.join(search_index.quote_phrase(t) for t in data_types)})"
+        type_filter = f"AND f.data_type IN ({', '.join('?' * len(data_types))})" if data_types else ''
+        conn = get_connection(self.db_path)
+        rows = search_index.fts_search(conn, 'food_fts', query, f"""
+            SELECT f.fdc_id, f.data_type, f.description, f.category, f.brand_owner
+            FROM food_fts
+            JOIN food f ON f.fdc_id = food_fts.rowid
+            WHERE food_fts MATCH ? {type_filter}
+            ORDER BY bm25(food_fts, {', '.join(map(str, FOOD_FTS_WEIGHTS))})
+            LIMIT ?
+        """, (*data_types, page_size), columns=FOOD_FTS_COLUMNS[:-1], require=require)
+        conn.close()
+
+        return [{
+            'fdcId': fdc_id,
+            'dataType': data_type,
+            'description': description,
+            'foodCategory': category or '',
+            'brandOwner': brand_owner or ''
+        } for fdc_id, data_type, description, category, brand_owner in rows]
+
+    def get_foods(self, fdc_ids: List[int]) -> Dict[int, Dict]:
+        """{fdc_id: /food/{fdc_id} response} for the ids in the store"""
+        fdc_ids = list(dict.fromkeys(fdc_ids))
+        if not fdc_ids:
+            return {}
+        placeholders = ', '.join('?' * len(fdc_ids))
+
+        conn = get_connection(self.db_path)
+        foods = {
+            fdc_id: {
+                'fdcId': fdc_id,
+                'dataType': data_type,
+                'description': description,
+                'foodCategory': category or '',
+                'brandOwner': brand_owner or '',
+                'foodNutrients': [],
+                'foodPortions': []
+            }
+            for fdc_id, data_type, description, category, brand_owner in conn.execute(
+                f"SELECT fdc_id, data_type, description, category, brand_owner "
+                f"FROM food WHERE fdc_id IN ({placeholders})", fdc_ids
+            )
+        }
+        for fdc_id, nutrient_id, name, unit_name, amount in conn.execute(f"""
+            SELECT fn.fdc_id, n.id, n.name, n.unit_name, fn.amount
+            FROM food_nutrient fn
+            JOIN nutrient n ON n.id = fn.nutrient_id
+            WHERE fn.fdc_id IN ({placeholders})
+            ORDER BY fn.fdc_id, n.rank, n.id
+        """, fdc_ids):
+            foods[fdc_id]['foodNutrients'].append({
+                'nutrient': {'id': nutrient_id, 'name': name, 'unitName': unit_name},
+                'amount': amount
+            })
+        for fdc_id, description, gram_weight in conn.execute(
+            f"SELECT fdc_id, description, gram_weight FROM portion "
+            f"WHERE fdc_id IN ({placeholders}) ORDER BY fdc_id, portion_id", fdc_ids
+        ):
+            foods[fdc_id]['foodPortions'].append({
+                'portionDescription': description,
+                'gramWeight': gram_weight
+            })
+        conn.close()
+        return foods
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import USDA FoodData Central bulk downloads")
+    parser.add_argument('sources', nargs='+', help='Unzipped CSV folders, .zip downloads or .json files')
+    parser.add_argument('--db', help='Local store path (default USDA_LOCAL_DB or fdc_local.db)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows per transaction')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = import_fdc(args.sources, args.db, args.chunk_rows)
+    print(f"✅ Imported in {time.perf_counter() - start:.1f}s: "
+          + ', '.join(f"{count:,} {table}" for table, count in counts.items()))
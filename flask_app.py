@@ -3,10 +3,12 @@ Flask-based AI Nutrition Advisor
 Modern web application with beautiful UI for generating meal plans
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, send_file, session, redirect, url_for, stream_with_context
 import json
-from datetime import datetime
-import io
+import time
+import hashlib
+import multiprocessing
+from datetime import datetime, timedelta
 import pandas as pd
 import os
 from dotenv import load_dotenv
@@ -16,39 +18,65 @@ load_dotenv()
 
 # Import custom modules
 import database as db
+import db_pool
 import meal_optimizer as mo
-from utils import export_to_pdf, get_food_emoji, format_currency
-from usda_api import get_usda_api
-from who_immunization import who_api
-from gemini_chatbot import get_chatbot
+from plan_cache import MealPlanCache
+from export_cache import ExportCache, FORMATS as EXPORT_FORMATS
+import bulk_export
+from session_store import SQLiteSessionInterface
+from job_queue import JobQueue
+from ingredient_catalog import catalog
+from predictive_analytics import PredictiveAnalytics
+import search_index
+from utils import get_food_emoji, format_currency
 from translator import get_translation_service, LANGUAGES, t
+from subsystems import subsystems
 
-# Import impressive features
-try:
+# Optional features, imported and initialized on first use (see subsystems.py)
+@subsystems.loader('chatbot')
+def load_chatbot():
+    from gemini_chatbot import get_chatbot
+    return get_chatbot()
+
+@subsystems.loader('usda')
+def load_usda_api():
+    from usda_api import get_usda_api
+    return get_usda_api()
+
+@subsystems.loader('who')
+def load_who_api():
+    from who_immunization import who_api
+    return who_api
+
+@subsystems.loader('gamification')
+def load_gamification():
     from gamification_system import NutritionGamification
-    gamification = NutritionGamification()
-except Exception as e:
-    print(f"⚠️ Gamification not loaded: {e}")
-    gamification = None
-
-try:
-    from blockchain_food_tracking import FoodSupplyBlockchain, SupplyChainDashboard
-    food_blockchain = FoodSupplyBlockchain()
-    supply_dashboard = SupplyChainDashboard(food_blockchain)
-except Exception as e:
-    print(f"⚠️ Blockchain not loaded: {e}")
-    food_blockchain = None
-    supply_dashboard = None
+    return NutritionGamification()
+
+@subsystems.loader('food_blockchain')
+def load_food_blockchain():
+    from blockchain_food_tracking import FoodSupplyBlockchain
+    return FoodSupplyBlockchain()
+
+@subsystems.loader('supply_dashboard')
+def load_supply_dashboard():
+    from blockchain_food_tracking import SupplyChainDashboard
+    food_blockchain = subsystems.get('food_blockchain')
+    return SupplyChainDashboard(food_blockchain) if food_blockchain else None
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'nutrition-advisor-secret-key-2025')
+# Session data stays in the database; the cookie carries only the session id
+app.session_interface = SQLiteSessionInterface(db.DATABASE_PATH)
+
+@app.teardown_request
+def release_db_connections(exc):
+    """Roll back pooled connections a failed request left checked out"""
+    db_pool.release_thread()
 
 # Initialize translation service
 translation_service = get_translation_service()
 
-# Initialize chatbot
-chatbot = get_chatbot()
-
 # Make translation functions available in templates
 @app.context_processor
 def inject_translation():
@@ -64,19 +92,59 @@ def inject_translation():
 # Initialize database on startup
 db.initialize_database()
 
+# Generated plans are deterministic, so repeat submissions are served from cache
+plan_cache = MealPlanCache(max_size=int(os.environ.get('PLAN_CACHE_SIZE', 128)))
+
+# Rendered CSV/PDF/JSON downloads, at most one render per plan and format
+export_cache = ExportCache()
+
+# Formats rendered in the background right after a plan is saved (e.g. "pdf,csv"; empty = on first download)
+PRERENDER_FORMATS = [f for f in os.environ.get('EXPORT_PRERENDER', '').split(',') if f in EXPORT_FORMATS]
+
+# Workers for ?async=1 plan generation, so slow solves don't hit the gunicorn timeout
+job_queue = JobQueue(num_workers=int(os.environ.get('JOB_WORKERS', 2)))
+
+# Malnutrition risk predictions and population screenings
+predictive = PredictiveAnalytics(db.DATABASE_PATH)
+JOB_EVENTS_POLL_SECONDS = 0.5
+
+# Home page view model for the current catalog version, and the rendered
+# page with its ETag per (catalog version, language)
+index_view_cache = {}
+index_page_cache = {}
+
 @app.route('/')
 def index():
     """Home page - Meal Planner"""
-    # Get ingredients organized by category
-    ingredients_df = db.get_all_ingredients()
-    ingredients_by_category = db.get_ingredients_by_category()
+    snapshot = catalog.snapshot()
+    lang = session.get('language', 'en')
+    
+    page = index_page_cache.get((snapshot.version, lang))
+    if page is None:
+        if any(version != snapshot.version for version, _ in index_page_cache):
+            index_page_cache.clear()
+        if index_view_cache.get('version') != snapshot.version:
+            index_view_cache.update(version=snapshot.version, ingredients=index_view_model(snapshot))
+        html = render_template('index.html', ingredients=index_view_cache['ingredients'])
+        page = (html, hashlib.sha1(html.encode()).hexdigest())
+        index_page_cache[(snapshot.version, lang)] = page
+    
+    html, etag = page
+    response = Response(html, mimetype='text/html')
+    response.set_etag(etag)
+    # Browsers revalidate every time, but only re-download when the catalog changed
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def index_view_model(snapshot):
+    """Ingredients organized by category for the home page template"""
+    records = snapshot.dataframe.to_dict('records')
     
-    # Convert to list of dicts for easier template rendering
     ingredients_data = []
-    for category, ingredients in ingredients_by_category.items():
+    for category, names in snapshot.category_index.items():
         category_items = []
-        for ing_name in ingredients:
-            ing = ingredients_df[ingredients_df['name'] == ing_name].iloc[0]
+        for ing_name in names:
+            ing = records[snapshot.name_index[ing_name]]
             category_items.append({
                 'name': ing['name'],
                 'cost': ing['cost_per_kg'],
@@ -89,109 +157,376 @@ def index():
             'ingredients': category_items  # Changed from 'items' to 'ingredients'
         })
     
-    return render_template('index.html', ingredients=ingredients_data)
+    return ingredients_data
 
 @app.route('/api/generate-plan', methods=['POST'])
 def generate_plan():
-    """API endpoint to generate meal plan"""
+    """
+    API endpoint to generate meal plan
+    
+    With ?async=1 the plan is generated by a background worker and the
+    response is a job id; follow progress at /api/jobs/<id> or
+    /api/jobs/<id>/events.
+    """
     try:
         data = request.get_json()
         
         # Extract parameters
-        num_children = int(data.get('num_children', 20))
-        budget = float(data.get('budget', 2000))
-        age_group = data.get('age_group', '3-6 years')
-        selected_ingredients = data.get('ingredients', [])
+        params = {
+            'num_children': int(data.get('num_children', 20)),
+            'budget': float(data.get('budget', 2000)),
+            'age_group': data.get('age_group', '3-6 years'),
+            'ingredients': data.get('ingredients', []),
+            'whole_week': bool(data.get('whole_week', False))
+        }
         
-        if not selected_ingredients:
+        if not params['ingredients']:
             return jsonify({
                 'success': False,
                 'error': 'Please select at least 5 ingredients'
             }), 400
         
-        # Get ingredients dataframe
-        ingredients_df = db.get_all_ingredients()
+        if request.args.get('async') == '1':
+            job_id = job_queue.submit('generate_plan', params, total=len(mo.DAYS))
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status_url': url_for('job_status', job_id=job_id),
+                'events_url': url_for('job_events', job_id=job_id)
+            }), 202
         
-        # Create optimizer
-        optimizer = mo.MealOptimizer(
-            ingredients_df=ingredients_df,
-            budget=budget,
-            num_children=num_children,
-            age_group=age_group
-        )
-        
-        # Generate meal plan
-        meal_plan = optimizer.generate_meal_plan(selected_ingredients)
-        
-        # Save to database
-        plan_data = json.dumps({
-            'weekly_plan': meal_plan['weekly_plan'],
-            'selected_ingredients': selected_ingredients
-        }, default=str)
-        
-        plan_id = db.save_meal_plan(
-            plan_name=f"Plan_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            budget=budget,
-            num_children=num_children,
-            age_group=age_group,
-            total_cost=meal_plan['total_cost'],
-            nutrition_score=meal_plan['nutrition_score'],
-            plan_data=plan_data
-        )
+        meal_plan, plan_id = generate_and_save_plan(params)
         
         # Store in session for later retrieval
-        session['current_plan'] = meal_plan
-        session['plan_id'] = plan_id
-        session['num_children'] = num_children
-        session['budget'] = budget
+        remember_plan(plan_id)
         
         # Format response
         response_data = {
             'success': True,
             'plan_id': plan_id,
-            'total_cost': round(meal_plan['total_cost'], 2),
-            'nutrition_score': meal_plan['nutrition_score'],
-            'weekly_nutrition': meal_plan['weekly_nutrition'],
-            'daily_requirements': meal_plan['daily_requirements'],
-            'weekly_plan': format_weekly_plan(meal_plan['weekly_plan']),
-            'summary': get_plan_summary(meal_plan, num_children, budget)
+            **format_plan_response(meal_plan, params['num_children'], params['budget'])
         }
         
         return jsonify(response_data)
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+def generate_and_save_plan(params, progress_callback=None):
+    """
+    Generate (or fetch from cache) and save a meal plan for /api/generate-plan params
+    
+    Returns:
+        (meal_plan, plan_id)
+    """
+    solver = os.environ.get('MEAL_SOLVER', 'cbc')
+    cache_key = plan_cache.make_key(
+        params['ingredients'], params['budget'], params['num_children'], params['age_group'],
+        whole_week=params['whole_week'], solver=solver
+    )
+    
+    meal_plan = plan_cache.get(cache_key)
+    saved = db.get_meal_plan_by_input_hash(cache_key) if meal_plan is not None else None
+    if meal_plan is None:
+        # Get ingredients dataframe
+        ingredients_df = catalog.dataframe
+        
+        # Create optimizer
+        optimizer = mo.MealOptimizer(
+            ingredients_df=ingredients_df,
+            budget=params['budget'],
+            num_children=params['num_children'],
+            age_group=params['age_group'],
+            solver=solver
+        )
+        
+        # Generate meal plan
+        meal_plan = optimizer.generate_meal_plan(
+            params['ingredients'],
+            whole_week=params['whole_week'],
+            progress_callback=progress_callback
+        )
+        plan_cache.put(cache_key, meal_plan)
+    elif progress_callback:
+        progress_callback(len(mo.DAYS), len(mo.DAYS))
+    
+    # A cache hit that was already saved reuses that row
+    if saved:
+        return meal_plan, saved['id']
+    
+    # Save to database
+    plan_id = db.save_meal_plan(**build_plan_record(
+        meal_plan, params['ingredients'], params['budget'], params['num_children'],
+        params['age_group'], cache_key
+    ))
+    if PRERENDER_FORMATS:
+        job_queue.submit('render_exports', {'plan_id': plan_id, 'formats': PRERENDER_FORMATS})
+    return meal_plan, plan_id
+
+def run_plan_job(params, progress):
+    """Job queue handler for asynchronous /api/generate-plan requests"""
+    meal_plan, plan_id = generate_and_save_plan(params, progress_callback=progress)
+    return {'plan_id': plan_id, 'meal_plan': meal_plan}
+
+def run_risk_screening_job(params, progress):
+    """Job queue handler for population malnutrition screenings"""
+    return predictive.screen_malnutrition_risk(progress=progress)
+
+def run_render_exports_job(params, progress):
+    """Job queue handler that fills the export cache for a just-saved plan"""
+    export_cache.prerender(params['plan_id'], params['formats'])
+    return {'plan_id': params['plan_id'], 'formats': params['formats']}
+
+job_queue.register('generate_plan', run_plan_job)
+job_queue.register('render_exports', run_render_exports_job)
+job_queue.register('risk_screening', run_risk_screening_job)
+# Batch solver processes are spawned and re-import the main module; only the parent runs jobs
+if multiprocessing.parent_process() is None:
+    job_queue.start()
+
+def remember_plan(plan_id):
+    """Point the session at a saved plan for the export endpoints"""
+    session['plan_id'] = plan_id
+
+def job_status_response(job):
+    """Public view of a job row; finished plan jobs include the plan response"""
+    response_data = {
+        'success': job['status'] != 'failed',
+        'job_id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'total': job['total'],
+        'error': job['error']
+    }
+    
+    if job['status'] == 'done' and job['job_type'] == 'generate_plan':
+        params = job['params']
+        meal_plan = job['result']['meal_plan']
+        response_data['result'] = {
+            'success': True,
+            'plan_id': job['result']['plan_id'],
+            **format_plan_response(meal_plan, params['num_children'], params['budget'])
+        }
+    elif job['status'] == 'done':
+        response_data['result'] = job['result']
+    
+    return response_data
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """API endpoint to poll a background job"""
+    job = db.get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    if job['status'] == 'done' and job['job_type'] == 'generate_plan':
+        remember_plan(job['result']['plan_id'])
+    
+    return jsonify(job_status_response(job))
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """
+    Server-Sent Events stream of a background job's progress
+    
+    Sends a 'progress' event whenever the job moves on and a final 'done'
+    or 'failed' event, then closes. Fetch /api/jobs/<id> afterwards for
+    the result.
+    """
+    if not db.get_job(job_id):
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    
+    def events():
+        last_state = None
+        idle = 0.0
+        while True:
+            job = db.get_job(job_id)
+            state = (job['status'], job['progress'], job['total'])
+            if state != last_state:
+                last_state = state
+                idle = 0.0
+                payload = json.dumps({
+                    'status': job['status'],
+                    'progress': job['progress'],
+                    'total': job['total'],
+                    'error': job['error']
+                })
+                event = job['status'] if job['status'] in ('done', 'failed') else 'progress'
+                yield f"event: {event}\ndata: {payload}\n\n"
+                if event != 'progress':
+                    return
+            elif idle >= 15:
+                # Comment line keeps proxies from closing an idle stream
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            
+            time.sleep(JOB_EVENTS_POLL_SECONDS)
+            idle += JOB_EVENTS_POLL_SECONDS
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/generate-plans/batch', methods=['POST'])
+def generate_plans_batch():
+    """
+    API endpoint to generate meal plans for many centres at once
+    
+    Expects {"centres": [{"name", "ingredients", "budget", "num_children",
+    "age_group", "whole_week"}, ...]}. Plans are solved across a process
+    pool and streamed back as NDJSON, one line per centre as it finishes,
+    followed by a final line with the saved plan ids. All meal_plans rows
+    are written in one transaction. As in /api/generate-plan, inputs that
+    were saved before reuse that plan, and centres with identical inputs
+    share one row.
+    """
+    data = request.get_json(silent=True) or {}
+    centres = data.get('centres', []) if isinstance(data, dict) else []
+    
+    if not centres or not isinstance(centres, list):
+        return jsonify({'success': False, 'error': 'No centres provided'}), 400
+    
+    # Validate every centre before any plan is solved or streamed
+    solver = os.environ.get('MEAL_SOLVER', 'cbc')
+    configs = []
+    for index, centre in enumerate(centres):
+        try:
+            config = {
+                'name': centre.get('name', ''),
+                'ingredients': centre.get('ingredients', []),
+                'budget': float(centre.get('budget', 2000)),
+                'num_children': int(centre.get('num_children', 20)),
+                'age_group': centre.get('age_group', '3-6 years'),
+                'whole_week': bool(centre.get('whole_week', False)),
+                'solver': solver
+            }
+            if not isinstance(config['ingredients'], list):
+                raise ValueError("ingredients must be a list")
+            if not config['budget'] > 0 or config['num_children'] <= 0:
+                raise ValueError("budget and num_children must be positive")
+        except (AttributeError, TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': f"Invalid centre {index}: {e}"}), 400
+        configs.append(config)
+    
+    def generate():
+        plan_ids = {}  # cache key -> saved plan id
+        records = {}   # cache key -> meal_plans row still to save
+        succeeded = []
+        pending = {}
+        keys = []
+        
+        def result_line(index, meal_plan):
+            config = configs[index]
+            if keys[index] not in plan_ids and keys[index] not in records:
+                records[keys[index]] = build_plan_record(
+                    meal_plan, config['ingredients'], config['budget'],
+                    config['num_children'], config['age_group'], keys[index],
+                    plan_name=config['name'] or None
+                )
+            succeeded.append(index)
+            return json.dumps({
+                'index': index,
+                'name': config['name'],
+                'success': True,
+                **format_plan_response(meal_plan, config['num_children'], config['budget'])
+            }, default=str) + '\n'
+        
+        def error_line(index, error):
+            return json.dumps({
+                'index': index,
+                'name': configs[index]['name'],
+                'success': False,
+                'error': error
+            }) + '\n'
+        
+        # Serve cached plans right away; identical configs are solved once
+        for index, config in enumerate(configs):
+            keys.append(plan_cache.make_key(
+                config['ingredients'], config['budget'], config['num_children'],
+                config['age_group'], whole_week=config['whole_week'], solver=solver
+            ))
+            if not config['ingredients']:
+                yield error_line(index, 'Please select at least 5 ingredients')
+                continue
+            if keys[index] in pending:
+                pending[keys[index]].append(index)
+                continue
+            
+            meal_plan = plan_cache.get(keys[index])
+            if meal_plan is not None:
+                # A cache hit that was already saved reuses that row
+                if keys[index] not in plan_ids and keys[index] not in records:
+                    saved = db.get_meal_plan_by_input_hash(keys[index])
+                    if saved:
+                        plan_ids[keys[index]] = saved['id']
+                yield result_line(index, meal_plan)
+            else:
+                pending[keys[index]] = [index]
+        
+        unique_keys = list(pending)
+        batch = mo.MealOptimizer.generate_batch(
+            catalog.dataframe if unique_keys else None,
+            [configs[pending[key][0]] for key in unique_keys]
+        )
+        for batch_index, meal_plan, error in batch:
+            key = unique_keys[batch_index]
+            if error:
+                for index in pending[key]:
+                    yield error_line(index, error)
+                continue
+            
+            plan_cache.put(key, meal_plan)
+            for index in pending[key]:
+                yield result_line(index, meal_plan)
+        
+        # Save every new plan in one transaction
+        new_keys = list(records)
+        plan_ids.update(zip(new_keys, db.save_meal_plans([records[key] for key in new_keys])))
+        yield json.dumps({
+            'done': True,
+            'plan_ids': {index: plan_ids[keys[index]] for index in sorted(succeeded)},
+            'succeeded': len(succeeded),
+            'failed': len(configs) - len(succeeded)
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/plan-cache/stats')
+def plan_cache_stats():
+    """API endpoint for meal plan cache hit/miss counters"""
+    return jsonify(plan_cache.stats())
+
+def send_export(fmt):
+    """Serve the session plan's export from the export cache (304 when the browser's copy is current)"""
+    plan_id = session.get('plan_id')
+    path = export_cache.get(plan_id, fmt) if plan_id else None
+    if not path:
+        return jsonify({'error': 'No meal plan found'}), 404
+    
+    _, mimetype = EXPORT_FORMATS[fmt]
+    return send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=f'meal_plan_{plan_id}.{fmt}',
+        conditional=True
+    )
+
 @app.route('/api/export-csv')
 def export_csv():
     """Export meal plan as CSV"""
     try:
-        meal_plan = session.get('current_plan')
-        if not meal_plan:
-            return jsonify({'error': 'No meal plan found'}), 404
-        
-        # Format as dataframe
-        formatted_df = mo.format_meal_plan_for_display(meal_plan)
-        
-        # Create CSV in memory
-        output = io.StringIO()
-        formatted_df.to_csv(output, index=False)
-        output.seek(0)
-        
-        # Convert to bytes
-        mem = io.BytesIO()
-        mem.write(output.getvalue().encode())
-        mem.seek(0)
-        
-        return send_file(
-            mem,
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'meal_plan_{datetime.now().strftime("%Y%m%d")}.csv'
-        )
+        return send_export('csv')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -199,26 +534,7 @@ def export_csv():
 def export_pdf():
     """Export meal plan as PDF"""
     try:
-        meal_plan = session.get('current_plan')
-        num_children = session.get('num_children', 20)
-        budget = session.get('budget', 2000)
-        
-        if not meal_plan:
-            return jsonify({'error': 'No meal plan found'}), 404
-        
-        # Generate PDF
-        pdf_data = export_to_pdf(meal_plan, num_children, budget)
-        
-        # Create file in memory
-        mem = io.BytesIO(pdf_data)
-        mem.seek(0)
-        
-        return send_file(
-            mem,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'meal_plan_{datetime.now().strftime("%Y%m%d")}.pdf'
-        )
+        return send_export('pdf')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -226,32 +542,50 @@ def export_pdf():
 def export_json():
     """Export meal plan as JSON"""
     try:
-        meal_plan = session.get('current_plan')
-        if not meal_plan:
-            return jsonify({'error': 'No meal plan found'}), 404
-        
-        # Convert to JSON string
-        json_str = json.dumps(meal_plan, indent=2, default=str)
-        
-        # Create file in memory
-        mem = io.BytesIO(json_str.encode())
-        mem.seek(0)
-        
-        return send_file(
-            mem,
-            mimetype='application/json',
-            as_attachment=True,
-            download_name=f'meal_plan_{datetime.now().strftime("%Y%m%d")}.json'
-        )
+        return send_export('json')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/export/bulk')
+def export_bulk():
+    """
+    Stream a ZIP of every meal plan saved between ?from= and ?to=
+    (YYYY-MM-DD, both inclusive, either optional) in ?format= (default pdf)
+    """
+    fmt = request.args.get('format', 'pdf')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start = datetime.strptime(start, '%Y-%m-%d').strftime('%Y-%m-%d') if start else None
+        end = (datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d') if end else None
+    except ValueError:
+        return jsonify({'error': 'from and to must be dates (YYYY-MM-DD)'}), 400
+    
+    rows = db.iter_meal_plans(start, end)
+    download_name = f"meal_plans_{request.args.get('from', 'all')}_{request.args.get('to', 'all')}_{fmt}.zip"
+    return Response(
+        stream_with_context(bulk_export.stream_zip(
+            rows, fmt, cache=export_cache, max_workers=int(os.environ.get('EXPORT_WORKERS', 0)) or None
+        )),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename={download_name}'}
+    )
+
+@app.route('/api/export-cache/stats')
+def export_cache_stats():
+    """API endpoint for export cache renders, hits and disk usage"""
+    return jsonify(export_cache.stats())
+
 @app.route('/analytics')
 def analytics():
     """Analytics dashboard page"""
     # Get analytics data
     plans_df, effectiveness_df = db.get_analytics_data()
     recent_plans = db.get_recent_meal_plans(20)
+    top_ingredients = db.get_ingredient_usage(10)
     
     # Calculate summary metrics
     summary = {
@@ -271,7 +605,8 @@ def analytics():
         summary=summary,
         budget_vs_score=budget_vs_score,
         age_group_stats=age_group_stats,
-        recent_plans=recent_plans_list
+        recent_plans=recent_plans_list,
+        top_ingredients=top_ingredients.to_dict('records')
     )
 
 @app.route('/about')
@@ -290,6 +625,39 @@ def set_language(lang):
     # Redirect back to the page they came from or home
     return redirect(request.referrer or url_for('index'))
 
+def build_plan_record(meal_plan, selected_ingredients, budget, num_children, age_group,
+                      input_hash=None, plan_name=None):
+    """Build the meal_plans row (db.save_meal_plan arguments) for a generated plan"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    plan_data = json.dumps({
+        'weekly_plan': meal_plan['weekly_plan'],
+        'selected_ingredients': selected_ingredients,
+        'weekly_nutrition': meal_plan['weekly_nutrition'],
+        'daily_requirements': meal_plan['daily_requirements']
+    }, default=str)
+    
+    return {
+        'plan_name': f"{plan_name}_{timestamp}" if plan_name else f"Plan_{timestamp}",
+        'budget': budget,
+        'num_children': num_children,
+        'age_group': age_group,
+        'total_cost': meal_plan['total_cost'],
+        'nutrition_score': meal_plan['nutrition_score'],
+        'plan_data': plan_data,
+        'input_hash': input_hash
+    }
+
+def format_plan_response(meal_plan, num_children, budget):
+    """Format a generated plan for the JSON API response"""
+    return {
+        'total_cost': round(meal_plan['total_cost'], 2),
+        'nutrition_score': meal_plan['nutrition_score'],
+        'weekly_nutrition': meal_plan['weekly_nutrition'],
+        'daily_requirements': meal_plan['daily_requirements'],
+        'weekly_plan': format_weekly_plan(meal_plan['weekly_plan']),
+        'summary': get_plan_summary(meal_plan, num_children, budget)
+    }
+
 def format_weekly_plan(weekly_plan):
     """Format weekly plan for frontend display"""
     formatted = {}
@@ -351,6 +719,27 @@ def search_health():
     
     return jsonify(results.to_dict('records'))
 
+@app.route('/api/search')
+def api_search():
+    """Full-text search across ingredients, health information, recipes and local FDC foods"""
+    query = request.args.get('q', '')
+    if not query:
+        return jsonify({'error': 'No search query provided'}), 400
+
+    requested = [s for s in request.args.get('sources', '').split(',') if s]
+    sources = [s for s in requested if s in search_index.SOURCES] if requested else list(search_index.SOURCES)
+    limit = min(request.args.get('limit', 10, type=int), 50)
+
+    results = db.search_all(query, sources, limit) if sources else []
+    usda = subsystems.get('usda') if not requested or 'food' in requested else None
+    if usda and usda.local:
+        results += [{
+            'source': 'food', 'id': food['fdcId'], 'title': food['description'],
+            'category': food['foodCategory'], 'score': None
+        } for food in usda.local.search(query, limit)]
+
+    return jsonify(results)
+
 @app.route('/immunisation')
 def immunisation():
     """Immunisation Reminder Page"""
@@ -419,61 +808,100 @@ def growth_tracking():
 def api_growth_data(child_id):
     """API endpoint to get growth data for a child"""
     try:
-        # Get growth history
-        history = db.get_child_growth_history(child_id)
-        
-        # Get latest measurement
-        latest = db.get_latest_growth(child_id)
-        
-        # Get chart data
-        chart_df = db.get_growth_chart_data(child_id)
-        
-        # Calculate WHO Z-scores if latest measurement exists
-        who_status = 'No data'
-        if latest and len(chart_df) > 0:
-            age_months = chart_df.iloc[-1]['age_months']
-            gender = chart_df.iloc[-1]['gender']
-            z_scores = db.calculate_who_z_scores(
-                age_months, 
-                latest['weight_kg'], 
-                latest['height_cm'], 
-                gender
-            )
-            who_status = z_scores['status']
+        # Full series with velocities and z-scores, oldest first
+        series = db.get_growth_series(child_id)
+        
+        if len(series) == 0:
+            return jsonify({
+                'success': True,
+                'latest': None,
+                'history': [],
+                'chart_data': {key: [] for key in (
+                    'dates', 'weights', 'heights', 'bmis', 'weight_velocity',
+                    'height_velocity', 'weight_for_age_z', 'height_for_age_z',
+                    'weight_for_height_z'
+                )},
+                'who_status': 'No data'
+            })
+        
+        # Measurement history (newest first) with JSON-safe nulls
+        history_df = series.iloc[::-1]
+        history = history_df.astype(object).where(history_df.notna(), None).to_dict('records')
+        latest = history[0]
+        
+        def values(column, start=0):
+            """Column as a list with NaN as None (NaN is not valid JSON)"""
+            column = series[column].iloc[start:]
+            return column.astype(object).where(column.notna(), None).tolist()
         
         # Format chart data
         chart_data = {
-            'dates': chart_df['measurement_date'].dt.strftime('%Y-%m-%d').tolist() if len(chart_df) > 0 else [],
-            'weights': chart_df['weight_kg'].tolist() if len(chart_df) > 0 else [],
-            'heights': chart_df['height_cm'].tolist() if len(chart_df) > 0 else [],
-            'bmis': chart_df['bmi'].fillna(0).tolist() if len(chart_df) > 0 else [],
-            'weight_velocity': [],
-            'height_velocity': []
+            'dates': pd.to_datetime(series['measurement_date']).dt.strftime('%Y-%m-%d').tolist(),
+            'weights': values('weight_kg'),
+            'heights': values('height_cm'),
+            'bmis': series['bmi'].fillna(0).tolist(),
+            # Gain per month since the previous measurement
+            'weight_velocity': values('weight_velocity', start=1),
+            'height_velocity': values('height_velocity', start=1),
+            'weight_for_age_z': values('weight_for_age_z'),
+            'height_for_age_z': values('height_for_age_z'),
+            'weight_for_height_z': values('weight_for_height_z')
         }
         
-        # Calculate growth velocity (gain per month)
-        if len(chart_df) > 1:
-            for i in range(1, len(chart_df)):
-                days_diff = (chart_df.iloc[i]['measurement_date'] - chart_df.iloc[i-1]['measurement_date']).days
-                months_diff = days_diff / 30.44 if days_diff > 0 else 1
-                
-                weight_gain = (chart_df.iloc[i]['weight_kg'] - chart_df.iloc[i-1]['weight_kg']) / months_diff
-                height_gain = (chart_df.iloc[i]['height_cm'] - chart_df.iloc[i-1]['height_cm']) / months_diff
-                
-                chart_data['weight_velocity'].append(round(weight_gain, 2))
-                chart_data['height_velocity'].append(round(height_gain, 2))
-        
         return jsonify({
             'success': True,
             'latest': latest,
-            'history': history.to_dict('records'),
+            'history': history,
             'chart_data': chart_data,
-            'who_status': who_status
+            'who_status': latest['who_status']
         })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/risk-screening', methods=['POST'])
+def api_risk_screening():
+    """
+    API endpoint to screen every child for malnutrition risk
+    
+    Runs as a background job (follow it at /api/jobs/<id>); the results are
+    saved as a risk snapshot and listed by /api/risk-snapshots.
+    """
+    job_id = job_queue.submit('risk_screening', {}, total=3)
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status_url': url_for('job_status', job_id=job_id),
+        'events_url': url_for('job_events', job_id=job_id)
+    }), 202
+
+@app.route('/api/risk-snapshots')
+def api_risk_snapshots():
+    """
+    API endpoint to list children from the latest risk screening
+    
+    Query parameters: page, per_page (max 500), sort (risk_score,
+    confidence, weight_trend, height_trend, bmi_current,
+    last_measurement_date, child_name, village), order (asc/desc),
+    risk_level, village and screening_id.
+    """
+    try:
+        snapshots = predictive.get_risk_snapshots(
+            screening_id=request.args.get('screening_id'),
+            page=request.args.get('page', 1, type=int),
+            per_page=min(500, request.args.get('per_page', 50, type=int)),
+            sort=request.args.get('sort', 'risk_score'),
+            order=request.args.get('order', 'desc'),
+            risk_level=request.args.get('risk_level'),
+            village=request.args.get('village')
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if snapshots is None:
+        return jsonify({'success': False, 'error': 'No risk screening has been run yet'}), 404
+    return jsonify({'success': True, **snapshots})
+
 @app.route('/api/add-growth-measurement', methods=['POST'])
 def api_add_growth_measurement():
     """API endpoint to add a new growth measurement"""
@@ -508,9 +936,9 @@ def api_usda_search():
     if not query:
         return jsonify({'error': 'No search query provided'}), 400
     
-    api = get_usda_api()
+    api = subsystems.get('usda')
     if not api:
-        return jsonify({'error': 'USDA API not configured. Please set USDA_API_KEY environment variable.'}), 500
+        return jsonify({'error': 'USDA API not configured. Please set USDA_API_KEY or import FDC data with fdc_local.py.'}), 503
     
     results = api.search_foods(query, page_size=10)
     return jsonify(results)
@@ -518,9 +946,9 @@ def api_usda_search():
 @app.route('/api/usda-details/<int:fdc_id>')
 def api_usda_details(fdc_id):
     """API endpoint to get detailed nutrition info"""
-    api = get_usda_api()
+    api = subsystems.get('usda')
     if not api:
-        return jsonify({'error': 'USDA API not configured'}), 500
+        return jsonify({'error': 'USDA API not configured'}), 503
     
     details = api.get_nutrition_summary(fdc_id)
     if not details:
@@ -537,9 +965,9 @@ def api_usda_compare():
     if not food_names:
         return jsonify({'error': 'No foods provided'}), 400
     
-    api = get_usda_api()
+    api = subsystems.get('usda')
     if not api:
-        return jsonify({'error': 'USDA API not configured'}), 500
+        return jsonify({'error': 'USDA API not configured'}), 503
     
     comparison = api.compare_foods(food_names)
     return jsonify(comparison)
@@ -547,6 +975,10 @@ def api_usda_compare():
 @app.route('/who-vaccines')
 def who_vaccines():
     """WHO Vaccination Information Page"""
+    who_api = subsystems.get('who')
+    if not who_api:
+        return jsonify({'error': 'WHO immunization data not available'}), 503
+    
     schedule = who_api.get_vaccination_schedule()
     coverage = who_api.get_immunization_coverage('India')
     missed_reasons = who_api.get_missed_opportunities()
@@ -564,6 +996,10 @@ def api_who_vaccine_info():
     if not vaccine_name:
         return jsonify({'error': 'Vaccine name required'}), 400
     
+    who_api = subsystems.get('who')
+    if not who_api:
+        return jsonify({'error': 'WHO immunization data not available'}), 503
+    
     info = who_api.get_vaccine_info(vaccine_name)
     
     if info:
@@ -579,6 +1015,10 @@ def api_who_disease_info():
     if not disease_name:
         return jsonify({'error': 'Disease name required'}), 400
     
+    who_api = subsystems.get('who')
+    if not who_api:
+        return jsonify({'error': 'WHO immunization data not available'}), 503
+    
     info = who_api.get_disease_info(disease_name)
     
     if info:
@@ -625,11 +1065,12 @@ def api_chatbot():
         if not user_message:
             return jsonify({'success': False, 'error': 'No message provided'}), 400
         
+        chatbot = subsystems.get('chatbot')
         if not chatbot:
             return jsonify({
                 'success': False, 
                 'error': 'Chatbot not initialized. Please set GEMINI_API_KEY environment variable.'
-            }), 500
+            }), 503
         
         # Get response from chatbot
         response = chatbot.chat(user_message, conversation_history)
@@ -650,8 +1091,9 @@ def api_chatbot_meal_advice():
         meal_plan_data = data.get('meal_plan', {})
         concern = data.get('concern', 'general advice')
         
+        chatbot = subsystems.get('chatbot')
         if not chatbot:
-            return jsonify({'success': False, 'error': 'Chatbot not available'}), 500
+            return jsonify({'success': False, 'error': 'Chatbot not available'}), 503
         
         advice = chatbot.get_meal_advice(meal_plan_data, concern)
         
@@ -674,8 +1116,9 @@ def api_chatbot_alternatives():
         if not ingredient:
             return jsonify({'success': False, 'error': 'No ingredient provided'}), 400
         
+        chatbot = subsystems.get('chatbot')
         if not chatbot:
-            return jsonify({'success': False, 'error': 'Chatbot not available'}), 500
+            return jsonify({'success': False, 'error': 'Chatbot not available'}), 503
         
         suggestions = chatbot.suggest_alternatives(ingredient, reason)
         
@@ -695,34 +1138,17 @@ def generate_shopping_list(plan_id):
         if not plan:
             return jsonify({'success': False, 'error': 'Meal plan not found'}), 404
         
-        plan_data = json.loads(plan['plan_data'])
-        
-        # Aggregate all ingredients from all meals
-        shopping_list = {}
-        
-        for day, meals in plan_data['weekly_plan'].items():
-            for meal_type, meal_data in meals.items():
-                for item in meal_data.get('items', []):
-                    ingredient = item['ingredient']
-                    quantity = item['quantity_g']
-                    
-                    if ingredient in shopping_list:
-                        shopping_list[ingredient] += quantity
-                    else:
-                        shopping_list[ingredient] = quantity
-        
-        # Format shopping list
-        formatted_list = []
-        for ingredient, quantity_g in shopping_list.items():
-            quantity_kg = quantity_g / 1000
-            formatted_list.append({
-                'ingredient': ingredient,
-                'quantity_g': round(quantity_g, 1),
-                'quantity_kg': round(quantity_kg, 2)
-            })
-        
-        # Sort by ingredient name
-        formatted_list.sort(key=lambda x: x['ingredient'])
+        # Totals per ingredient from meal_plan_items
+        formatted_list = [
+            {
+                'ingredient': item['ingredient'],
+                'category': item['category'],
+                'quantity_g': round(item['quantity_g'], 1),
+                'quantity_kg': round(item['quantity_g'] / 1000, 2),
+                'cost': round(item['cost'], 2)
+            }
+            for item in db.get_shopping_list(plan_id)
+        ]
         
         return jsonify({
             'success': True,
@@ -746,8 +1172,9 @@ def gamification_page():
 @app.route('/api/gamification/leaderboard')
 def get_leaderboard():
     """Get leaderboard"""
+    gamification = subsystems.get('gamification')
     if not gamification:
-        return jsonify({'success': False, 'error': 'Gamification not available'}), 500
+        return jsonify({'success': False, 'error': 'Gamification not available'}), 503
     
     limit = int(request.args.get('limit', 10))
     leaderboard = gamification.get_leaderboard(limit)
@@ -756,8 +1183,9 @@ def get_leaderboard():
 @app.route('/api/blockchain/track/<food_item>')
 def track_food_item(food_item):
     """Track food item journey on blockchain"""
+    food_blockchain = subsystems.get('food_blockchain')
     if not food_blockchain:
-        return jsonify({'success': False, 'error': 'Blockchain not available'}), 500
+        return jsonify({'success': False, 'error': 'Blockchain not available'}), 503
     
     journey = food_blockchain.get_food_journey(food_item)
     
@@ -771,8 +1199,9 @@ def track_food_item(food_item):
 @app.route('/api/blockchain/stats')
 def blockchain_stats():
     """Get supply chain statistics"""
+    supply_dashboard = subsystems.get('supply_dashboard')
     if not supply_dashboard:
-        return jsonify({'success': False, 'error': 'Blockchain not available'}), 500
+        return jsonify({'success': False, 'error': 'Blockchain not available'}), 503
     
     stats = supply_dashboard.get_supply_chain_stats()
     anomalies = supply_dashboard.detect_anomalies()
@@ -3,10 +3,39 @@
 Unique Feature: Make nutrition fun with rewards, achievements, and leaderboards
 """
 
-import sqlite3
 from datetime import datetime
 import json
 
+from db_pool import get_connection
+from migrations import migrate
+
+# (name, description, icon, points, category, requirement), seeded by migration 001
+DEFAULT_ACHIEVEMENTS = [
+    # Eating achievements
+    ("🥗 Veggie Lover", "Ate vegetables for 7 days straight", "🥗", 50, "Eating", "7_day_veggie_streak"),
+    ("🥛 Milk Master", "Drank milk every day for a week", "🥛", 30, "Eating", "7_day_milk"),
+    ("🍎 Fruit Fan", "Ate fruits 5 times this week", "🍎", 40, "Eating", "5_fruits_week"),
+    ("💪 Protein Power", "Met protein goals for 10 days", "💪", 60, "Eating", "10_day_protein"),
+    ("🌟 Balanced Eater", "Completed all meals for a month", "🌟", 100, "Eating", "30_day_complete"),
+    
+    # Growth achievements
+    ("📈 Growing Strong", "Gained healthy weight this month", "📈", 70, "Growth", "weight_gain"),
+    ("📏 Height Hero", "Grew 2cm in 3 months", "📏", 80, "Growth", "height_growth"),
+    ("💚 Healthy BMI", "Maintained healthy BMI for 3 months", "💚", 90, "Growth", "healthy_bmi"),
+    
+    # Worker achievements
+    ("👨‍🍳 Master Chef", "Prepared 100 meals", "👨‍🍳", 120, "Worker", "100_meals"),
+    ("📊 Data Wizard", "Logged 50 meal plans", "📊", 80, "Worker", "50_plans"),
+    ("⭐ 5-Star Rating", "Got 5-star feedback 10 times", "⭐", 150, "Worker", "10_five_stars"),
+    ("🎯 Zero Waste", "Achieved zero food waste for a week", "🎯", 100, "Worker", "zero_waste_week"),
+    
+    # Community achievements
+    ("🤝 Helper", "Helped other Anganwadis 5 times", "🤝", 60, "Community", "help_5_times"),
+    ("🌍 Eco Warrior", "Reduced waste by 50%", "🌍", 110, "Community", "waste_reduction"),
+    ("🏆 Champion", "Top of leaderboard for a month", "🏆", 200, "Community", "leaderboard_top"),
+]
+
+
 class NutritionGamification:
     """
     Gamification engine to encourage healthy eating habits
@@ -14,111 +43,12 @@ class NutritionGamification:
     
     def __init__(self, db_path='nutrition_advisor.db'):
         self.db_path = db_path
-        self.init_gamification_tables()
-    
-    def init_gamification_tables(self):
-        """Create tables for gamification"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Achievements table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS achievements (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                icon TEXT,
-                points INTEGER DEFAULT 10,
-                category TEXT,
-                requirement TEXT
-            )
-        """)
-        
-        # User achievements
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_achievements (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                achievement_id INTEGER,
-                earned_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (achievement_id) REFERENCES achievements(id)
-            )
-        """)
-        
-        # Points table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS user_points (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                points INTEGER DEFAULT 0,
-                level INTEGER DEFAULT 1,
-                total_meals_completed INTEGER DEFAULT 0,
-                streak_days INTEGER DEFAULT 0,
-                last_activity TIMESTAMP
-            )
-        """)
-        
-        # Leaderboard
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS leaderboard (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                username TEXT,
-                total_points INTEGER,
-                rank INTEGER,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
-        
-        # Initialize achievements
-        self.create_default_achievements()
-    
-    def create_default_achievements(self):
-        """Create default achievements"""
-        achievements = [
-            # Eating achievements
-            ("🥗 Veggie Lover", "Ate vegetables for 7 days straight", "🥗", 50, "Eating", "7_day_veggie_streak"),
-            ("🥛 Milk Master", "Drank milk every day for a week", "🥛", 30, "Eating", "7_day_milk"),
-            ("🍎 Fruit Fan", "Ate fruits 5 times this week", "🍎", 40, "Eating", "5_fruits_week"),
-            ("💪 Protein Power", "Met protein goals for 10 days", "💪", 60, "Eating", "10_day_protein"),
-            ("🌟 Balanced Eater", "Completed all meals for a month", "🌟", 100, "Eating", "30_day_complete"),
-            
-            # Growth achievements
-            ("📈 Growing Strong", "Gained healthy weight this month", "📈", 70, "Growth", "weight_gain"),
-            ("📏 Height Hero", "Grew 2cm in 3 months", "📏", 80, "Growth", "height_growth"),
-            ("💚 Healthy BMI", "Maintained healthy BMI for 3 months", "💚", 90, "Growth", "healthy_bmi"),
-            
-            # Worker achievements
-            ("👨‍🍳 Master Chef", "Prepared 100 meals", "👨‍🍳", 120, "Worker", "100_meals"),
-            ("📊 Data Wizard", "Logged 50 meal plans", "📊", 80, "Worker", "50_plans"),
-            ("⭐ 5-Star Rating", "Got 5-star feedback 10 times", "⭐", 150, "Worker", "10_five_stars"),
-            ("🎯 Zero Waste", "Achieved zero food waste for a week", "🎯", 100, "Worker", "zero_waste_week"),
-            
-            # Community achievements
-            ("🤝 Helper", "Helped other Anganwadis 5 times", "🤝", 60, "Community", "help_5_times"),
-            ("🌍 Eco Warrior", "Reduced waste by 50%", "🌍", 110, "Community", "waste_reduction"),
-            ("🏆 Champion", "Top of leaderboard for a month", "🏆", 200, "Community", "leaderboard_top"),
-        ]
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for ach in achievements:
-            cursor.execute("""
-                INSERT OR IGNORE INTO achievements 
-                (name, description, icon, points, category, requirement)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, ach)
-        
-        conn.commit()
-        conn.close()
+        # Tables and default achievements come from migration 001
+        migrate(self.db_path)
     
     def award_points(self, user_id, points, reason):
         """Award points to user"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # Get current points
@@ -175,7 +105,7 @@ class NutritionGamification:
     
     def unlock_achievement(self, user_id, achievement_id):
         """Unlock achievement for user"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # Check if already unlocked
@@ -222,7 +152,7 @@ class NutritionGamification:
     
     def get_leaderboard(self, limit=10, category='all'):
         """Get leaderboard rankings"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         query = """
@@ -255,7 +185,7 @@ class NutritionGamification:
     
     def get_user_stats(self, user_id):
         """Get comprehensive user statistics"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         # Get points and level
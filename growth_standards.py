@@ -0,0 +1,263 @@
+"""
+WHO Child Growth Standards
+Vectorized z-scores from the WHO 2006 LMS reference tables (0-5 years),
+continued by the WHO 2007 growth reference (5-19 years)
+
+The LMS tables (weight-for-age, length/height-for-age, weight-for-length,
+weight-for-height, BMI-for-age and arm-circumference-for-age, by sex) ship
+as NumPy arrays in data/who_growth_standards.npz and are loaded once, on
+first use. Age-based tables are indexed by age in days, length/height
+tables in 0.1 cm steps. Weight-for-age, height-for-age and BMI-for-age
+run to 1856 days (61 months), as in igrowup, and then continue in the
+monthly WHO 2007 tables (weight-for-age to 10 years, the others to 19),
+looked up by age in whole months. Every function takes arrays, so a
+whole village is screened in one call.
+
+Calculations follow the WHO igrowup macros:
+- recumbent length is used below 731 days and standing height from 731
+  days; a measurement taken the other way is adjusted by 0.7 cm
+- weight-for-length applies below 731 days, weight-for-height after
+- weight, BMI and MUAC z-scores beyond +/-3 use the restricted
+  (SD3-extrapolated) method; length/height-for-age does not
+- weight-based z-scores are not computed for children with oedema
+
+MUAC-for-age stops at 1826 days. WHO defines no weight-for-height or
+MUAC-for-age beyond 5 years, nor weight-for-age beyond 10, so those
+z-scores are NaN there (as they are for ages outside every table).
+Sources: https://www.who.int/tools/child-growth-standards/standards and
+https://www.who.int/tools/growth-reference-data-for-5to19-years
+test_all.py checks the results against the z-scores WHO's igrowup macro
+produced for its example survey (data/who_igrowup_survey_zscores.csv).
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'who_growth_standards.npz')
+
+# Indicator -> table axis ('age' in days, 'month' of age or 'height' in cm)
+INDICATORS = {
+    'wfa': 'age',
+    'lhfa': 'age',
+    'bfa': 'age',
+    'acfa': 'age',
+    'wfl': 'height',
+    'wfh': 'height',
+    'wfa_2007': 'month',
+    'lhfa_2007': 'month',
+    'bfa_2007': 'month'
+}
+
+# WHO 2007 (5-19 years) table continuing a 2006 age-based table
+REFERENCE_2007 = {
+    'wfa': 'wfa_2007',
+    'lhfa': 'lhfa_2007',
+    'bfa': 'bfa_2007'
+}
+
+# Age at which length gives way to standing height
+STANDING_HEIGHT_AGE_DAYS = 731
+# Oldest age scored for weight-for-length/height (61 months, as in igrowup)
+MAX_WEIGHT_FOR_HEIGHT_AGE_DAYS = 1856
+DAYS_PER_MONTH = 30.4375
+
+# WHO flags for biologically implausible z-scores: (low, high)
+IMPLAUSIBLE_LIMITS = {
+    'waz': (-6, 5),
+    'haz': (-6, 6),
+    'whz': (-5, 5),
+    'baz': (-5, 5),
+    'muacz': (-5, 5)
+}
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def load_tables():
+    """LMS arrays keyed by indicator: {'lms': (2, n, 3) [sex, row, L/M/S], 'start', 'step'}"""
+    global _tables
+    if _tables is None:
+        with _tables_lock:
+            if _tables is None:
+                with np.load(TABLES_PATH) as data:
+                    _tables = {
+                        indicator: {
+                            'lms': data[f'{indicator}_lms'],
+                            'start': float(data[f'{indicator}_axis'][0]),
+                            'step': float(data[f'{indicator}_axis'][1])
+                        }
+                        for indicator in INDICATORS
+                    }
+    return _tables
+
+
+def sex_index(sex):
+    """Map sexes ('male'/'female', 'M'/'F', 1/2) to 0 (male), 1 (female) or -1 (unknown)"""
+    codes = pd.Series(sex, dtype=object).astype(str).str.strip().str.lower()
+    index = np.full(len(codes), -1)
+    index[codes.isin(['m', 'male', 'boy', '1']).to_numpy()] = 0
+    index[codes.isin(['f', 'female', 'girl', '2']).to_numpy()] = 1
+    return index
+
+
+def lookup_lms(indicator, sex, x):
+    """
+    L, M, S arrays for each (sex, x) pair
+
+    Ages are rounded to whole days (whole months in the WHO 2007 tables,
+    which take over past the end of a 2006 table). Lengths/heights between
+    two 0.1 cm rows are interpolated linearly. Anything outside the tables
+    gives NaN.
+    """
+    L, M, S = _lookup_table(indicator, sex, x)
+    if indicator in REFERENCE_2007:
+        table = load_tables()[indicator]
+        x = np.asarray(x, dtype=float)
+        older = np.floor(x + 0.5) > table['start'] + table['step'] * (table['lms'].shape[1] - 1)
+        if older.any():
+            older_lms = _lookup_table(REFERENCE_2007[indicator], np.asarray(sex)[older], x[older] / DAYS_PER_MONTH)
+            for values, older_values in zip((L, M, S), older_lms):
+                values[older] = older_values
+    return L, M, S
+
+
+def _lookup_table(indicator, sex, x):
+    """L, M, S arrays from one table; NaN outside it"""
+    table = load_tables()[indicator]
+    lms, start, step = table['lms'], table['start'], table['step']
+    sex = np.asarray(sex)
+    x = np.asarray(x, dtype=float)
+    result = np.full((len(x), 3), np.nan)
+
+    position = (x - start) / step
+    if INDICATORS[indicator] in ('age', 'month'):
+        position = np.floor(position + 0.5)
+    valid = (sex >= 0) & (position >= 0) & (position <= lms.shape[1] - 1)
+    if not valid.any():
+        return result[:, 0], result[:, 1], result[:, 2]
+
+    # Round first so 0.1 cm steps don't land a hair below a table row
+    position = np.round(position[valid], 6)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, lms.shape[1] - 1)
+    fraction = (position - lower)[:, None]
+    rows = sex[valid]
+    result[valid] = lms[rows, lower] * (1 - fraction) + lms[rows, upper] * fraction
+    return result[:, 0], result[:, 1], result[:, 2]
+
+
+def lms_zscore(y, L, M, S, restricted=True):
+    """
+    Z-scores of measurements y against LMS parameters
+
+    With restricted=True, values beyond +/-3 SD are scored by linear
+    extrapolation of the SD2-SD3 distance, as in the WHO standards.
+    """
+    y, L, M, S = (np.asarray(a, dtype=float) for a in (y, L, M, S))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        box_cox = np.abs(L) > 1e-12
+        z = np.where(box_cox, ((y / M) ** L - 1) / (L * S), np.log(y / M) / S)
+
+        if restricted:
+            def sd(k):
+                return np.where(box_cox, M * (1 + L * S * k) ** (1 / L), M * np.exp(S * k))
+
+            sd3_pos, sd2_pos = sd(3), sd(2)
+            sd3_neg, sd2_neg = sd(-3), sd(-2)
+            z = np.where(z > 3, 3 + (y - sd3_pos) / (sd3_pos - sd2_pos), z)
+            z = np.where(z < -3, -3 + (y - sd3_neg) / (sd2_neg - sd3_neg), z)
+    return z
+
+
+def _indicator_zscore(indicator, sex, x, y, restricted=True):
+    """Look up LMS for x and score y against it"""
+    L, M, S = lookup_lms(indicator, sex, x)
+    return lms_zscore(y, L, M, S, restricted=restricted)
+
+
+def calculate_zscores(age_days, sex, weight_kg=None, height_cm=None, muac_cm=None,
+                      measured_lying=None, oedema=None):
+    """
+    WHO z-scores for many children at once
+
+    Args:
+        age_days: Age at measurement in days (use age_in_days() for dates)
+        sex: 'male'/'female', 'M'/'F' or 1/2
+        weight_kg, height_cm, muac_cm: Measurements (None or NaN where missing)
+        measured_lying: True for recumbent length, False for standing height;
+            None assumes the WHO convention for the child's age
+        oedema: True where bilateral pitting oedema was observed
+
+    Returns:
+        DataFrame with age_days, height_cm (adjusted), bmi, waz (weight-for-age),
+        haz (length/height-for-age), whz (weight-for-length/height), baz
+        (BMI-for-age), muacz (MUAC-for-age) and an implausible flag per z-score
+    """
+    age_days = np.floor(np.asarray(age_days, dtype=float) + 0.5)
+    n = len(age_days)
+    sex = sex_index(sex if not np.isscalar(sex) else [sex] * n)
+
+    def column(values):
+        if values is None:
+            return np.full(n, np.nan)
+        return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+
+    weight = column(weight_kg)
+    height = column(height_cm)
+    muac = column(muac_cm)
+    under_two = age_days < STANDING_HEIGHT_AGE_DAYS
+
+    # Convert standing height to length (and back) when measured the other way
+    if measured_lying is not None:
+        lying = pd.Series(measured_lying, dtype=object).map(
+            lambda v: bool(v) if v is not None and v == v else np.nan
+        ).to_numpy()
+        height = np.where((lying == False) & under_two, height + 0.7, height)  # noqa: E712
+        height = np.where((lying == True) & ~under_two, height - 0.7, height)  # noqa: E712
+
+    # No weight-based scores with oedema (weight is not meaningful)
+    if oedema is not None:
+        has_oedema = pd.Series(oedema, dtype=object).map(
+            lambda v: str(v).strip().lower() in ('1', 'y', 'yes', 'true')
+        ).to_numpy()
+        weight = np.where(has_oedema, np.nan, weight)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bmi = weight / (height / 100) ** 2
+
+    whz = np.where(
+        under_two,
+        _indicator_zscore('wfl', sex, height, weight),
+        _indicator_zscore('wfh', sex, height, weight)
+    )
+    whz = np.where(age_days > MAX_WEIGHT_FOR_HEIGHT_AGE_DAYS, np.nan, whz)
+    scores = pd.DataFrame({
+        'age_days': age_days,
+        'height_cm': height,
+        'bmi': bmi,
+        'waz': _indicator_zscore('wfa', sex, age_days, weight),
+        'haz': _indicator_zscore('lhfa', sex, age_days, height, restricted=False),
+        'whz': whz,
+        'baz': _indicator_zscore('bfa', sex, age_days, bmi),
+        'muacz': _indicator_zscore('acfa', sex, age_days, muac)
+    })
+
+    for z, (low, high) in IMPLAUSIBLE_LIMITS.items():
+        scores[f'{z}_implausible'] = (scores[z] < low) | (scores[z] > high)
+    return scores
+
+
+def age_in_days(date_of_birth, measurement_date):
+    """Whole days between birth and measurement for date-like arrays"""
+    born = pd.to_datetime(pd.Series(date_of_birth))
+    measured = pd.to_datetime(pd.Series(measurement_date))
+    return (measured.to_numpy() - born.to_numpy()).astype('timedelta64[D]').astype(float)
+
+
+def age_months_to_days(age_months):
+    """Convert ages in (fractional) months to days as the WHO tables count them"""
+    return np.floor(np.asarray(age_months, dtype=float) * DAYS_PER_MONTH + 0.5)
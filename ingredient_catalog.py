@@ -0,0 +1,93 @@
+"""
+Ingredient Catalog
+Keeps the ingredients table in memory and reloads it only when it changes
+
+Triggers on the ingredients table bump the 'ingredients' data version (see
+migrations.migration_001), so checking for changes is a single-row
+lookup instead of re-reading the whole table into pandas on every request.
+"""
+
+import threading
+
+import database as db
+from meal_optimizer import NUTRIENT_COLUMNS, NUTRIENTS
+
+
+class CatalogSnapshot:
+    """One loaded version of the ingredients table (treat as read-only)"""
+
+    def __init__(self, version, dataframe):
+        self.version = version
+        self.dataframe = dataframe.reset_index(drop=True)
+
+        # Rows: ingredients in dataframe order, columns: NUTRIENTS (per 100g)
+        self.nutrient_matrix = self.dataframe[
+            list(NUTRIENT_COLUMNS.values())
+        ].fillna(0).to_numpy(dtype=float)
+        self.nutrient_matrix.flags.writeable = False
+
+        self.name_index = {name: pos for pos, name in enumerate(self.dataframe['name'])}
+        self.category_index = self.dataframe.groupby('category')['name'].apply(list).to_dict()
+
+    def get(self, name):
+        """Row for one ingredient as a dict, or None"""
+        pos = self.name_index.get(name)
+        return None if pos is None else self.dataframe.iloc[pos].to_dict()
+
+    def rows(self, names):
+        """DataFrame of the named ingredients (unknown names are skipped)"""
+        positions = [self.name_index[name] for name in names if name in self.name_index]
+        return self.dataframe.iloc[positions]
+
+    def nutrients(self, name):
+        """Per-100g nutrient values for one ingredient, keyed by NUTRIENTS"""
+        return dict(zip(NUTRIENTS, self.nutrient_matrix[self.name_index[name]]))
+
+
+class IngredientCatalog:
+    """Ingredient table loaded once and reloaded when its data version changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.loads = 0
+
+    def snapshot(self):
+        """Current CatalogSnapshot, reloading first if the table has changed"""
+        # Read the version before the data, so a concurrent change can only
+        # make us reload once more, never serve stale rows as current
+        version = db.get_data_version('ingredients')
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = CatalogSnapshot(version, db.get_all_ingredients())
+                self.loads += 1
+            return self._snapshot
+
+    def invalidate(self):
+        """Force a reload on next access"""
+        with self._lock:
+            self._snapshot = None
+
+    @property
+    def dataframe(self):
+        return self.snapshot().dataframe
+
+    @property
+    def nutrient_matrix(self):
+        return self.snapshot().nutrient_matrix
+
+    @property
+    def name_index(self):
+        return self.snapshot().name_index
+
+    @property
+    def category_index(self):
+        return self.snapshot().category_index
+
+
+# Shared instance used by the web app
+catalog = IngredientCatalog()
@@ -0,0 +1,100 @@
+"""
+Background Job Queue
+Runs slow work (e.g. meal plan generation) outside the request that asked for it
+
+Jobs are rows in the SQLite jobs table, so there is no external broker and
+any process sharing the database can report on them. Each process that
+calls start() runs a few worker threads which claim queued jobs, call the
+registered handler and store its result, error and progress.
+"""
+
+import threading
+import traceback
+import uuid
+
+import database as db
+import db_pool
+
+
+class JobQueue:
+    """SQLite-backed job queue with in-process worker threads"""
+
+    def __init__(self, num_workers=2, poll_interval=1.0):
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self._handlers = {}
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def register(self, job_type, handler):
+        """
+        Register the function that runs jobs of job_type
+
+        The handler is called as handler(params, progress) where progress is
+        a callable(done, total) and its return value (JSON-serializable) is
+        stored as the job result.
+        """
+        self._handlers[job_type] = handler
+
+    def submit(self, job_type, params, total=0):
+        """Queue a job and return its id"""
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+
+        job_id = uuid.uuid4().hex
+        db.create_job(job_id, job_type, params, total)
+        self._wakeup.set()
+        return job_id
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        if self._threads:
+            return
+
+        db.requeue_stale_jobs()
+        self._stopping.clear()
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Ask the workers to exit once their current job is finished"""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run_job(self, job):
+        """Run one claimed job and record its outcome"""
+        handler = self._handlers.get(job['job_type'])
+        if handler is None:
+            db.finish_job(job['id'], error=f"Unknown job type '{job['job_type']}'")
+            return
+
+        def progress(done, total):
+            db.update_job_progress(job['id'], done, total)
+
+        try:
+            result = handler(job['params'], progress)
+        except Exception as e:
+            traceback.print_exc()
+            # Roll back whatever the handler left uncommitted
+            db_pool.release_thread()
+            db.finish_job(job['id'], error=str(e))
+        else:
+            db.finish_job(job['id'], result=result)
+
+    def _worker(self):
+        """Claim and run jobs until stop() is called"""
+        while not self._stopping.is_set():
+            job = db.claim_next_job()
+            if job is None:
+                # Sleep until a job is submitted here, or poll for jobs
+                # queued by other processes
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self.run_job(job)
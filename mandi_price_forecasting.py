@@ -14,11 +14,14 @@ Uses ARIMA & Moving Average for forecasting
 
 import pandas as pd
 import numpy as np
-import sqlite3
 from datetime import datetime, timedelta
 import json
 from typing import Dict, List, Optional, Tuple
 
+from database import PRICE_HISTORY_SQL
+from db_pool import get_connection
+from migrations import migrate
+
 class MandiPriceForecaster:
     """Forecasts mandi prices using time series analysis"""
     
@@ -27,56 +30,14 @@ class MandiPriceForecaster:
         self._ensure_tables()
     
     def _ensure_tables(self):
-        """Create tables for storing forecasts"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS price_forecasts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ingredient_name TEXT NOT NULL,
-                forecast_date DATE NOT NULL,
-                predicted_price REAL NOT NULL,
-                confidence_lower REAL,
-                confidence_upper REAL,
-                confidence_level TEXT,
-                trend TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(ingredient_name, forecast_date)
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS budget_alerts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ingredient_name TEXT NOT NULL,
-                alert_type TEXT NOT NULL,
-                message TEXT NOT NULL,
-                severity TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+        """Make sure food_prices and the forecast tables exist (see migrations.py)"""
+        migrate(self.db_path)
     
     def get_historical_prices(self, ingredient_name: str, days_back: int = 90) -> pd.DataFrame:
         """Fetch historical price data for analysis"""
-        conn = sqlite3.connect(self.db_path)
-        
-        query = """
-            SELECT 
-                recorded_date as date,
-                price_per_kg as price,
-                village,
-                source
-            FROM food_prices 
-            WHERE ingredient_name = ?
-            AND recorded_date >= date('now', '-' || ? || ' days')
-            ORDER BY recorded_date
-        """
+        conn = get_connection(self.db_path)
         
-        df = pd.read_sql_query(query, conn, params=(ingredient_name, days_back))
+        df = pd.read_sql_query(PRICE_HISTORY_SQL, conn, params=(ingredient_name, days_back))
         conn.close()
         
         if len(df) > 0:
@@ -230,7 +191,7 @@ class MandiPriceForecaster:
     
     def _save_forecast(self, ingredient_name: str, forecast_data: List[Dict], confidence: str, trend: str):
         """Save forecast to database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         cursor = conn.cursor()
         
         for item in forecast_data:
@@ -337,7 +298,7 @@ def demo_price_forecasting():
     print("=" * 60)
     
     # Add some sample historical data for testing
-    conn = sqlite3.connect('nutrition_advisor.db')
+    conn = get_connection('nutrition_advisor.db')
     cursor = conn.cursor()
     
     # Check if price data exists
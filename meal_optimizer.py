@@ -7,11 +7,239 @@ import pandas as pd
 import numpy as np
 from pulp import *
 import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
 
+# In-process HiGHS solver is optional
+try:
+    import highspy
+    HIGHS_AVAILABLE = True
+    
+    # HiGHS model status -> PuLP LpStatus
+    HIGHS_LP_STATUS = {
+        highspy.HighsModelStatus.kOptimal: LpStatusOptimal,
+        highspy.HighsModelStatus.kInfeasible: LpStatusInfeasible,
+        highspy.HighsModelStatus.kUnboundedOrInfeasible: LpStatusInfeasible,
+        highspy.HighsModelStatus.kUnbounded: LpStatusUnbounded
+    }
+except ImportError:
+    HIGHS_AVAILABLE = False
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MEALS = ['breakfast', 'lunch', 'snack', 'dinner']
+
+# Meal-specific ingredient preferences
+MEAL_PREFERENCES = {
+    'breakfast': ['Grains', 'Dairy', 'Fruits'],
+    'lunch': ['Grains', 'Pulses', 'Vegetables', 'Dairy'],
+    'snack': ['Fruits', 'Dairy', 'Grains'],
+    'dinner': ['Grains', 'Pulses', 'Vegetables']
+}
+
+# Candidates offered to a single meal in per-meal mode (see _generate_meal)
+MEAL_SAMPLE_SIZE = 12
+MAX_QTY_PER_MEAL_G = 200
+
+# Nutrient name -> ingredients table column (values per 100g)
+NUTRIENT_COLUMNS = {
+    'calories': 'calories_per_100g',
+    'protein': 'protein_per_100g',
+    'carbs': 'carbs_per_100g',
+    'fat': 'fat_per_100g',
+    'fiber': 'fiber_per_100g',
+    'iron': 'iron_per_100g',
+    'calcium': 'calcium_per_100g'
+}
+NUTRIENTS = list(NUTRIENT_COLUMNS.keys())
+
+# Objective weights: maximize protein (weighted more) + fiber + iron + calcium
+OBJECTIVE_WEIGHTS = {
+    'protein': 2,
+    'fiber': 1,
+    'iron': 0.5,
+    'calcium': 0.01
+}
+
+class CBCSolver:
+    """Solve with PuLP's bundled CBC binary (writes a model file and forks CBC per solve)"""
+    
+    def __init__(self, optimizer):
+        self.optimizer = optimizer
+    
+    def solve_meal(self, positions, meal_type, meal_budget):
+        """Solve one meal slot, returning quantities (g per child) aligned with positions"""
+        prob, ingredient_vars = self.optimizer._build_meal_model(positions, meal_type, meal_budget)
+        self.solve_problem(prob)
+        return [qty.varValue for qty in ingredient_vars]
+    
+    def solve_problem(self, prob):
+        """Solve a PuLP problem in place (sets varValue on its variables), returning its LpStatus"""
+        return prob.solve(PULP_CBC_CMD(msg=0))
+
+
+class HighsSolver:
+    """
+    Solve in-process with HiGHS (highspy), without temp files or subprocesses
+    
+    Per-meal solves share one LP whose columns are the optimizer's whole
+    ingredient catalog and whose rows (budget, calories) never change. Each
+    meal slot only changes column and row bounds, so HiGHS re-solves from
+    the previous slot's basis instead of starting from scratch.
+    """
+    
+    def __init__(self, optimizer):
+        if not HIGHS_AVAILABLE:
+            raise ImportError("HiGHS solver needs highspy. Run: pip install highspy")
+        self.optimizer = optimizer
+        self._highs = None
+    
+    def _new_highs(self):
+        highs = highspy.Highs()
+        highs.setOptionValue('output_flag', False)
+        return highs
+    
+    def _load_meal_model(self):
+        """Pass the shared meal LP (all catalog columns, budget + calorie rows) to HiGHS"""
+        opt = self.optimizer
+        num_col = len(opt._names)
+        
+        lp = highspy.HighsLp()
+        lp.num_col_ = num_col
+        lp.num_row_ = 2
+        lp.sense_ = highspy.ObjSense.kMaximize
+        lp.col_cost_ = opt._objective_per_g
+        lp.col_lower_ = np.zeros(num_col)
+        lp.col_upper_ = np.zeros(num_col)
+        lp.row_lower_ = np.array([-highspy.kHighsInf, 0.0])
+        lp.row_upper_ = np.array([highspy.kHighsInf, highspy.kHighsInf])
+        
+        # Row 0: budget, row 1: calories
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = np.array([0, num_col, 2 * num_col], dtype=np.int32)
+        lp.a_matrix_.index_ = np.tile(np.arange(num_col, dtype=np.int32), 2)
+        lp.a_matrix_.value_ = np.concatenate([opt._cost_per_g * opt.num_children, opt._calories_per_g])
+        
+        self._highs = self._new_highs()
+        self._highs.passModel(lp)
+        self._col_index = np.arange(num_col, dtype=np.int32)
+        self._row_index = np.array([0, 1], dtype=np.int32)
+    
+    def solve_meal(self, positions, meal_type, meal_budget):
+        """Solve one meal slot, returning quantities (g per child) aligned with positions"""
+        opt = self.optimizer
+        if self._highs is None:
+            self._load_meal_model()
+        
+        # Only this slot's candidates may be used
+        upper = np.zeros(len(self._col_index))
+        upper[positions] = MAX_QTY_PER_MEAL_G
+        self._highs.changeColsBounds(len(self._col_index), self._col_index, np.zeros(len(upper)), upper)
+        
+        target_calories = opt.daily_requirements['calories'] * opt.meal_distribution[meal_type]
+        self._highs.changeRowsBounds(
+            2, self._row_index,
+            np.array([-highspy.kHighsInf, target_calories * 0.8]),
+            np.array([meal_budget, target_calories * 1.3])
+        )
+        
+        self._highs.run()
+        return self._column_values(upper)[positions]
+    
+    def solve_problem(self, prob):
+        """Solve a PuLP problem in place (sets varValue on its variables), returning its LpStatus"""
+        variables = prob.variables()
+        column = {var.name: i for i, var in enumerate(variables)}
+        inf = highspy.kHighsInf
+        
+        highs = self._new_highs()
+        highs.addVars(
+            len(variables),
+            np.array([-inf if var.lowBound is None else var.lowBound for var in variables], dtype=float),
+            np.array([inf if var.upBound is None else var.upBound for var in variables], dtype=float)
+        )
+        
+        objective = prob.objective or LpAffineExpression()
+        highs.changeColsCost(
+            len(objective),
+            np.array([column[var.name] for var in objective], dtype=np.int32),
+            np.array(list(objective.values()), dtype=float)
+        )
+        highs.changeObjectiveSense(
+            highspy.ObjSense.kMaximize if prob.sense == LpMaximize else highspy.ObjSense.kMinimize
+        )
+        
+        integers = [i for i, var in enumerate(variables) if var.cat == LpInteger]
+        if integers:
+            highs.changeColsIntegrality(
+                len(integers),
+                np.array(integers, dtype=np.int32),
+                np.array([highspy.HighsVarType.kInteger] * len(integers))
+            )
+        
+        # LpConstraint holds "expression + constant <sense> 0"
+        for constraint in prob.constraints.values():
+            rhs = -constraint.constant
+            lower = rhs if constraint.sense in (LpConstraintGE, LpConstraintEQ) else -inf
+            upper = rhs if constraint.sense in (LpConstraintLE, LpConstraintEQ) else inf
+            highs.addRow(
+                lower, upper, len(constraint),
+                np.array([column[var.name] for var in constraint], dtype=np.int32),
+                np.array(list(constraint.values()), dtype=float)
+            )
+        
+        highs.run()
+        
+        upper = np.array([inf if var.upBound is None else var.upBound for var in variables], dtype=float)
+        for var, value in zip(variables, self._column_values(upper, highs)):
+            var.varValue = value
+        
+        prob.status = HIGHS_LP_STATUS.get(highs.getModelStatus(), LpStatusNotSolved)
+        return prob.status
+    
+    def _column_values(self, upper, highs=None):
+        """Primal values, clipped to the column bounds if no optimum was found"""
+        highs = highs or self._highs
+        values = np.array(highs.getSolution().col_value, dtype=float)
+        if len(values) == 0:
+            return np.zeros(len(upper))
+        if highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            values = np.clip(values, 0, upper)
+        return values
+
+
+SOLVER_BACKENDS = {
+    'cbc': CBCSolver,
+    'highs': HighsSolver
+}
+
+# Ingredient table shared by batch worker processes (set by _init_batch_worker)
+_batch_ingredients_df = None
+
+def _init_batch_worker(ingredients_df):
+    """Process pool initializer: receive the ingredient table once per worker"""
+    global _batch_ingredients_df
+    _batch_ingredients_df = ingredients_df
+
+def _generate_plan_for_config(config):
+    """Generate one plan in a worker process (see MealOptimizer.generate_batch)"""
+    optimizer = MealOptimizer(
+        _batch_ingredients_df,
+        budget=config['budget'],
+        num_children=config['num_children'],
+        age_group=config.get('age_group', '3-6 years'),
+        solver=config.get('solver', 'cbc')
+    )
+    return optimizer.generate_meal_plan(
+        config.get('ingredients') or None,
+        whole_week=config.get('whole_week', False)
+    )
+
 class MealOptimizer:
-    def __init__(self, ingredients_df, budget, num_children, age_group="3-6 years"):
-        self.ingredients_df = ingredients_df
+    def __init__(self, ingredients_df, budget, num_children, age_group="3-6 years", solver="cbc"):
+        # Positional index so row labels double as offsets into the coefficient arrays
+        self.ingredients_df = ingredients_df.reset_index(drop=True)
         self.budget = budget
         self.num_children = num_children
         self.age_group = age_group
@@ -27,6 +255,69 @@ class MealOptimizer:
             'dinner': 0.25
         }
         
+        self._build_coefficients()
+        
+        # LP solver backend (see SOLVER_BACKENDS)
+        if solver not in SOLVER_BACKENDS:
+            raise ValueError(f"Unknown solver '{solver}'. Choose from: {', '.join(SOLVER_BACKENDS)}")
+        self.solver = SOLVER_BACKENDS[solver](self)
+        
+    @classmethod
+    def generate_batch(cls, ingredients_df, configs, max_workers=None):
+        """
+        Generate meal plans for many centre configs across a process pool
+        
+        Args:
+            ingredients_df: Ingredient table shared by all configs
+            configs: List of dicts with 'budget', 'num_children' and optional
+                'age_group', 'ingredients', 'whole_week', 'solver'
+            max_workers: Worker processes (defaults to the CPU count)
+        
+        Yields:
+            (index into configs, meal_plan or None, error message or None)
+            in completion order, as each plan finishes
+        """
+        if not configs:
+            return
+        
+        max_workers = min(max_workers or os.cpu_count() or 1, len(configs))
+        # Spawned, not forked: callers (e.g. the web app) have live worker
+        # threads and pooled SQLite connections that must not be copied
+        pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_batch_worker,
+            initargs=(ingredients_df,)
+        )
+        try:
+            futures = {
+                pool.submit(_generate_plan_for_config, config): index
+                for index, config in enumerate(configs)
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, str(e)
+        finally:
+            # Don't keep solving if the caller stopped consuming results
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def _build_coefficients(self):
+        """Turn the ingredient table into per-gram NumPy coefficient arrays"""
+        df = self.ingredients_df
+        
+        self._names = df['name'].to_numpy()
+        self._categories = df['category'].to_numpy()
+        
+        # Rows: ingredients, columns: NUTRIENTS (per gram)
+        self._nutrient_matrix = df[list(NUTRIENT_COLUMNS.values())].fillna(0).to_numpy(dtype=float) / 100
+        self._calories_per_g = self._nutrient_matrix[:, NUTRIENTS.index('calories')]
+        self._cost_per_g = df['cost_per_kg'].fillna(0).to_numpy(dtype=float) / 1000
+        
+        weights = np.array([OBJECTIVE_WEIGHTS.get(nutrient, 0) for nutrient in NUTRIENTS])
+        self._objective_per_g = self._nutrient_matrix @ weights
+        
     def _get_daily_requirements(self):
         """Get daily nutritional requirements based on age group"""
         requirements = {
@@ -60,8 +351,18 @@ class MealOptimizer:
         }
         return requirements.get(self.age_group, requirements["3-6 years"])
     
-    def generate_meal_plan(self, selected_ingredients=None):
-        """Generate optimized weekly meal plan"""
+    def generate_meal_plan(self, selected_ingredients=None, whole_week=False,
+                           progress_callback=None):
+        """
+        Generate optimized weekly meal plan
+        
+        Args:
+            selected_ingredients: Ingredient names to plan with (all if None)
+            whole_week: Solve all 7 days x 4 meals as one model instead of
+                28 separate per-meal solves
+            progress_callback: Optional callable(days_done, total_days),
+                called as each day is planned
+        """
         if selected_ingredients:
             ingredients = self.ingredients_df[
                 self.ingredients_df['name'].isin(selected_ingredients)
@@ -72,10 +373,6 @@ class MealOptimizer:
         if len(ingredients) == 0:
             raise ValueError("No ingredients available for meal planning")
         
-        # Generate meal plan for 7 days
-        weekly_plan = {}
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        
         weekly_budget = self.budget
         daily_budget = weekly_budget / 7
         
@@ -91,14 +388,23 @@ class MealOptimizer:
         
         total_cost = 0
         
-        for day in days:
-            daily_plan = self._generate_daily_meal_plan(
-                ingredients, 
-                daily_budget,
-                variety_seed=days.index(day)
-            )
-            weekly_plan[day] = daily_plan
-            
+        # Generate meal plan for 7 days
+        if whole_week:
+            weekly_plan = self._generate_weekly_meal_plan(ingredients, daily_budget)
+            if progress_callback:
+                progress_callback(len(DAYS), len(DAYS))
+        else:
+            weekly_plan = {}
+            for day in DAYS:
+                weekly_plan[day] = self._generate_daily_meal_plan(
+                    ingredients, 
+                    daily_budget,
+                    variety_seed=DAYS.index(day)
+                )
+                if progress_callback:
+                    progress_callback(len(weekly_plan), len(DAYS))
+        
+        for daily_plan in weekly_plan.values():
             # Accumulate nutrition
             for nutrient in total_weekly_nutrition:
                 total_weekly_nutrition[nutrient] += daily_plan['total_nutrition'].get(nutrient, 0)
@@ -120,8 +426,20 @@ class MealOptimizer:
         """Generate optimized meal plan for one day"""
         np.random.seed(variety_seed)
         
-        meals = ['breakfast', 'lunch', 'snack', 'dinner']
         daily_meals = {}
+        for meal in MEALS:
+            meal_budget = daily_budget * self.meal_distribution[meal]
+            daily_meals[meal] = self._generate_meal(
+                ingredients, 
+                meal, 
+                meal_budget,
+                variety_seed
+            )
+        
+        return self._summarize_day(daily_meals)
+    
+    def _summarize_day(self, daily_meals):
+        """Total up nutrition and cost of one day's meals"""
         daily_nutrition = {
             'calories': 0,
             'protein': 0,
@@ -133,16 +451,7 @@ class MealOptimizer:
         }
         daily_cost = 0
         
-        for meal in meals:
-            meal_budget = daily_budget * self.meal_distribution[meal]
-            meal_plan = self._generate_meal(
-                ingredients, 
-                meal, 
-                meal_budget,
-                variety_seed
-            )
-            daily_meals[meal] = meal_plan
-            
+        for meal_plan in daily_meals.values():
             # Accumulate nutrition
             for nutrient in daily_nutrition:
                 daily_nutrition[nutrient] += meal_plan['nutrition'].get(nutrient, 0)
@@ -155,19 +464,101 @@ class MealOptimizer:
             'total_cost': daily_cost
         }
     
-    def _generate_meal(self, ingredients, meal_type, meal_budget, variety_seed):
-        """Generate a single meal using optimization"""
-        # Meal-specific ingredient preferences
-        meal_preferences = {
-            'breakfast': ['Grains', 'Dairy', 'Fruits'],
-            'lunch': ['Grains', 'Pulses', 'Vegetables', 'Dairy'],
-            'snack': ['Fruits', 'Dairy', 'Grains'],
-            'dinner': ['Grains', 'Pulses', 'Vegetables']
-        }
+    def _generate_weekly_meal_plan(self, ingredients, daily_budget):
+        """
+        Generate the whole week (7 days x 4 meals) from a single model
+        
+        Per-meal budget and calorie constraints are the same as in
+        _generate_meal. Instead of offering each meal a random sample of
+        ingredients, a variety constraint caps each ingredient's share of
+        the grams served in that meal over the week (max_days / 7), so no
+        single ingredient can fill the same meal every day. If the capped
+        model is infeasible it is re-solved without the cap.
+        
+        Raises:
+            ValueError: if no week meets the budget and calorie constraints
+        """
+        prob, candidates, quantity_vars = self._build_weekly_model(ingredients, daily_budget)
+        status = self.solver.solve_problem(prob)
+        if status != LpStatusOptimal:
+            prob, candidates, quantity_vars = self._build_weekly_model(
+                ingredients, daily_budget, variety=False
+            )
+            status = self.solver.solve_problem(prob)
+        if status != LpStatusOptimal:
+            raise ValueError(
+                f"No whole-week meal plan meets the calorie targets within a budget of "
+                f"₹{self.budget:.0f} ({LpStatus[status]})"
+            )
+        
+        weekly_plan = {}
+        for day in DAYS:
+            daily_meals = {}
+            for meal in MEALS:
+                quantities = [qty.varValue for qty in quantity_vars[(day, meal)]]
+                daily_meals[meal] = self._summarize_meal(candidates[meal], quantities)
+            weekly_plan[day] = self._summarize_day(daily_meals)
+        
+        return weekly_plan
+    
+    def _build_weekly_model(self, ingredients, daily_budget, variety=True):
+        """
+        Create the whole-week LP
+        
+        Returns:
+            (problem, candidate positions per meal, variables per (day, meal))
+        """
+        prob = LpProblem("Weekly_Meal_Optimization", LpMaximize)
         
-        preferred_categories = meal_preferences.get(meal_type, ['Grains', 'Pulses', 'Vegetables'])
+        candidates = {}
+        quantity_vars = {}
+        objective = []
+        
+        for meal in MEALS:
+            positions = self._get_meal_candidates(ingredients, meal).index.to_numpy()
+            candidates[meal] = positions
+            
+            meal_budget = daily_budget * self.meal_distribution[meal]
+            max_days = self._max_repeat_days(len(positions)) if variety else len(DAYS)
+            
+            for day in DAYS:
+                day_vars, constraints = self._build_meal_constraints(
+                    positions, meal, meal_budget, prefix=f"qty_{day}_{meal}"
+                )
+                quantity_vars[(day, meal)] = day_vars
+                for constraint in constraints:
+                    prob += constraint
+                objective.append(LpAffineExpression(zip(day_vars, self._objective_per_g[positions])))
+            
+            # Constraint: Variety - each ingredient at most max_days/7 of this meal's weekly grams
+            if max_days < len(DAYS):
+                meal_total = LpVariable(f"total_{meal}", lowBound=0)
+                prob += lpSum(quantity_vars[(day, meal)] for day in DAYS) == meal_total
+                for pos in range(len(positions)):
+                    prob += (
+                        lpSum(quantity_vars[(day, meal)][pos] for day in DAYS)
+                        <= meal_total * (max_days / len(DAYS))
+                    )
+        
+        prob += lpSum(objective)
+        return prob, candidates, quantity_vars
+    
+    def _max_repeat_days(self, num_candidates):
+        """
+        Days per week an ingredient may repeat in the same meal
+        
+        Mirrors per-meal mode, where each meal draws MEAL_SAMPLE_SIZE
+        candidates per day, so an ingredient is on offer on about
+        MEAL_SAMPLE_SIZE / num_candidates of the days.
+        """
+        if num_candidates <= MEAL_SAMPLE_SIZE:
+            return len(DAYS)
+        return max(2, int(np.ceil(len(DAYS) * MEAL_SAMPLE_SIZE / num_candidates)))
+    
+    def _get_meal_candidates(self, ingredients, meal_type):
+        """Filter ingredients by meal preference"""
+        preferred_categories = MEAL_PREFERENCES.get(meal_type, ['Grains', 'Pulses', 'Vegetables'])
         
-        # Filter ingredients by meal preference
         meal_ingredients = ingredients[
             ingredients['category'].isin(preferred_categories)
         ].copy()
@@ -175,105 +566,98 @@ class MealOptimizer:
         if len(meal_ingredients) == 0:
             meal_ingredients = ingredients.copy()
         
+        return meal_ingredients
+    
+    def _generate_meal(self, ingredients, meal_type, meal_budget, variety_seed):
+        """Generate a single meal using optimization"""
+        meal_ingredients = self._get_meal_candidates(ingredients, meal_type)
+        
         # Add some randomness for variety
         if len(meal_ingredients) > 5:
             meal_ingredients = meal_ingredients.sample(
-                min(12, len(meal_ingredients)), 
+                min(MEAL_SAMPLE_SIZE, len(meal_ingredients)), 
                 random_state=variety_seed
             )
         
-        # Create optimization problem
+        # Solve
+        positions = meal_ingredients.index.to_numpy()
+        quantities = self.solver.solve_meal(positions, meal_type, meal_budget)
+        return self._summarize_meal(positions, quantities)
+    
+    def _build_meal_model(self, positions, meal_type, meal_budget):
+        """Create the LP for one meal over the ingredients at the given row positions"""
         prob = LpProblem(f"Meal_Optimization_{meal_type}", LpMaximize)
         
-        # Decision variables: quantity in grams for each ingredient
-        ingredient_vars = {}
-        for idx, row in meal_ingredients.iterrows():
-            ingredient_vars[row['name']] = LpVariable(
-                f"qty_{row['name']}", 
-                lowBound=0, 
-                upBound=200  # Max 200g per ingredient per meal
-            )
+        ingredient_vars, constraints = self._build_meal_constraints(positions, meal_type, meal_budget)
         
         # Objective: Maximize nutritional value (protein + fiber + iron + calcium)
-        prob += lpSum([
-            ingredient_vars[row['name']] * (
-                row['protein_per_100g'] * 2 +  # Weight protein more
-                row['fiber_per_100g'] +
-                row['iron_per_100g'] * 0.5 +
-                row['calcium_per_100g'] * 0.01
-            ) / 100
-            for idx, row in meal_ingredients.iterrows()
-        ])
-        
-        # Constraint: Budget
-        prob += lpSum([
-            ingredient_vars[row['name']] * (row['cost_per_kg'] / 1000) * self.num_children
-            for idx, row in meal_ingredients.iterrows()
-        ]) <= meal_budget
-        
-        # Constraint: Minimum calories per meal per child
+        prob += LpAffineExpression(zip(ingredient_vars, self._objective_per_g[positions]))
+        for constraint in constraints:
+            prob += constraint
+        
+        return prob, ingredient_vars
+    
+    def _build_meal_constraints(self, positions, meal_type, meal_budget, prefix="qty"):
+        """
+        Create quantity variables and budget/calorie constraints for one meal
+        
+        Returns:
+            (variables aligned with positions, list of constraints)
+        """
+        # Decision variables: quantity in grams for each ingredient
+        ingredient_vars = [
+            LpVariable(f"{prefix}_{pos}", lowBound=0, upBound=MAX_QTY_PER_MEAL_G)
+            for pos in range(len(positions))
+        ]
+        
+        budget_coefs = self._cost_per_g[positions] * self.num_children
+        calories = LpAffineExpression(zip(ingredient_vars, self._calories_per_g[positions]))
         target_calories = self.daily_requirements['calories'] * self.meal_distribution[meal_type]
-        prob += lpSum([
-            ingredient_vars[row['name']] * row['calories_per_100g'] / 100
-            for idx, row in meal_ingredients.iterrows()
-        ]) >= target_calories * 0.8  # At least 80% of target
         
-        # Constraint: Maximum calories (don't overeat)
-        prob += lpSum([
-            ingredient_vars[row['name']] * row['calories_per_100g'] / 100
-            for idx, row in meal_ingredients.iterrows()
-        ]) <= target_calories * 1.3  # Max 130% of target
+        constraints = [
+            # Budget
+            LpAffineExpression(zip(ingredient_vars, budget_coefs)) <= meal_budget,
+            # At least 80% of target calories, at most 130% (don't overeat)
+            calories >= target_calories * 0.8,
+            calories <= target_calories * 1.3
+        ]
         
-        # Solve
-        prob.solve(PULP_CBC_CMD(msg=0))
+        return ingredient_vars, constraints
+    
+    def _summarize_meal(self, positions, quantities):
+        """Build the meal result (items, nutrition, cost) from solved quantities"""
+        qty = np.nan_to_num(np.array(quantities, dtype=float))
         
-        # Extract results
-        selected_items = []
-        meal_nutrition = {
-            'calories': 0,
-            'protein': 0,
-            'carbs': 0,
-            'fat': 0,
-            'fiber': 0,
-            'iron': 0,
-            'calcium': 0
-        }
-        meal_cost = 0
-        
-        for idx, row in meal_ingredients.iterrows():
-            qty = ingredient_vars[row['name']].varValue
-            if qty and qty > 5:  # Only include if quantity > 5g
-                qty_per_child = round(qty, 1)
-                cost = (row['cost_per_kg'] / 1000) * qty_per_child * self.num_children
-                
-                selected_items.append({
-                    'ingredient': row['name'],
-                    'category': row['category'],
-                    'quantity_per_child_g': qty_per_child,
-                    'total_quantity_g': qty_per_child * self.num_children,
-                    'cost': round(cost, 2)
-                })
-                
-                # Calculate nutrition (per child)
-                factor = qty_per_child / 100
-                meal_nutrition['calories'] += row['calories_per_100g'] * factor
-                meal_nutrition['protein'] += row['protein_per_100g'] * factor
-                meal_nutrition['carbs'] += row['carbs_per_100g'] * factor
-                meal_nutrition['fat'] += row['fat_per_100g'] * factor
-                meal_nutrition['fiber'] += row['fiber_per_100g'] * factor
-                meal_nutrition['iron'] += row['iron_per_100g'] * factor
-                meal_nutrition['calcium'] += row['calcium_per_100g'] * factor
-                
-                meal_cost += cost
-        
-        # Round nutrition values
-        for key in meal_nutrition:
-            meal_nutrition[key] = round(meal_nutrition[key], 2)
+        # Only include if quantity > 5g
+        selected = qty > 5
+        positions = np.asarray(positions)[selected]
+        qty_per_child = np.round(qty[selected], 1)
+        costs = self._cost_per_g[positions] * qty_per_child * self.num_children
+        
+        selected_items = [
+            {
+                'ingredient': name,
+                'category': category,
+                'quantity_per_child_g': q,
+                'total_quantity_g': q * self.num_children,
+                'cost': round(cost, 2)
+            }
+            for name, category, q, cost in zip(
+                self._names[positions].tolist(),
+                self._categories[positions].tolist(),
+                qty_per_child.tolist(),
+                costs.tolist()
+            )
+        ]
+        
+        # Calculate nutrition (per child)
+        nutrition = qty_per_child @ self._nutrient_matrix[positions]
+        meal_nutrition = dict(zip(NUTRIENTS, np.round(nutrition, 2).tolist()))
         
         return {
             'items': selected_items,
             'nutrition': meal_nutrition,
-            'cost': round(meal_cost, 2)
+            'cost': round(float(costs.sum()), 2)
         }
     
     def _calculate_nutrition_score(self, weekly_nutrition):
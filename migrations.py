@@ -0,0 +1,526 @@
+"""
+Schema Migrations
+Numbered schema changes applied once per database, tracked in schema_version
+
+Startup calls migrate(), which is a single version lookup once a database
+is up to date, instead of re-running every CREATE TABLE and sample-data
+check in each process. To change the schema, add a migration to the end
+of MIGRATIONS; never edit one that has already shipped.
+
+Migration 001 is the schema as it was before versioning. It uses IF NOT
+EXISTS and only seeds empty tables, so it is safe to apply to databases
+created by the old initialize_database().
+
+Run directly to migrate a database and print its version:
+    python migrations.py [path/to/database.db]
+"""
+
+import sqlite3
+import sys
+
+from db_pool import get_connection
+
+
+def migration_001(conn):
+    """Initial schema: core tables, job queue, risk snapshots, mandi forecasts, gamification"""
+    import database as db
+    from gamification_system import DEFAULT_ACHIEVEMENTS
+    
+    cursor = conn.cursor()
+    
+    # Create ingredients table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ingredients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            category TEXT NOT NULL,
+            cost_per_kg REAL NOT NULL,
+            protein_per_100g REAL,
+            carbs_per_100g REAL,
+            fat_per_100g REAL,
+            calories_per_100g REAL,
+            fiber_per_100g REAL,
+            iron_per_100g REAL,
+            calcium_per_100g REAL,
+            serving_size_g REAL DEFAULT 100,
+            is_vegetarian INTEGER DEFAULT 1,
+            is_vegan INTEGER DEFAULT 0,
+            allergens TEXT,
+            dietary_tags TEXT
+        )
+    """)
+    
+    # Create meal_plans table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meal_plans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            plan_name TEXT,
+            budget REAL,
+            num_children INTEGER,
+            age_group TEXT,
+            total_cost REAL,
+            nutrition_score REAL,
+            plan_data TEXT,
+            input_hash TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Databases created before plan caching lack the input_hash column
+    cursor.execute("PRAGMA table_info(meal_plans)")
+    if 'input_hash' not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE meal_plans ADD COLUMN input_hash TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_meal_plans_input_hash ON meal_plans(input_hash)")
+    
+    # Create feedback table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS meal_feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            plan_id INTEGER,
+            rating INTEGER,
+            comments TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (plan_id) REFERENCES meal_plans(id)
+        )
+    """)
+    
+    # Create children table for immunisation tracking
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS children (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            date_of_birth DATE NOT NULL,
+            gender TEXT,
+            parent_name TEXT,
+            phone_number TEXT,
+            address TEXT,
+            village TEXT,
+            health_notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create immunisation schedule table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS immunisation_schedule (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            child_id INTEGER,
+            vaccine_name TEXT NOT NULL,
+            due_date DATE NOT NULL,
+            administered_date DATE,
+            status TEXT DEFAULT 'Pending',
+            notes TEXT,
+            reminder_sent INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (child_id) REFERENCES children(id)
+        )
+    """)
+    
+    # Create health information table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS health_information (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            disease_name TEXT NOT NULL,
+            category TEXT,
+            symptoms TEXT,
+            prevention TEXT,
+            treatment TEXT,
+            precautions TEXT,
+            age_group TEXT,
+            severity TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create growth tracking table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS growth_tracking (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            child_id INTEGER NOT NULL,
+            measurement_date DATE NOT NULL,
+            weight_kg REAL NOT NULL,
+            height_cm REAL NOT NULL,
+            bmi REAL,
+            head_circumference_cm REAL,
+            muac_cm REAL,
+            notes TEXT,
+            measured_by TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (child_id) REFERENCES children(id)
+        )
+    """)
+    
+    # Create dietary preferences table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dietary_preferences (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            child_id INTEGER NOT NULL,
+            is_vegetarian INTEGER DEFAULT 0,
+            is_vegan INTEGER DEFAULT 0,
+            is_halal INTEGER DEFAULT 0,
+            is_kosher INTEGER DEFAULT 0,
+            allergies TEXT,
+            food_dislikes TEXT,
+            medical_restrictions TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (child_id) REFERENCES children(id)
+        )
+    """)
+    
+    # Data version counters, bumped by triggers so caches can tell when data changed
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('ingredients', 0)")
+    
+    bump_ingredients_version = "UPDATE data_versions SET version = version + 1 WHERE name = 'ingredients';"
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS ingredients_version_insert AFTER INSERT ON ingredients
+        BEGIN {bump_ingredients_version} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS ingredients_version_delete AFTER DELETE ON ingredients
+        BEGIN {bump_ingredients_version} END
+    """)
+    # Any column change counts, since the in-memory catalog holds whole rows
+    # (older databases had this trigger on the optimizer columns only)
+    cursor.execute("DROP TRIGGER IF EXISTS ingredients_version_update")
+    cursor.execute(f"""
+        CREATE TRIGGER ingredients_version_update AFTER UPDATE ON ingredients
+        BEGIN {bump_ingredients_version} END
+    """)
+    
+    # Background job queue (see job_queue.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            job_type TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            params TEXT,
+            progress INTEGER DEFAULT 0,
+            total INTEGER DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+    
+    # Population malnutrition screenings (see PredictiveAnalytics.screen_malnutrition_risk)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS risk_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            screening_id TEXT NOT NULL,
+            child_id INTEGER NOT NULL,
+            risk_level TEXT NOT NULL,
+            risk_score INTEGER,
+            confidence INTEGER,
+            reasons TEXT,
+            measurements INTEGER,
+            weight_trend REAL,
+            height_trend REAL,
+            bmi_current REAL,
+            last_measurement_date DATE,
+            screened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (child_id) REFERENCES children(id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_risk_snapshots_screening ON risk_snapshots(screening_id, risk_score)")
+    
+    # Mandi price forecasts (see mandi_price_forecasting.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS price_forecasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ingredient_name TEXT NOT NULL,
+            forecast_date DATE NOT NULL,
+            predicted_price REAL NOT NULL,
+            confidence_lower REAL,
+            confidence_upper REAL,
+            confidence_level TEXT,
+            trend TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(ingredient_name, forecast_date)
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS budget_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ingredient_name TEXT NOT NULL,
+            alert_type TEXT NOT NULL,
+            message TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Gamification achievements, points and leaderboard (see gamification_system.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS achievements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            icon TEXT,
+            points INTEGER DEFAULT 10,
+            category TEXT,
+            requirement TEXT
+        )
+    """)
+    
+    # User achievements
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_achievements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            achievement_id INTEGER,
+            earned_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (achievement_id) REFERENCES achievements(id)
+        )
+    """)
+    
+    # Points table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_points (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            points INTEGER DEFAULT 0,
+            level INTEGER DEFAULT 1,
+            total_meals_completed INTEGER DEFAULT 0,
+            streak_days INTEGER DEFAULT 0,
+            last_activity TIMESTAMP
+        )
+    """)
+    
+    # Leaderboard
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS leaderboard (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            username TEXT,
+            total_points INTEGER,
+            rank INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    db.create_indexes(conn)
+    
+    # Sample data for new databases
+    cursor.execute("SELECT COUNT(*) FROM ingredients")
+    if cursor.fetchone()[0] == 0:
+        db.insert_sample_ingredients(conn)
+    
+    cursor.execute("SELECT COUNT(*) FROM health_information")
+    if cursor.fetchone()[0] == 0:
+        db.insert_health_information(conn)
+    
+    cursor.execute("SELECT COUNT(*) FROM achievements")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany("""
+            INSERT INTO achievements (name, description, icon, points, category, requirement)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, DEFAULT_ACHIEVEMENTS)
+
+
+def migration_002(conn):
+    """FTS5 search indexes on ingredients, health_information and recipes"""
+    import search_index
+    
+    search_index.create_search_tables(conn)
+
+
+def migration_003(conn):
+    """Server-side Flask sessions (session_store.py)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            sid TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+
+
+def migration_004(conn):
+    """Date index for bulk plan exports"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_meal_plans_created ON meal_plans(created_at)")
+
+
+def migration_005(conn):
+    """Normalized meal_plan_items rows beside plan_data, backfilled from saved plans"""
+    import database as db
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS meal_plan_items (
+            plan_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            meal TEXT NOT NULL,
+            ingredient_id INTEGER NOT NULL,
+            qty_per_child_g REAL,
+            total_g REAL,
+            cost REAL,
+            FOREIGN KEY (plan_id) REFERENCES meal_plans(id),
+            FOREIGN KEY (ingredient_id) REFERENCES ingredients(id)
+        )
+    """)
+    # Children each plan was made for (read by ai_meal_personalization.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS child_meal_plans (
+            child_id INTEGER NOT NULL,
+            plan_id INTEGER NOT NULL,
+            PRIMARY KEY (child_id, plan_id),
+            FOREIGN KEY (child_id) REFERENCES children(id),
+            FOREIGN KEY (plan_id) REFERENCES meal_plans(id)
+        ) WITHOUT ROWID
+    """)
+    
+    plans = conn.execute("SELECT id, plan_data FROM meal_plans ORDER BY id")
+    writer = conn.cursor()
+    while True:
+        batch = plans.fetchmany(500)
+        if not batch:
+            break
+        for plan_id, plan_data in batch:
+            try:
+                db.insert_plan_items(writer, plan_id, plan_data)
+            except (ValueError, KeyError, AttributeError, TypeError):
+                pass  # plan_data too old or malformed to itemize; it is still exported from the blob
+    
+    db.create_indexes(conn)
+
+
+def migration_006(conn):
+    """Per-child ingredient like/dislike counters, kept current by save_feedback"""
+    import database as db
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS child_ingredient_affinity (
+            child_id INTEGER NOT NULL,
+            ingredient_id INTEGER NOT NULL,
+            liked INTEGER NOT NULL DEFAULT 0,
+            disliked INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (child_id, ingredient_id),
+            FOREIGN KEY (child_id) REFERENCES children(id),
+            FOREIGN KEY (ingredient_id) REFERENCES ingredients(id)
+        ) WITHOUT ROWID
+    """)
+    db.rebuild_child_affinity(conn)
+
+
+def migration_007(conn):
+    """Mandi price history and food waste records (read by the price and waste forecasts)"""
+    import database as db
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS food_prices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ingredient_name TEXT NOT NULL,
+            village TEXT,
+            price_per_kg REAL NOT NULL,
+            month TEXT,
+            year INTEGER,
+            source TEXT,
+            recorded_date DATE NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS food_waste (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            anganwadi_id INTEGER NOT NULL,
+            plan_id INTEGER,
+            ingredient_name TEXT NOT NULL,
+            quantity_wasted_g REAL NOT NULL,
+            reason TEXT,
+            date DATE NOT NULL,
+            FOREIGN KEY (plan_id) REFERENCES meal_plans(id)
+        )
+    """)
+    db.create_indexes(conn)
+
+
+# (version, description, function(conn)), in order
+MIGRATIONS = [
+    (1, 'Initial schema and sample data', migration_001),
+    (2, 'Full-text search indexes', migration_002),
+    (3, 'Server-side sessions', migration_003),
+    (4, 'Meal plan date index', migration_004),
+    (5, 'Meal plan items', migration_005),
+    (6, 'Child ingredient affinity', migration_006),
+    (7, 'Food price and waste tables', migration_007),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    """Schema version of the database on conn (0 if never migrated)"""
+    try:
+        return conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0
+
+
+def migrate(db_path, target=None):
+    """
+    Apply pending migrations to the database at db_path
+    
+    Migrations run in one transaction under SQLite's write lock, so when
+    several workers start at once one migrates and the others wait and
+    then find nothing left to do. A failed migration rolls back entirely.
+    
+    Args:
+        db_path: Database file
+        target: Version to migrate to (default: LATEST_VERSION)
+    
+    Returns:
+        List of versions applied (empty if the database was already current)
+    """
+    target = LATEST_VERSION if target is None else target
+    conn = get_connection(db_path)
+    try:
+        if current_version(conn) >= target:
+            return []
+        
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Another process may have migrated while we waited for the lock
+        version = current_version(conn)
+        
+        applied = []
+        for number, description, migration in MIGRATIONS:
+            if version < number <= target:
+                migration(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (number, description)
+                )
+                applied.append(number)
+        conn.commit()
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "nutrition_advisor.db"
+    applied = migrate(path)
+    if applied:
+        print(f"✅ Applied migrations: {', '.join(f'{v:03d}' for v in applied)}")
+    conn = get_connection(path)
+    print(f"📋 {path} is at schema version {current_version(conn)} (latest {LATEST_VERSION})")
+    conn.close()
@@ -0,0 +1,109 @@
+"""
+Meal Plan Cache
+Memoizes generated meal plans keyed on the normalized /api/generate-plan inputs
+
+Plans are deterministic for a given ingredient selection, budget, number of
+children and age group, so repeat submissions (e.g. many centres using the
+default selection) can skip the optimizer. Lookups go to an in-memory LRU
+first and then, optionally, to plans already stored in the meal_plans table.
+
+The ingredients data version is part of every key, so any change to an
+ingredient's price or nutrition makes older entries unreachable.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import database as db
+
+
+class MealPlanCache:
+    """In-memory LRU with an optional SQLite-backed second tier"""
+
+    def __init__(self, max_size=128, persistent=True):
+        self.max_size = max_size
+        self.persistent = persistent
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def make_key(self, ingredients, budget, num_children, age_group, **options):
+        """
+        Build a canonical hash of the plan inputs
+
+        Args:
+            ingredients: Selected ingredient names (order and duplicates ignored)
+            budget, num_children, age_group: Plan parameters
+            options: Any other generation options (e.g. whole_week, solver)
+        """
+        inputs = {
+            'ingredients': sorted(set(ingredients)),
+            'budget': round(float(budget), 2),
+            'num_children': int(num_children),
+            'age_group': age_group,
+            'options': options,
+            'ingredients_version': db.get_data_version('ingredients')
+        }
+        canonical = json.dumps(inputs, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key):
+        """Return a copy of the cached plan for key, or None"""
+        with self._lock:
+            if key in self._plans:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._plans[key])
+
+        if self.persistent:
+            plan = self._load_from_db(key)
+            if plan is not None:
+                self.put(key, plan)
+                with self._lock:
+                    self.hits += 1
+                    self.db_hits += 1
+                return copy.deepcopy(plan)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, meal_plan):
+        """Store a generated plan, evicting the least recently used if full"""
+        with self._lock:
+            self._plans[key] = copy.deepcopy(meal_plan)
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+
+    def clear(self):
+        """Drop all in-memory entries and reset counters"""
+        with self._lock:
+            self._plans.clear()
+            self.hits = self.db_hits = self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'db_hits': self.db_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'size': len(self._plans),
+                'max_size': self.max_size
+            }
+
+    def _load_from_db(self, key):
+        """Rebuild a plan result from a saved meal_plans row with the same input hash"""
+        row = db.get_meal_plan_by_input_hash(key)
+        if not row:
+            return None
+
+        return db.meal_plan_from_row(row)
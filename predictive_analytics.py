@@ -3,10 +3,68 @@
 Unique Feature: Predict malnutrition risks, food waste, and budget trends
 """
 
-import sqlite3
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import json
+import uuid
+
+from database import RISK_HISTORY_SQL, VILLAGE_IMMUNISATION_SQL, WASTE_HISTORY_SQL
+from db_pool import get_connection
+
+# Measurements per child used for malnutrition risk trends
+RISK_HISTORY_LENGTH = 6
+
+# Minimum risk score for each level, highest first (anything lower is Low)
+RISK_LEVEL_THRESHOLDS = [(6, 'Critical'), (4, 'High'), (2, 'Medium')]
+
+# Columns the risk list can be sorted by
+RISK_SORT_COLUMNS = {
+    'risk_score': 'rs.risk_score',
+    'confidence': 'rs.confidence',
+    'weight_trend': 'rs.weight_trend',
+    'height_trend': 'rs.height_trend',
+    'bmi_current': 'rs.bmi_current',
+    'last_measurement_date': 'rs.last_measurement_date',
+    'child_name': 'c.name',
+    'village': 'c.village'
+}
+
+
+def score_malnutrition_risk(weight_trend, height_trend, bmi_current):
+    """
+    Risk scores, levels and reasons for arrays of growth trends
+    
+    Trends are newest minus oldest of a child's recent measurements. Missing
+    values add no risk.
+    
+    Returns:
+        (scores, levels, reasons) with one entry per child
+    """
+    weight_trend, height_trend, bmi_current = (
+        np.asarray(a, dtype=float) for a in (weight_trend, height_trend, bmi_current)
+    )
+    rules = [
+        (weight_trend < 0, 3, "Weight decreasing"),
+        ((weight_trend >= 0) & (weight_trend < 0.5), 1, "Weight gain is slow"),
+        (bmi_current < 14, 4, "BMI critically low"),
+        ((bmi_current >= 14) & (bmi_current < 16), 2, "BMI below normal"),
+        (height_trend < 1, 1, "Growth stunting detected")
+    ]
+    
+    scores = np.zeros(len(weight_trend), dtype=int)
+    for matches, points, _ in rules:
+        scores += np.where(matches, points, 0)
+    
+    levels = np.select(
+        [scores >= threshold for threshold, _ in RISK_LEVEL_THRESHOLDS],
+        [level for _, level in RISK_LEVEL_THRESHOLDS],
+        default='Low'
+    )
+    flags = np.column_stack([matches for matches, _, _ in rules])
+    reasons = [[rules[i][2] for i in np.flatnonzero(row)] for row in flags]
+    return scores, levels, reasons
+
 
 class PredictiveAnalytics:
     """
@@ -21,18 +79,10 @@ class PredictiveAnalytics:
         Predict malnutrition risk based on growth tracking data
         Returns risk level: Low, Medium, High, Critical
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         
         # Get growth tracking history
-        query = """
-            SELECT measurement_date, weight_kg, height_cm, bmi
-            FROM growth_tracking
-            WHERE child_id = ?
-            ORDER BY measurement_date DESC
-            LIMIT 6
-        """
-        
-        df = pd.read_sql_query(query, conn, params=(child_id,))
+        df = pd.read_sql_query(RISK_HISTORY_SQL, conn, params=(child_id, RISK_HISTORY_LENGTH))
         conn.close()
         
         if len(df) < 2:
@@ -42,54 +92,188 @@ class PredictiveAnalytics:
                 'reason': 'Insufficient data'
             }
         
-        # Calculate trends
-        weight_trend = df['weight_kg'].iloc[0] - df['weight_kg'].iloc[-1]
-        height_trend = df['height_cm'].iloc[0] - df['height_cm'].iloc[-1]
-        bmi_current = df['bmi'].iloc[0]
-        
-        # Risk scoring
-        risk_score = 0
-        reasons = []
-        
-        # Weight loss
-        if weight_trend < 0:
-            risk_score += 3
-            reasons.append("Weight decreasing")
-        elif weight_trend < 0.5:
-            risk_score += 1
-            reasons.append("Weight gain is slow")
-        
-        # BMI below normal
-        if bmi_current < 14:
-            risk_score += 4
-            reasons.append("BMI critically low")
-        elif bmi_current < 16:
-            risk_score += 2
-            reasons.append("BMI below normal")
-        
-        # Height growth
-        if height_trend < 1:
-            risk_score += 1
-            reasons.append("Growth stunting detected")
-        
-        # Determine risk level
-        if risk_score >= 6:
-            risk_level = 'Critical'
-        elif risk_score >= 4:
-            risk_level = 'High'
-        elif risk_score >= 2:
-            risk_level = 'Medium'
-        else:
-            risk_level = 'Low'
+        # Trends from the oldest to the newest of the recent measurements
+        scores, levels, reasons = score_malnutrition_risk(
+            [df['weight_kg'].iloc[0] - df['weight_kg'].iloc[-1]],
+            [df['height_cm'].iloc[0] - df['height_cm'].iloc[-1]],
+            [df['bmi'].iloc[0]]
+        )
+        risk_level = str(levels[0])
         
         return {
             'risk_level': risk_level,
-            'risk_score': risk_score,
+            'risk_score': int(scores[0]),
             'confidence': min(100, len(df) * 15),
-            'reasons': reasons,
+            'reasons': reasons[0],
             'recommendation': self._get_intervention_recommendation(risk_level)
         }
     
+    def screen_malnutrition_risk(self, history_length=RISK_HISTORY_LENGTH, progress=None):
+        """
+        Score every child's malnutrition risk at once and save a risk snapshot
+        
+        Each child's last history_length measurements come from a single
+        window-function query and are scored with the same rules as
+        predict_malnutrition_risk. Children with fewer than two measurements
+        are saved as 'Unknown'.
+        
+        Args:
+            history_length: Recent measurements per child used for trends
+            progress: Optional callback(step, total) for job progress
+        
+        Returns:
+            Dict with screening_id, screened_at, children and counts by risk level
+        """
+        def report(step):
+            if progress:
+                progress(step, 3)
+        
+        conn = get_connection(self.db_path)
+        try:
+            children = pd.read_sql_query("SELECT id AS child_id FROM children", conn)
+            measurements = pd.read_sql_query("""
+                SELECT child_id, weight_kg, height_cm, bmi, measurement_date, recency
+                FROM (
+                    SELECT child_id, weight_kg, height_cm, bmi, measurement_date,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY child_id
+                               ORDER BY measurement_date DESC, id DESC
+                           ) AS recency
+                    FROM growth_tracking
+                )
+                WHERE recency <= ?
+            """, conn, params=(history_length,))
+            report(1)
+            
+            snapshots = self._risk_snapshot_frame(children['child_id'], measurements)
+            report(2)
+            
+            screening_id = uuid.uuid4().hex
+            screened_at = datetime.now().isoformat(timespec='seconds')
+            rows = snapshots.astype(object).where(snapshots.notna(), None)
+            conn.executemany("""
+                INSERT INTO risk_snapshots
+                (screening_id, child_id, risk_level, risk_score, confidence, reasons,
+                 measurements, weight_trend, height_trend, bmi_current,
+                 last_measurement_date, screened_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (screening_id, row.child_id, row.risk_level, row.risk_score, row.confidence,
+                 json.dumps(row.reasons), row.measurements, row.weight_trend,
+                 row.height_trend, row.bmi_current, row.last_measurement_date, screened_at)
+                for row in rows.itertuples(index=False)
+            ])
+            conn.commit()
+            report(3)
+        finally:
+            conn.close()
+        
+        return {
+            'screening_id': screening_id,
+            'screened_at': screened_at,
+            'children': len(snapshots),
+            'risk_levels': snapshots['risk_level'].value_counts().to_dict()
+        }
+    
+    def _risk_snapshot_frame(self, child_ids, measurements):
+        """One row of trends and risk per child from the recent measurements"""
+        counts = measurements.groupby('child_id').size()
+        newest = measurements[measurements['recency'] == 1].set_index('child_id')
+        oldest = measurements[
+            measurements['recency'] == measurements['child_id'].map(counts)
+        ].set_index('child_id')
+        
+        frame = pd.DataFrame({'child_id': child_ids}).set_index('child_id')
+        frame['measurements'] = counts.reindex(frame.index).fillna(0).astype(int)
+        frame['weight_trend'] = (newest['weight_kg'] - oldest['weight_kg']).reindex(frame.index)
+        frame['height_trend'] = (newest['height_cm'] - oldest['height_cm']).reindex(frame.index)
+        frame['bmi_current'] = newest['bmi'].reindex(frame.index)
+        frame['last_measurement_date'] = newest['measurement_date'].reindex(frame.index)
+        
+        scores, levels, reasons = score_malnutrition_risk(
+            frame['weight_trend'], frame['height_trend'], frame['bmi_current']
+        )
+        enough_data = (frame['measurements'] >= 2).to_numpy()
+        frame['risk_level'] = np.where(enough_data, levels, 'Unknown')
+        frame['risk_score'] = pd.Series(scores, index=frame.index).where(enough_data)
+        frame['confidence'] = np.where(enough_data, np.minimum(100, frame['measurements'] * 15), 0)
+        frame['reasons'] = [r if ok else ['Insufficient data'] for r, ok in zip(reasons, enough_data)]
+        return frame.reset_index()
+    
+    def get_risk_snapshots(self, screening_id=None, page=1, per_page=50, sort='risk_score',
+                           order='desc', risk_level=None, village=None):
+        """
+        One page of a saved risk screening, with child names and villages
+        
+        Args:
+            screening_id: Screening to read (default: the most recent one)
+            page, per_page: 1-based page number and page size
+            sort: Key of RISK_SORT_COLUMNS; missing values always sort last
+            order: 'asc' or 'desc'
+            risk_level, village: Optional filters
+        
+        Returns:
+            Dict with screening details, total matches and the page of children,
+            or None if no screening has been run
+        """
+        if sort not in RISK_SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column: {sort}")
+        direction = 'ASC' if str(order).lower() == 'asc' else 'DESC'
+        page, per_page = max(1, int(page)), max(1, int(per_page))
+        
+        conn = get_connection(self.db_path)
+        try:
+            if screening_id is None:
+                latest = conn.execute(
+                    "SELECT screening_id FROM risk_snapshots ORDER BY id DESC LIMIT 1"
+                ).fetchone()
+                if latest is None:
+                    return None
+                screening_id = latest[0]
+            
+            where = ["rs.screening_id = ?"]
+            params = [screening_id]
+            if risk_level:
+                where.append("rs.risk_level = ?")
+                params.append(risk_level)
+            if village:
+                where.append("c.village = ?")
+                params.append(village)
+            where = " AND ".join(where)
+            
+            column = RISK_SORT_COLUMNS[sort]
+            page_df = pd.read_sql_query(f"""
+                SELECT rs.child_id, c.name AS child_name, c.village, rs.risk_level,
+                       rs.risk_score, rs.confidence, rs.reasons, rs.measurements,
+                       rs.weight_trend, rs.height_trend, rs.bmi_current,
+                       rs.last_measurement_date, rs.screened_at
+                FROM risk_snapshots rs
+                LEFT JOIN children c ON c.id = rs.child_id
+                WHERE {where}
+                ORDER BY {column} IS NULL, {column} {direction}, rs.child_id
+                LIMIT ? OFFSET ?
+            """, conn, params=params + [per_page, (page - 1) * per_page])
+            total, screened_at = conn.execute(f"""
+                SELECT COUNT(*), MAX(rs.screened_at)
+                FROM risk_snapshots rs
+                LEFT JOIN children c ON c.id = rs.child_id
+                WHERE {where}
+            """, params).fetchone()
+        finally:
+            conn.close()
+        
+        page_df['reasons'] = page_df['reasons'].map(lambda r: json.loads(r) if r else [])
+        children = page_df.astype(object).where(page_df.notna(), None).to_dict('records')
+        return {
+            'screening_id': screening_id,
+            'screened_at': screened_at,
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': -(-total // per_page),
+            'children': children
+        }
+    
     def _get_intervention_recommendation(self, risk_level):
         """Get intervention recommendations based on risk level"""
         recommendations = {
@@ -123,18 +307,10 @@ class PredictiveAnalytics:
         """
         Predict food waste for next period based on historical data
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         
         # Get historical waste data
-        query = """
-            SELECT date, ingredient_name, quantity_wasted_g, reason
-            FROM food_waste
-            WHERE anganwadi_id = ?
-            AND date >= date('now', '-90 days')
-            ORDER BY date
-        """
-        
-        df = pd.read_sql_query(query, conn, params=(anganwadi_id,))
+        df = pd.read_sql_query(WASTE_HISTORY_SQL, conn, params=(anganwadi_id,))
         conn.close()
         
         if len(df) == 0:
@@ -175,7 +351,7 @@ class PredictiveAnalytics:
         """
         Analyze budget spending trends and predict future costs
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = get_connection(self.db_path)
         
         query = """
             SELECT created_at, total_cost, num_children
@@ -215,21 +391,9 @@ class PredictiveAnalytics:
         """
         Predict immunization coverage and identify at-risk children
         """
-        conn = sqlite3.connect(self.db_path)
-        
-        query = """
-            SELECT 
-                c.id, c.name, c.date_of_birth,
-                COUNT(i.id) as total_vaccines,
-                SUM(CASE WHEN i.status = 'Completed' THEN 1 ELSE 0 END) as completed_vaccines,
-                SUM(CASE WHEN i.due_date < date('now') AND i.status != 'Completed' THEN 1 ELSE 0 END) as overdue_vaccines
-            FROM children c
-            LEFT JOIN immunisation_schedule i ON c.id = i.child_id
-            WHERE c.village = ?
-            GROUP BY c.id
-        """
+        conn = get_connection(self.db_path)
         
-        df = pd.read_sql_query(query, conn, params=(village_id,))
+        df = pd.read_sql_query(VILLAGE_IMMUNISATION_SQL, conn, params=(village_id,))
         conn.close()
         
         if len(df) == 0:
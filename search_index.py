@@ -0,0 +1,226 @@
+"""
+Full-Text Search
+SQLite FTS5 indexes for ingredients, health information, recipes and
+local FDC foods, with one query syntax for all of them
+
+Searches used to be LIKE '%term%' over several columns (a full scan every
+time) or a round trip to FoodData Central. Each source now has an FTS5
+table ranked with BM25 (column weights in SOURCES):
+
+- every word must match, as a prefix ("len" finds "Lentils")
+- Hindi and Kannada transliterations match their English names
+  ("akki" finds rice, "palak" spinach; see ALIASES)
+- when nothing matches, misspelt words (4+ letters) are replaced by the
+  closest indexed word with the same first letter and the search retried
+
+ingredients_fts and health_fts index their tables as external content and
+are kept in sync by triggers (migration_002). recipes_fts holds
+recipes.RECIPES, so call index_recipes() from a migration when the
+recipes change. fdc_local.py indexes its food table the same way.
+"""
+
+import difflib
+import re
+
+# source -> (fts table, content table or None, indexed columns, BM25 weights)
+SOURCES = {
+    'ingredient': ('ingredients_fts', 'ingredients', ['name', 'category', 'dietary_tags'], [10.0, 2.0, 1.0]),
+    'health': ('health_fts', 'health_information', ['disease_name', 'category', 'symptoms'], [10.0, 3.0, 2.0]),
+    'recipe': ('recipes_fts', None, ['name', 'category', 'ingredients', 'instructions'], [10.0, 2.0, 4.0, 1.0])
+}
+
+# Keeps accents out of matching; prefix indexes make 2- and 3-letter prefixes cheap
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+# Smallest difflib ratio for a typo correction, and shortest word corrected
+TYPO_CUTOFF = 0.75
+TYPO_MIN_LENGTH = 4
+
+# Hindi (hi) and Kannada (kn) transliterations -> English names to search as well
+ALIASES = {
+    # Grains
+    'chawal': ['rice'], 'chaval': ['rice'], 'akki': ['rice'], 'anna': ['rice'],
+    'gehun': ['wheat'], 'gehu': ['wheat'], 'godhi': ['wheat'], 'godi': ['wheat'],
+    'atta': ['wheat flour'], 'maida': ['wheat flour'],
+    'suji': ['semolina'], 'sooji': ['semolina'], 'rave': ['semolina'], 'rava': ['semolina'],
+    'jola': ['jowar', 'sorghum'], 'bajra': ['pearl millet'], 'sajje': ['pearl millet', 'bajra'],
+    'nachni': ['ragi', 'finger millet'], 'raagi': ['ragi', 'finger millet'],
+    'avalakki': ['poha', 'flattened rice'], 'chivda': ['poha', 'flattened rice'],
+    # Pulses
+    'arhar': ['toor'], 'tuvar': ['toor'], 'togari': ['toor'], 'thogari': ['toor'],
+    'mung': ['moong'], 'hesaru': ['moong'], 'kadale': ['chana', 'chickpeas'],
+    'chole': ['chickpeas'], 'kabuli': ['chickpeas'], 'hurali': ['horse gram'],
+    # Vegetables
+    'aloo': ['potato'], 'alu': ['potato'], 'alugadde': ['potato'], 'aloogadde': ['potato'],
+    'pyaz': ['onion'], 'pyaaz': ['onion'], 'kanda': ['onion'], 'eerulli': ['onion'], 'irulli': ['onion'],
+    'tamatar': ['tomato'], 'gajar': ['carrot'], 'gajjari': ['carrot'],
+    'palya': ['vegetables'], 'soppu': ['spinach', 'greens'], 'saag': ['spinach', 'greens'],
+    'kaddu': ['pumpkin'], 'kumbalakai': ['pumpkin'], 'kumbala': ['pumpkin'],
+    'gobhi': ['cabbage', 'cauliflower'], 'gobi': ['cabbage', 'cauliflower'], 'kosu': ['cabbage'],
+    'bhindi': ['lady finger', 'okra'], 'bende': ['lady finger', 'okra'], 'bendekai': ['lady finger', 'okra'],
+    'baingan': ['brinjal', 'eggplant'], 'badanekai': ['brinjal', 'eggplant'],
+    'lauki': ['bottle gourd'], 'sorekai': ['bottle gourd'], 'methi': ['fenugreek'], 'menthya': ['fenugreek'],
+    # Dairy, eggs, fruit
+    'doodh': ['milk'], 'dudh': ['milk'], 'haalu': ['milk'], 'halu': ['milk'],
+    'dahi': ['curd', 'yogurt'], 'mosaru': ['curd', 'yogurt'], 'paneer': ['cottage cheese'],
+    'anda': ['egg'], 'ande': ['egg'], 'motte': ['egg'],
+    'kela': ['banana'], 'bale': ['banana'], 'balehannu': ['banana'], 'seb': ['apple'],
+    'papita': ['papaya'], 'parangi': ['papaya'], 'amrood': ['guava'], 'seebe': ['guava'],
+    # Other
+    'moongphali': ['peanut', 'groundnut'], 'mungfali': ['peanut', 'groundnut'], 'kadalekai': ['peanut', 'groundnut'],
+    'gud': ['jaggery'], 'gur': ['jaggery'], 'bella': ['jaggery'],
+    'tel': ['oil'], 'enne': ['oil'], 'tuppa': ['ghee'],
+    'namak': ['salt'], 'uppu': ['salt'], 'haldi': ['turmeric'], 'arishina': ['turmeric'],
+    # Health
+    'bukhar': ['fever'], 'jwara': ['fever'], 'dast': ['diarrhoea', 'diarrhea'], 'bedhi': ['diarrhoea', 'diarrhea'],
+    'khansi': ['cough'], 'kemmu': ['cough'], 'kuposhan': ['malnutrition'], 'aposhtikate': ['malnutrition']
+}
+
+
+def quote_phrase(text):
+    """text as an FTS5 string (a phrase of its tokens)"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def query_terms(query):
+    """
+    Lower-cased search words (FTS5's tokenizer splits them further)
+
+    Words with no letters or digits (a stray "-" or ".") are dropped: as
+    FTS5 phrases they have no tokens and, AND'ed in, would match nothing.
+    """
+    words = re.findall(r'[^\s,;:()/"*^+]+', (query or '').lower())
+    return [word for word in words if re.search(r'\w', word)]
+
+
+def match_expression(query, columns=None, require=''):
+    """
+    FTS5 MATCH expression for a user query, or '' if it has no words
+
+    Each word becomes a prefix match, OR'd with the English names of a
+    transliterated alias; all words must match, in columns if given.
+    require is an extra FTS5 condition AND'ed on (e.g. a column filter),
+    so it narrows the rows before they are ranked.
+    """
+    groups = []
+    for term in query_terms(query):
+        options = [quote_phrase(term) + '*'] + [quote_phrase(english) for english in ALIASES.get(term, [])]
+        groups.append(options[0] if len(options) == 1 else f"({' OR '.join(options)})")
+    if not groups:
+        return ''
+    expression = ' AND '.join(groups)
+    if columns:
+        expression = f"{{{' '.join(columns)}}} : ({expression})"
+    return f"{expression} AND {require}" if require else expression
+
+
+def correct_typos(conn, fts_table, query):
+    """query with words that match no indexed word replaced by the closest one"""
+    vocab = f"{fts_table}_vocab"
+    corrected = []
+    for term in query_terms(query):
+        known = term in ALIASES or conn.execute(
+            f"SELECT 1 FROM {vocab} WHERE term >= ? AND term < ? LIMIT 1", (term, term + '\uffff')
+        ).fetchone()
+        if not known and len(term) >= TYPO_MIN_LENGTH:
+            candidates = [row[0] for row in conn.execute(
+                f"SELECT term FROM {vocab} WHERE term >= ? AND term < ? AND length(term) BETWEEN ? AND ?",
+                (term[0], term[0] + '\uffff', len(term) - 2, len(term) + 2)
+            )]
+            term = next(iter(difflib.get_close_matches(term, candidates, n=1, cutoff=TYPO_CUTOFF)), term)
+        corrected.append(term)
+    return ' '.join(corrected)
+
+
+def fts_search(conn, fts_table, query, sql, params=(), columns=None, require=''):
+    """
+    Rows of sql for query, retrying once with typos corrected if none match
+
+    sql's first placeholder is the MATCH expression; params fill the rest.
+    columns and require are passed on to match_expression.
+    """
+    expression = match_expression(query, columns, require)
+    if not expression:
+        return []
+    rows = conn.execute(sql, (expression, *params)).fetchall()
+    if not rows:
+        corrected = correct_typos(conn, fts_table, query)
+        if corrected != ' '.join(query_terms(query)):
+            rows = conn.execute(sql, (match_expression(corrected, columns, require), *params)).fetchall()
+    return rows
+
+
+def ranked_sql(source, limit=True):
+    """SELECT rowid, title, category, score FROM the source's index, best first"""
+    fts_table, _, columns, weights = SOURCES[source]
+    return f"""
+        SELECT rowid, {columns[0]}, {columns[1]}, bm25({fts_table}, {', '.join(map(str, weights))}) AS score
+        FROM {fts_table}
+        WHERE {fts_table} MATCH ?
+        ORDER BY score
+        {'LIMIT ?' if limit else ''}
+    """
+
+
+def search(conn, query, sources=None, limit=10):
+    """
+    Best matches for query across sources (default: all of SOURCES)
+
+    Returns:
+        List of {'source', 'id', 'title', 'category', 'score'}, best first;
+        id is the row id in the source table (recipes: recipes_fts)
+    """
+    results = []
+    for source in sources or SOURCES:
+        for rowid, title, category, score in fts_search(
+            conn, SOURCES[source][0], query, ranked_sql(source), (limit,)
+        ):
+            results.append({'source': source, 'id': rowid, 'title': title,
+                            'category': category, 'score': round(score, 4)})
+    # bm25 scores are negative, better matches lower
+    return sorted(results, key=lambda result: result['score'])[:limit]
+
+
+def create_fts_table(conn, fts_table, columns, content=None, content_rowid='id'):
+    """FTS5 table (external content if content is given) and its vocabulary table"""
+    external = f", content = '{content}', content_rowid = '{content_rowid}'" if content else ''
+    conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({', '.join(columns)}, "
+                 f"{TOKENIZE}{external})")
+    conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table}_vocab USING fts5vocab({fts_table}, row)")
+
+
+def create_sync_triggers(conn, fts_table, content, columns, content_rowid='id'):
+    """Triggers keeping an external content FTS table in step with its table"""
+    names = ', '.join(columns)
+    new = ', '.join(f"new.{column}" for column in columns)
+    old = ', '.join(f"old.{column}" for column in columns)
+    insert = f"INSERT INTO {fts_table} (rowid, {names}) VALUES (new.{content_rowid}, {new});"
+    delete = (f"INSERT INTO {fts_table} ({fts_table}, rowid, {names}) "
+              f"VALUES ('delete', old.{content_rowid}, {old});")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {content} BEGIN {insert} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {content} BEGIN {delete} END")
+    # Only the indexed columns; cost and nutrient updates leave the index alone
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE OF {names} ON {content} "
+                 f"BEGIN {delete} {insert} END")
+
+
+def index_recipes(conn):
+    """Replace recipes_fts with the contents of recipes.RECIPES"""
+    from recipes import RECIPES
+
+    conn.execute("DELETE FROM recipes_fts")
+    conn.executemany("INSERT INTO recipes_fts (name, category, ingredients, instructions) VALUES (?, ?, ?, ?)", [
+        (name, recipe.get('category', ''), ' '.join(recipe.get('ingredients', {})),
+         ' '.join(recipe.get('instructions', [])))
+        for name, recipe in RECIPES.items()
+    ])
+
+
+def create_search_tables(conn):
+    """FTS5 tables, triggers and initial contents for every source in SOURCES"""
+    for fts_table, content, columns, _ in SOURCES.values():
+        create_fts_table(conn, fts_table, columns, content)
+        if content:
+            create_sync_triggers(conn, fts_table, content, columns)
+            conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+    index_recipes(conn)
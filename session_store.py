@@ -0,0 +1,153 @@
+"""
+Server-Side Sessions
+Flask sessions kept in SQLite, with only a random session id in the cookie
+
+Flask's default session is the whole session dict, signed, in a cookie
+that the browser sends back on every request. Generated plans made that
+cookie several KB (past the 4 KB browsers accept). With
+SQLiteSessionInterface the cookie is a 43-character id and the data lives
+in the sessions table (migration_003), so request size no longer grows
+with what the session holds.
+
+Rows expire after the app's PERMANENT_SESSION_LIFETIME; expired rows are
+ignored when read and deleted every PRUNE_EVERY new sessions.
+"""
+
+import secrets
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from db_pool import get_connection
+
+# New sessions between deletes of expired rows
+PRUNE_EVERY = 500
+
+
+class SQLiteSession(CallbackDict, SessionMixin):
+    """Session dict that records whether it was read or changed"""
+
+    def __init__(self, initial=None, sid=None, new=False, expires_at=None):
+        def on_update(session):
+            session.modified = True
+            session.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        self.accessed = False
+
+    # Reads count as access too, so responses that depend on the session vary on the cookie
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self.accessed = True
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """Stores session data in the sessions table of db_path"""
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _lifetime(self, app):
+        return app.permanent_session_lifetime.total_seconds()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            conn = get_connection(self.db_path)
+            row = conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?", (sid, time.time())
+            ).fetchone()
+            conn.close()
+            if row:
+                return SQLiteSession(self.serializer.loads(row[0]), sid=sid, expires_at=row[1])
+        return SQLiteSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        # Emptied session: forget it on both sides
+        if not session:
+            if session.modified and not session.new:
+                self.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        now = time.time()
+        lifetime = self._lifetime(app)
+        # Unchanged sessions are written only to push back an expiry that is half used up
+        if session.modified or session.expires_at is None or session.expires_at - now < lifetime / 2:
+            self.save(session.sid, dict(session), now + lifetime)
+            if session.new:
+                self._count_new()
+
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name, session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+    def save(self, sid, data, expires_at):
+        conn = get_connection(self.db_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)",
+            (sid, self.serializer.dumps(data), expires_at)
+        )
+        conn.commit()
+        conn.close()
+
+    def delete(self, sid):
+        conn = get_connection(self.db_path)
+        conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+        conn.commit()
+        conn.close()
+
+    def prune(self):
+        """Delete expired sessions; returns how many"""
+        conn = get_connection(self.db_path)
+        count = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+        conn.commit()
+        conn.close()
+        return count
+
+    def _count_new(self):
+        with self._lock:
+            self._created += 1
+            due = self._created % PRUNE_EVERY == 0
+        if due:
+            self.prune()
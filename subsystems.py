@@ -0,0 +1,74 @@
+"""
+Lazy Subsystems
+Optional features imported and set up on first use instead of at startup
+
+The chatbot (google.generativeai), USDA and WHO clients (requests),
+gamification and the blockchain demo are only needed by a few routes, but
+importing them at module load made every gunicorn worker pay for all of
+them before serving its first request. flask_app registers a loader for
+each one; get() runs it on first use and keeps the result.
+
+A loader that raises is reported once and its subsystem stays None, the
+same as the try/except imports these replace.
+"""
+
+import threading
+import time
+
+
+class SubsystemRegistry:
+    """Named loaders run once, on first get()"""
+
+    def __init__(self):
+        self._loaders = {}
+        self._instances = {}
+        self._load_ms = {}
+        # Reentrant so a loader can get() the subsystems it depends on
+        self._lock = threading.RLock()
+
+    def loader(self, name):
+        """Decorator registering a zero-argument function that builds a subsystem"""
+        def register(func):
+            self._loaders[name] = func
+            return func
+        return register
+
+    def get(self, name):
+        """The subsystem, loading it on first use (None if it failed to load)"""
+        if name in self._instances:
+            return self._instances[name]
+
+        with self._lock:
+            if name not in self._instances:
+                start = time.perf_counter()
+                try:
+                    instance = self._loaders[name]()
+                except Exception as e:
+                    print(f"⚠️ {name} not loaded: {e}")
+                    instance = None
+                self._load_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+                self._instances[name] = instance
+            return self._instances[name]
+
+    def is_loaded(self, name):
+        return name in self._instances
+
+    def preload(self, names=None):
+        """Load subsystems now (all of them by default), e.g. to warm a worker"""
+        for name in names or list(self._loaders):
+            self.get(name)
+
+    def status(self):
+        """{name: {'loaded', 'available', 'load_ms'}} for every registered subsystem"""
+        return {
+            name: {
+                'loaded': name in self._instances,
+                'available': self._instances.get(name) is not None if name in self._instances else None,
+                'load_ms': self._load_ms.get(name)
+            }
+            for name in self._loaders
+        }
+
+
+# Shared registry used by the web app
+subsystems = SubsystemRegistry()
@@ -5,6 +5,67 @@ Run this to verify all components are working correctly
 
 import sys
 import os
+import functools
+import tempfile
+import traceback
+
+
+def with_temporary_database(test):
+    """Run a test against a freshly migrated database in a temporary directory instead of nutrition_advisor.db"""
+    @functools.wraps(test)
+    def wrapper():
+        import database as db
+        import db_pool
+        
+        previous = db.DATABASE_PATH
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DATABASE_PATH = os.path.join(tmp, "test.db")
+            try:
+                db.initialize_database()
+                return test()
+            finally:
+                db_pool.close_all()
+                db.DATABASE_PATH = previous
+    return wrapper
+
+
+def flask_test_client():
+    """
+    Test client for flask_app, bound to the current (temporary) database
+    
+    The app is imported once; its background job workers are stopped so
+    they don't poll whichever database the next test uses.
+    """
+    import database as db
+    import flask_app
+    from predictive_analytics import PredictiveAnalytics
+    from session_store import SQLiteSessionInterface
+    
+    flask_app.job_queue.stop()
+    flask_app.app.session_interface = SQLiteSessionInterface(db.DATABASE_PATH)
+    flask_app.predictive = PredictiveAnalytics(db.DATABASE_PATH)
+    return flask_app.app.test_client()
+
+
+def strict_json(response):
+    """Parse a response body as standard JSON, rejecting NaN and Infinity"""
+    import json
+    
+    def reject(constant):
+        raise ValueError(f"{constant} is not valid JSON")
+    
+    return json.loads(response.get_data(as_text=True), parse_constant=reject)
+
+
+def run_test(test):
+    """Run an assert-style test for the summary: False (after printing the traceback) if it raised"""
+    try:
+        test()
+        return True
+    except Exception:
+        traceback.print_exc()
+        print(f"\n❌ {test.__name__} failed\n")
+        return False
 
 def test_imports():
     """Test if all required modules can be imported"""
@@ -22,7 +83,7 @@ def test_imports():
         import plotly
         print("✓ Plotly imported")
         
-        from pulp import *
+        import pulp
         print("✓ PuLP imported")
         
         from fpdf import FPDF
@@ -128,6 +189,1000 @@ def test_optimizer():
         traceback.print_exc()
         return False
 
+@with_temporary_database
+def test_solver_backends():
+    """Test that the in-process HiGHS backend matches CBC"""
+    print("Testing solver backends...")
+    import database as db
+    from meal_optimizer import MealOptimizer, HIGHS_AVAILABLE
+    
+    if not HIGHS_AVAILABLE:
+        print("⚠️ highspy not installed, skipping HiGHS comparison")
+        return
+    
+    ingredients_df = db.get_all_ingredients()
+    
+    plans = {}
+    for solver in ['cbc', 'highs']:
+        optimizer = MealOptimizer(
+            ingredients_df=ingredients_df,
+            budget=2000,
+            num_children=20,
+            age_group="3-6 years",
+            solver=solver
+        )
+        plans[solver] = optimizer.generate_meal_plan()
+        print(f"✓ {solver} plan generated")
+    
+    cbc, highs = plans['cbc'], plans['highs']
+    
+    # Same result structure
+    assert cbc['weekly_plan'].keys() == highs['weekly_plan'].keys()
+    for day in cbc['weekly_plan']:
+        assert cbc['weekly_plan'][day]['meals'].keys() == highs['weekly_plan'][day]['meals'].keys()
+    print("✓ Result structure matches")
+    
+    # Same optimum within tolerance
+    assert abs(cbc['total_cost'] - highs['total_cost']) <= 0.01 * cbc['total_cost']
+    assert abs(cbc['nutrition_score'] - highs['nutrition_score']) <= 1.0
+    for nutrient, value in cbc['weekly_nutrition'].items():
+        assert abs(value - highs['weekly_nutrition'][nutrient]) <= 0.01 * max(value, 1)
+    print(f"✓ HiGHS within tolerance of CBC (score {highs['nutrition_score']} vs {cbc['nutrition_score']})")
+    
+    print("\n✅ Solver backend tests passed!\n")
+
+@with_temporary_database
+def test_whole_week_plan():
+    """Test whole-week plans relax the variety cap or fail when infeasible"""
+    print("Testing whole-week plans...")
+    import database as db
+    from meal_optimizer import MealOptimizer
+    
+    ingredients_df = db.get_all_ingredients()
+    
+    # Too tight for the variety cap, feasible without it
+    optimizer = MealOptimizer(ingredients_df, budget=1600, num_children=20, age_group="3-6 years")
+    plan = optimizer.generate_meal_plan(whole_week=True)
+    for day_plan in plan['weekly_plan'].values():
+        assert all(meal['items'] for meal in day_plan['meals'].values())
+    assert plan['total_cost'] <= 1600.01
+    print(f"✓ Variety cap relaxed at budget 1600 (score {plan['nutrition_score']})")
+    
+    # No week meets the calorie targets
+    optimizer = MealOptimizer(ingredients_df, budget=50, num_children=20, age_group="3-6 years")
+    try:
+        optimizer.generate_meal_plan(whole_week=True)
+        assert False, "Infeasible whole-week plan was returned"
+    except ValueError as e:
+        assert 'Infeasible' in str(e)
+    print("✓ Infeasible budget raises ValueError")
+    
+    print("\n✅ Whole-week plan tests passed!\n")
+
+@with_temporary_database
+def test_batch_plans():
+    """Test the batch plan endpoint validates centres and saves every plan"""
+    print("Testing batch plan generation...")
+    import json
+    import database as db
+    import flask_app
+    
+    client = flask_test_client()
+    flask_app.plan_cache.clear()
+    ingredients = db.get_all_ingredients()['name'].tolist()
+    
+    def saved_plans():
+        conn = db.get_connection()
+        count = conn.execute("SELECT COUNT(*) FROM meal_plans").fetchone()[0]
+        conn.close()
+        return count
+    
+    # One bad centre rejects the whole batch before anything is solved
+    for centres in [[{'ingredients': ingredients}, {'ingredients': ingredients, 'budget': 'lots'}],
+                    [{'ingredients': ingredients}, 'centre'],
+                    [{'ingredients': ingredients, 'num_children': 0}]]:
+        response = client.post('/api/generate-plans/batch', json={'centres': centres})
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+    assert client.post('/api/generate-plans/batch', json={}).status_code == 400
+    assert saved_plans() == 0
+    print("✓ Invalid centres rejected with a 400")
+    
+    response = client.post('/api/generate-plans/batch', json={'centres': [
+        {'name': 'A', 'ingredients': ingredients, 'budget': 2000},
+        {'name': 'B', 'ingredients': ingredients, 'budget': 2500},
+        {'name': 'C', 'ingredients': []}
+    ]})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    results = {line['name']: line for line in lines[:-1]}
+    assert results['A']['success'] and results['B']['success']
+    assert not results['C']['success']
+    assert lines[-1]['done'] and lines[-1]['succeeded'] == 2 and lines[-1]['failed'] == 1
+    assert saved_plans() == 2
+    print(f"✓ Batch solved and saved plans {lines[-1]['plan_ids']}")
+    
+    # Saved inputs reuse their plan; identical centres share one new row
+    first_ids = lines[-1]['plan_ids']
+    response = client.post('/api/generate-plans/batch', json={'centres': [
+        {'name': 'A again', 'ingredients': ingredients, 'budget': 2000},
+        {'name': 'D', 'ingredients': ingredients, 'budget': 3000},
+        {'name': 'E', 'ingredients': ingredients, 'budget': 3000}
+    ]})
+    plan_ids = [json.loads(line) for line in response.get_data(as_text=True).splitlines()][-1]['plan_ids']
+    assert plan_ids['0'] == first_ids['0']
+    assert plan_ids['1'] == plan_ids['2'] not in first_ids.values()
+    assert saved_plans() == 3
+    print("✓ Repeat inputs reuse saved plans")
+    
+    print("\n✅ Batch plan tests passed!\n")
+
+def test_plan_cache():
+    """Test meal plan cache keys and hit/miss counting"""
+    print("Testing plan cache...")
+    from plan_cache import MealPlanCache
+    
+    cache = MealPlanCache(max_size=2, persistent=False)
+    
+    # Ingredient order and duplicates don't change the key
+    key = cache.make_key(['Rice', 'Milk'], 2000, 20, '3-6 years')
+    assert key == cache.make_key(['Milk', 'Rice', 'Rice'], 2000.0, '20', '3-6 years')
+    assert key != cache.make_key(['Milk', 'Rice'], 2500, 20, '3-6 years')
+    print("✓ Cache keys are canonical")
+    
+    assert cache.get(key) is None
+    cache.put(key, {'total_cost': 100})
+    assert cache.get(key) == {'total_cost': 100}
+    
+    # Least recently used entry is evicted
+    cache.put('b', {})
+    cache.put('c', {})
+    assert cache.get(key) is None
+    
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 2
+    print(f"✓ Cache stats: {stats}")
+    
+    print("\n✅ Plan cache tests passed!\n")
+
+@with_temporary_database
+def test_plan_cache_reuse():
+    """Test repeat plan requests reuse the saved plan instead of inserting a copy"""
+    print("Testing saved plan reuse...")
+    import database as db
+    import flask_app
+    
+    client = flask_test_client()
+    flask_app.plan_cache.clear()
+    request_data = {'ingredients': db.get_all_ingredients()['name'].tolist(), 'budget': 2000}
+    
+    def saved_plans():
+        conn = db.get_connection()
+        count = conn.execute("SELECT COUNT(*) FROM meal_plans").fetchone()[0]
+        conn.close()
+        return count
+    
+    plan_id = client.post('/api/generate-plan', json=request_data).get_json()['plan_id']
+    # In-memory hit, then a hit from the meal_plans table
+    assert client.post('/api/generate-plan', json=request_data).get_json()['plan_id'] == plan_id
+    flask_app.plan_cache.clear()
+    assert client.post('/api/generate-plan', json=request_data).get_json()['plan_id'] == plan_id
+    assert flask_app.plan_cache.stats()['db_hits'] == 1
+    assert saved_plans() == 1
+    print(f"✓ Cache hits reuse plan {plan_id}")
+    
+    # Different inputs are still saved
+    request_data['budget'] = 2500
+    assert client.post('/api/generate-plan', json=request_data).get_json()['plan_id'] != plan_id
+    assert saved_plans() == 2
+    print("✓ New inputs saved as a new plan")
+    
+    print("\n✅ Saved plan reuse tests passed!\n")
+
+@with_temporary_database
+def test_export_cache():
+    """Test plan exports render once per plan and evict least recently used files"""
+    print("Testing export cache...")
+    import json
+    import database as db
+    from export_cache import ExportCache
+    
+    plan_data = json.dumps({'weekly_plan': {}, 'selected_ingredients': ['Rice'],
+                            'weekly_nutrition': {'calories': 1.0}, 'daily_requirements': {}})
+    plan_ids = [db.save_meal_plan(f"Export test {i}", 2000, 20, '3-6 years', 1500.0 + i, 80, plan_data)
+                for i in range(3)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ExportCache(tmp, max_bytes=10 ** 6)
+        path = cache.get(plan_ids[0], 'json')
+        assert cache.get(plan_ids[0], 'json') == path
+        with open(path) as f:
+            assert json.load(f)['total_cost'] == 1500.0
+        assert cache.renders == 1 and cache.hits == 1
+        assert cache.get(10 ** 9, 'json') is None
+        print("✓ Rendered once, then served from disk")
+        
+        # Room for two files: the least recently served one goes
+        cache = ExportCache(tmp, max_bytes=2 * os.path.getsize(path))
+        second = cache.get(plan_ids[1], 'json')
+        cache.get(plan_ids[0], 'json')
+        cache.get(plan_ids[2], 'json')
+        assert not os.path.exists(second) and os.path.exists(path)
+        assert cache.stats()['files'] == 2
+        print("✓ Least recently used export evicted")
+    
+    print("\n✅ Export cache tests passed!\n")
+
+@with_temporary_database
+def test_bulk_export():
+    """Test date-ranged plans stream into a ZIP with PDFs rendered in a process pool"""
+    print("Testing bulk export...")
+    import io
+    import json
+    import zipfile
+    import database as db
+    from bulk_export import stream_zip
+    
+    nutrition = dict.fromkeys(['calories', 'protein', 'carbs', 'fat', 'fiber', 'iron', 'calcium'], 1.0)
+    plan_data = json.dumps({'weekly_plan': {}, 'selected_ingredients': [],
+                            'weekly_nutrition': nutrition, 'daily_requirements': nutrition})
+    plan_ids = db.save_meal_plans([
+        {'plan_name': f"Bulk test {day}", 'budget': 2000, 'num_children': 20, 'age_group': '3-6 years',
+         'total_cost': 1500.0, 'nutrition_score': 80, 'plan_data': plan_data}
+        for day in range(1, 4)
+    ])
+    conn = db.get_connection()
+    conn.executemany("UPDATE meal_plans SET created_at = ? WHERE id = ?",
+                     [(f"2001-02-0{day} 09:30:00", plan_id) for day, plan_id in enumerate(plan_ids, 1)])
+    conn.commit()
+    conn.close()
+    
+    rows = list(db.iter_meal_plans('2001-02-01', '2001-02-03', batch_size=1))
+    assert [row['id'] for row in rows] == plan_ids[:2]
+    print("✓ Plans streamed by date range")
+    
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_zip(rows, 'pdf', max_workers=2))))
+    assert sorted(archive.namelist()) == [f"2001-02-0{day}/plan_{plan_id}.pdf"
+                                          for day, plan_id in enumerate(plan_ids[:2], 1)]
+    assert all(archive.read(name).startswith(b'%PDF') for name in archive.namelist())
+    assert archive.testzip() is None
+    print("✓ ZIP of PDFs rendered in a process pool")
+    
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_zip(rows, 'json'))))
+    assert json.loads(archive.read(archive.namelist()[0]))['total_cost'] == 1500.0
+    print("✓ JSON entries")
+    
+    print("\n✅ Bulk export tests passed!\n")
+
+@with_temporary_database
+def test_meal_plan_items():
+    """Test saved plans are itemized, aggregated in SQL and backfilled by the migration"""
+    print("Testing meal plan items...")
+    import json
+    import database as db
+    import db_pool
+    import migrations
+    from utils import calculate_ghg_emissions, calculate_plan_ghg_emissions
+    from ai_meal_personalization import MealPersonalizationEngine
+    
+    def item(name, category, grams):
+        return {'ingredient': name, 'category': category, 'quantity_per_child_g': grams / 20,
+                'total_quantity_g': grams, 'cost': grams / 100}
+    
+    meal_plan = {'weekly_plan': {
+        day: {'meals': {'breakfast': {'items': [item('Rice', 'Grains', 1000), item('Milk', 'Dairy', 2000)]},
+                        'lunch': {'items': [item('Rice', 'Grains', 500)]}}}
+        for day in ['Monday', 'Tuesday']
+    }}
+    plan_data = json.dumps(meal_plan)
+    
+    plan_id = db.save_meal_plan("Items test", 2000, 20, '3-6 years', 70.0, 80, plan_data)
+    shopping = {row['ingredient']: row['quantity_g'] for row in db.get_shopping_list(plan_id)}
+    assert shopping == {'Milk': 4000, 'Rice': 3000}
+    assert db.get_plan_category_totals(plan_id) == {'Dairy': 4000, 'Grains': 3000}
+    assert calculate_plan_ghg_emissions(plan_id) == calculate_ghg_emissions(meal_plan) == 11.5
+    print("✓ Shopping list and emissions from SQL aggregates")
+    
+    engine = MealPersonalizationEngine(db.DATABASE_PATH)
+    db.save_feedback(plan_id, 5, "Loved it")
+    db.link_child_plan(999999, plan_id)
+    assert engine.analyze_child_preferences(999999) == {'liked': {'Rice': 4, 'Milk': 2}, 'disliked': {}}
+    db.save_feedback(plan_id, 1, "Refused it")
+    db.save_feedback(plan_id, 3, "Ate some")
+    preferences = engine.analyze_child_preferences(999999)
+    assert preferences == {'liked': {'Rice': 4, 'Milk': 2}, 'disliked': {'Rice': 4, 'Milk': 2}}
+    print("✓ Child affinity counted as feedback is saved")
+    
+    db.rebuild_child_affinity()
+    assert engine.analyze_child_preferences(999999) == preferences
+    print("✓ Rebuilding from history gives the same counts")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "items_test.db")
+        migrations.migrate(path, target=4)
+        conn = db_pool.get_connection(path)
+        conn.execute("INSERT INTO meal_plans (plan_name, plan_data) VALUES ('Old plan', ?)", (plan_data,))
+        conn.commit()
+        assert migrations.migrate(path, target=6) == [5, 6]
+        assert conn.execute("SELECT COUNT(*), SUM(total_g) FROM meal_plan_items").fetchone() == (6, 7000)
+        conn.close()
+        db_pool.close_all()
+    print("✓ Migration backfills existing plans")
+    
+    print("\n✅ Meal plan items tests passed!\n")
+
+@with_temporary_database
+def test_ingredient_catalog():
+    """Test the ingredient catalog reloads only when ingredients change"""
+    print("Testing ingredient catalog...")
+    import database as db
+    from ingredient_catalog import IngredientCatalog
+    
+    catalog = IngredientCatalog()
+    
+    snapshot = catalog.snapshot()
+    assert catalog.snapshot() is snapshot and catalog.loads == 1
+    assert len(snapshot.name_index) == len(snapshot.dataframe) == len(snapshot.nutrient_matrix)
+    print(f"✓ Loaded {len(snapshot.dataframe)} ingredients once")
+    
+    name = snapshot.dataframe['name'].iloc[0]
+    cost = snapshot.get(name)['cost_per_kg']
+    conn = db.get_connection()
+    conn.execute("UPDATE ingredients SET cost_per_kg = ? WHERE name = ?", (cost + 1, name))
+    conn.commit()
+    conn.close()
+    
+    assert catalog.snapshot().get(name)['cost_per_kg'] == cost + 1
+    assert catalog.loads == 2
+    print("✓ Reloaded after an ingredient changed")
+    
+    print("\n✅ Ingredient catalog tests passed!\n")
+
+@with_temporary_database
+def test_index_page_cache():
+    """Test the home page is revalidated by ETag and re-rendered on catalog or language changes"""
+    print("Testing home page cache...")
+    import database as db
+    import flask_app
+    
+    client = flask_test_client()
+    # Page caches are keyed on the catalog version, which restarts with each test database
+    flask_app.catalog.invalidate()
+    flask_app.index_page_cache.clear()
+    flask_app.index_view_cache.clear()
+    
+    first = client.get('/')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag
+    assert 'Cookie' in first.headers.get('Vary', '')
+    repeat = client.get('/', headers={'If-None-Match': etag})
+    assert repeat.status_code == 304 and not repeat.data
+    print("✓ Repeat request with If-None-Match gets a 304")
+    
+    name = flask_app.catalog.dataframe['name'].iloc[0]
+    conn = db.get_connection()
+    conn.execute("UPDATE ingredients SET cost_per_kg = 9999.5 WHERE name = ?", (name,))
+    conn.commit()
+    conn.close()
+    bumped = client.get('/', headers={'If-None-Match': etag})
+    assert bumped.status_code == 200 and bumped.headers['ETag'] != etag
+    assert '₹9999.5/kg' in bumped.get_data(as_text=True)
+    assert len(flask_app.index_page_cache) == 1
+    print("✓ Catalog version bump re-renders the page")
+    
+    etag = bumped.headers['ETag']
+    client.get('/set_language/hi')
+    translated = client.get('/', headers={'If-None-Match': etag})
+    assert translated.status_code == 200 and translated.headers['ETag'] != etag
+    assert client.get('/', headers={'If-None-Match': translated.headers['ETag']}).status_code == 304
+    client.get('/set_language/en')
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+    print("✓ Language change serves that language's page")
+    
+    print("\n✅ Home page cache tests passed!\n")
+
+def test_growth_standards():
+    """Test WHO z-scores against the WHO igrowup example survey results"""
+    print("Testing WHO growth standards...")
+    import pandas as pd
+    import database as db
+    import growth_standards as gs
+    
+    ref = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'who_igrowup_survey_zscores.csv'))
+    scores = gs.calculate_zscores(
+        ref['age_days'], ref['sex'], ref['weight_kg'], ref['height_cm'],
+        measured_lying=ref['measure'].map({'l': True, 'h': False}),
+        oedema=ref['oedema']
+    )
+    
+    for z in ['waz', 'haz', 'whz', 'baz']:
+        # Only scores igrowup computed (whz stops at 1826 days there)
+        both = scores[z].notna() & ref[z].notna()
+        assert both.sum() > 400
+        assert (scores[z][both].round(2) - ref[z][both]).abs().max() < 0.0101, z
+    print(f"✓ Z-scores match WHO igrowup for {both.sum()} survey children")
+    
+    # Median child scores zero
+    z = gs.calculate_zscores([0], ['male'], weight_kg=[3.3464])['waz'][0]
+    assert abs(z) < 1e-9
+    print("✓ Median weight at birth scores 0")
+    
+    # WHO 2007 reference past 61 months: median 8-year-old boy (96 months)
+    older = gs.calculate_zscores([96 * gs.DAYS_PER_MONTH], ['male'], weight_kg=[25.4163], height_cm=[127.2651])
+    assert abs(older['waz'][0]) < 1e-9 and abs(older['haz'][0]) < 1e-9 and older['baz'].notna().all()
+    print("✓ Children over 5 scored against the WHO 2007 reference")
+    
+    # Every child classified: by BMI-for-age past 10, the old approximation past 19
+    scores = db.calculate_who_z_scores_series([96, 150, 250], [14, 38, 120], [120, 150, 170],
+                                              ['Male', 'Female', 'Male'])
+    assert scores[['weight_for_age', 'height_for_age']].notna().all().all()
+    assert scores['weight_for_height'].isna().all()
+    assert list(scores['status']) == ['Severely Underweight', 'Normal', 'Normal']
+    assert db.calculate_who_z_scores(150, 28, 150, 'Female')['status'] == 'Severely Underweight'
+    print("✓ Status for every age, no 'Unknown'")
+    
+    print("\n✅ Growth standards tests passed!\n")
+
+@with_temporary_database
+def test_growth_data():
+    """Test growth series velocities and z-scores, and that /api/growth-data is valid JSON"""
+    print("Testing growth data...")
+    import database as db
+    
+    older = db.add_child("Growth Test A", "2015-01-01", "Male", "", "", "", "Test Village")
+    single = db.add_child("Growth Test B", "2023-01-01", "Female", "", "", "", "Test Village")
+    db.add_growth_measurement(older, "2021-01-01", 20.0, 115.0)
+    db.add_growth_measurement(older, "2021-07-02", 21.5, 118.0)
+    db.add_growth_measurement(single, "2024-01-01", 9.0, 75.0)
+    
+    series = db.get_growth_series(older)
+    assert list(series['age_months']) == [72, 77]
+    assert series['weight_velocity'].isna().iloc[0] and series['weight_velocity'].iloc[1] == 0.25
+    assert series['height_velocity'].iloc[1] == 0.5
+    assert series[['weight_for_age_z', 'height_for_age_z', 'bmi_for_age_z']].notna().all().all()
+    assert series['weight_for_height_z'].isna().all()
+    assert 'Unknown' not in set(series['who_status'])
+    print("✓ Velocities and WHO 2007 z-scores for a child over 5")
+    
+    client = flask_test_client()
+    data = strict_json(client.get(f'/api/growth-data/{older}'))
+    chart = data['chart_data']
+    assert data['success'] and chart['weight_velocity'] == [0.25] and chart['height_velocity'] == [0.5]
+    assert chart['weight_for_height_z'] == [None, None]
+    assert None not in chart['weight_for_age_z'] + chart['height_for_age_z']
+    assert data['latest']['weight_for_height_z'] is None and data['who_status'] != 'Unknown'
+    print("✓ Missing z-scores served as null, not NaN")
+    
+    data = strict_json(client.get(f'/api/growth-data/{single}'))
+    assert data['chart_data']['weight_velocity'] == [] and data['chart_data']['height_velocity'] == []
+    assert len(data['history']) == 1 and data['latest']['weight_velocity'] is None
+    assert strict_json(client.get('/api/growth-data/999999'))['who_status'] == 'No data'
+    print("✓ Single measurement and unknown child")
+    
+    print("\n✅ Growth data tests passed!\n")
+
+@with_temporary_database
+def test_risk_screening():
+    """Test batch malnutrition screening agrees with the per-child prediction"""
+    print("Testing malnutrition risk screening...")
+    import database as db
+    from predictive_analytics import PredictiveAnalytics
+    
+    analytics = PredictiveAnalytics(db.DATABASE_PATH)
+    
+    growing = db.add_child("Screening Test A", "2022-01-01", "Male", "", "", "", "Test Village")
+    losing = db.add_child("Screening Test B", "2022-01-01", "Female", "", "", "", "Test Village")
+    new = db.add_child("Screening Test C", "2022-01-01", "Female", "", "", "", "Test Village")
+    for month in range(1, 9):
+        db.add_growth_measurement(growing, f"2024-{month:02d}-01", 10 + month * 0.3, 80 + month)
+        db.add_growth_measurement(losing, f"2024-{month:02d}-01", 11 - month * 0.2, 80)
+    db.add_growth_measurement(new, "2024-01-01", 10, 80)
+    
+    summary = analytics.screen_malnutrition_risk()
+    assert summary['children'] >= 3
+    
+    listed = analytics.get_risk_snapshots(village="Test Village", per_page=2)
+    assert listed['screening_id'] == summary['screening_id']
+    assert listed['total'] == 3 and listed['pages'] == 2
+    assert listed['children'][0]['risk_score'] >= listed['children'][1]['risk_score']
+    
+    rows = analytics.get_risk_snapshots(village="Test Village", per_page=10)['children']
+    for row in rows:
+        single = analytics.predict_malnutrition_risk(row['child_id'])
+        assert row['risk_level'] == single['risk_level']
+        if single['risk_level'] != 'Unknown':
+            assert row['risk_score'] == single['risk_score']
+            assert row['reasons'] == single['reasons']
+    assert rows[-1]['child_id'] == new and rows[-1]['risk_level'] == 'Unknown'
+    print(f"✓ Screened {summary['children']} children, matching per-child predictions")
+    
+    print("\n✅ Risk screening tests passed!\n")
+
+def test_migrations():
+    """Test schema migrations apply once and are then skipped"""
+    print("Testing schema migrations...")
+    import db_pool
+    import migrations
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "migrations_test.db")
+        assert migrations.migrate(path) == [m[0] for m in migrations.MIGRATIONS]
+        assert migrations.migrate(path) == []
+        
+        conn = db_pool.get_connection(path)
+        assert migrations.current_version(conn) == migrations.LATEST_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM ingredients").fetchone()[0] > 0
+        conn.close()
+        db_pool.close_all()
+    print(f"✓ Migrated a new database to version {migrations.LATEST_VERSION} once")
+    
+    print("\n✅ Migration tests passed!\n")
+
+@with_temporary_database
+def test_query_plans():
+    """Test the hot queries use indexes instead of full table scans"""
+    print("Testing query plans...")
+    import database as db
+    
+    for name, result in db.check_query_plans().items():
+        # Every table the hot queries read is created by the migrations
+        assert 'skipped' not in result, f"{name}: {result.get('skipped')}"
+        assert not result['full_scans'], f"{name}: {result['full_scans']}"
+        print(f"✓ {name}: no full table scan")
+    
+    # Scans of a table (also inside a subquery) are still reported
+    db.HOT_QUERIES['unindexed'] = ("""
+        SELECT * FROM (SELECT plan_name FROM meal_plans WHERE budget > ? GROUP BY plan_name) names
+        ORDER BY plan_name
+    """, (0,))
+    try:
+        assert db.check_query_plans()['unindexed']['full_scans'] == ['SCAN meal_plans']
+    finally:
+        del db.HOT_QUERIES['unindexed']
+    print("✓ Full table scans are reported")
+    
+    conn = db.get_connection()
+    assert not {name for name, (table, _) in db.INDEXES.items()} - {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+    conn.close()
+    print("✓ Every registered index exists")
+    
+    print("\n✅ Query plan tests passed!\n")
+
+@with_temporary_database
+def test_search_index():
+    """Test full-text search ranking, prefixes, aliases, typos and trigger sync"""
+    print("Testing full-text search...")
+    import database as db
+
+
+    def titles(query, source):
+        return [r['title'] for r in db.search_all(query, [source])]
+
+    assert titles("moong", 'ingredient')[0] == 'Moong Dal'
+    assert 'Ragi (Finger Millet)' in titles("fing mil", 'ingredient')
+    print("✓ Prefix matches ranked with BM25")
+
+    assert titles("palak", 'ingredient')[0] == 'Spinach (Palak)'
+    assert 'Rice' in titles("akki", 'ingredient') and 'Rice' in titles("chawal", 'ingredient')
+    assert 'Toor Dal' in titles("arhar", 'ingredient')
+    print("✓ Hindi/Kannada transliterations match")
+
+    assert titles("spinnach", 'ingredient')[0] == 'Spinach (Palak)'
+    assert titles("malnutriton", 'health')[0] == 'Malnutrition'
+    print("✓ Misspelt words corrected")
+
+    assert db.search_index.query_terms("rice - . moong") == ['rice', 'moong']
+    assert titles("rice -", 'ingredient') == titles("rice .", 'ingredient') == titles("rice", 'ingredient')
+    assert 'Rice' in titles("rice -", 'ingredient')
+    assert db.search_index.match_expression("- .") == ''
+    print("✓ Stray punctuation ignored")
+
+    health = db.search_health_info("diarrhoea")
+    assert not health.empty and 'diarrh' in health.iloc[0]['disease_name'].lower()
+    assert db.search_health_info("zzzz").empty
+    assert any(r['source'] == 'recipe' for r in db.search_all("khichdi"))
+    print("✓ Health information and recipes searchable")
+
+    conn = db.get_connection()
+    conn.execute("UPDATE ingredients SET name = 'Spinach (Palak Soppu)' WHERE name = 'Spinach (Palak)'")
+    assert db.search_index.search(conn, "soppu", ['ingredient'])[0]['title'] == 'Spinach (Palak Soppu)'
+    conn.rollback()
+    conn.close()
+    print("✓ Index follows ingredient changes")
+
+    print("\n✅ Full-text search tests passed!\n")
+
+def test_db_pool():
+    """Test nested checkouts keep the outer transaction and the outermost close rolls back"""
+    print("Testing connection pool...")
+    import db_pool
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "pool_test.db")
+        
+        def count():
+            conn = db_pool.get_connection(path)
+            rows = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            conn.close()
+            return rows
+        
+        outer = db_pool.get_connection(path)
+        outer.execute("CREATE TABLE items (name TEXT)")
+        outer.commit()
+        
+        # A helper's get/close inside the outer transaction leaves it open
+        outer.execute("INSERT INTO items VALUES ('rice')")
+        inner = db_pool.get_connection(path)
+        assert inner is outer
+        inner.close()
+        assert outer.in_transaction
+        assert count() == 1
+        outer.commit()
+        print("✓ Nested close keeps the outer transaction")
+        
+        # The outermost close discards uncommitted work
+        outer.execute("INSERT INTO items VALUES ('dal')")
+        outer.close()
+        assert not outer.in_transaction
+        assert count() == 1
+        print("✓ Outermost close rolls back")
+        
+        # A checkout that was never closed is reset at the request/job boundary
+        leaked = db_pool.get_connection(path)
+        leaked.execute("INSERT INTO items VALUES ('milk')")
+        db_pool.release_thread()
+        assert not leaked.in_transaction and leaked.checkouts == 0
+        assert count() == 1
+        print("✓ release_thread resets leaked checkouts")
+        
+        db_pool.close_all()
+    
+    print("\n✅ Connection pool tests passed!\n")
+
+def test_session_store():
+    """Test server-side sessions keep only the session id in the cookie"""
+    print("Testing server-side sessions...")
+    from datetime import timedelta
+    from flask import Flask, session
+    import db_pool
+    import migrations
+    from session_store import SQLiteSessionInterface
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions_test.db")
+        migrations.migrate(path)
+        
+        app = Flask(__name__)
+        app.secret_key = "test"
+        app.session_interface = SQLiteSessionInterface(path)
+        
+        @app.route('/set/<int:plan_id>')
+        def set_plan(plan_id):
+            session['plan_id'] = plan_id
+            return ''
+        
+        @app.route('/get')
+        def get_plan():
+            return str(session.get('plan_id'))
+        
+        @app.route('/clear')
+        def clear():
+            session.clear()
+            return ''
+        
+        @app.route('/lang')
+        def get_language():
+            return session['language'] if 'language' in session else 'en'
+        
+        @app.route('/static-page')
+        def static_page():
+            return ''
+        
+        client = app.test_client()
+        response = client.get('/set/42')
+        cookie = response.headers['Set-Cookie'].split(';')[0]
+        assert len(cookie) < 64 and '42' not in cookie
+        assert client.get('/get').text == '42'
+        assert app.test_client().get('/get').text == 'None'
+        print(f"✓ Cookie holds only the session id ({len(cookie)} bytes)")
+        
+        # Responses that read the session must not be shared between users by caches
+        assert 'Cookie' in client.get('/get').headers.get('Vary', '')
+        assert 'Cookie' in client.get('/lang').headers.get('Vary', '')
+        assert 'Cookie' not in client.get('/static-page').headers.get('Vary', '')
+        print("✓ Read-only session use sets Vary: Cookie")
+        
+        conn = db_pool.get_connection(path)
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 1
+        conn.execute("UPDATE sessions SET expires_at = 0")
+        conn.commit()
+        assert client.get('/get').text == 'None'
+        assert app.session_interface.prune() == 1
+        print("✓ Expired sessions ignored and pruned")
+        
+        client.get('/set/7')
+        client.get('/clear')
+        assert conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+        conn.close()
+        db_pool.close_all()
+        print("✓ Cleared session deleted")
+    
+    print("\n✅ Session store tests passed!\n")
+
+def test_subsystems():
+    """Test lazy subsystems load once, on first use"""
+    print("Testing lazy subsystems...")
+    from subsystems import SubsystemRegistry
+    
+    registry = SubsystemRegistry()
+    calls = []
+    
+    @registry.loader('feature')
+    def load_feature():
+        calls.append(1)
+        return object()
+    
+    @registry.loader('broken')
+    def load_broken():
+        raise ImportError("missing dependency")
+    
+    assert not registry.is_loaded('feature') and not calls
+    assert registry.get('feature') is registry.get('feature') and len(calls) == 1
+    assert registry.get('broken') is None
+    assert registry.status()['broken']['available'] is False
+    print("✓ Loaded on first use, once; failures give None")
+    
+    print("\n✅ Subsystem tests passed!\n")
+
+@with_temporary_database
+def test_unavailable_subsystems():
+    """Test routes answer 503 when their subsystem failed to load"""
+    print("Testing unavailable subsystems...")
+    import flask_app
+    from subsystems import SubsystemRegistry
+    
+    client = flask_test_client()
+    registry = SubsystemRegistry()
+    for name in ['chatbot', 'usda', 'who', 'gamification', 'food_blockchain', 'supply_dashboard']:
+        @registry.loader(name)
+        def load_broken():
+            raise ImportError("missing dependency")
+    
+    loaded = flask_app.subsystems
+    flask_app.subsystems = registry
+    try:
+        for method, url, body in [
+            ('get', '/who-vaccines', None),
+            ('get', '/api/who-vaccine-info?vaccine=BCG', None),
+            ('get', '/api/who-disease-info?disease=Measles', None),
+            ('get', '/api/usda-search?q=rice', None),
+            ('get', '/api/usda-details/1', None),
+            ('post', '/api/usda-compare', {'foods': ['rice']}),
+            ('post', '/api/chatbot', {'message': 'hi'}),
+            ('post', '/api/chatbot/meal-advice', {}),
+            ('post', '/api/chatbot/suggest-alternatives', {'ingredient': 'rice'}),
+            ('get', '/api/gamification/leaderboard', None),
+            ('get', '/api/blockchain/track/rice', None),
+            ('get', '/api/blockchain/stats', None),
+        ]:
+            response = getattr(client, method)(url, json=body)
+            assert response.status_code == 503, (url, response.status_code)
+            assert 'error' in response.get_json()
+    finally:
+        flask_app.subsystems = loaded
+    print("✓ Every lazily loaded subsystem route returns a 503 JSON error")
+    
+    print("\n✅ Unavailable subsystem tests passed!\n")
+
+@with_temporary_database
+def test_job_queue():
+    """Test background jobs run and record progress and results"""
+    print("Testing job queue...")
+    import database as db
+    from job_queue import JobQueue
+    
+    queue = JobQueue(num_workers=1)
+    
+    def double(params, progress):
+        progress(1, 1)
+        return {'value': params['value'] * 2}
+    
+    def broken(params, progress):
+        raise ValueError("bad input")
+    
+    queue.register('double', double)
+    queue.register('broken', broken)
+    
+    ok_id = queue.submit('double', {'value': 21}, total=1)
+    bad_id = queue.submit('broken', {})
+    assert db.get_job(ok_id)['status'] == 'queued'
+    
+    # Run the queued jobs in this thread
+    for _ in range(2):
+        queue.run_job(db.claim_next_job())
+    assert db.claim_next_job() is None
+    
+    job = db.get_job(ok_id)
+    assert job['status'] == 'done' and job['result'] == {'value': 42}
+    assert job['progress'] == 1
+    assert db.get_job(bad_id)['status'] == 'failed'
+    print("✓ Jobs completed and failures recorded")
+    
+    print("\n✅ Job queue tests passed!\n")
+
+def test_usda_cache():
+    """Test the USDA response cache against a local stub FDC server"""
+    print("Testing USDA response cache...")
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlparse, parse_qs
+    import db_pool
+    from usda_api import USDAFoodAPI, FDCResponseCache
+    
+    hits = []
+    foods = {
+        fdc_id: {'fdcId': fdc_id, 'description': name, 'foodNutrients': [
+            {'nutrient': {'name': 'Protein', 'unitName': 'g'}, 'amount': protein}
+        ]}
+        for fdc_id, name, protein in [(1, 'Rice, white', 7.1), (2, 'Wheat flour', 12.0), (3, 'Lentils', 24.6)]
+    }
+    
+    class StubFDC(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            url = urlparse(self.path)
+            if url.path == '/fdc/v1/foods/search':
+                query = parse_qs(url.query)['query'][0]
+                matches = [food for food in foods.values() if query.lower() in food['description'].lower()]
+                self.reply(200, {'foods': matches})
+            elif url.path.startswith('/fdc/v1/food/') and int(url.path.rsplit('/', 1)[1]) in foods:
+                self.reply(200, foods[int(url.path.rsplit('/', 1)[1])])
+            else:
+                self.reply(404, {})
+        
+        def do_POST(self):
+            hits.append(self.path)
+            request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            self.reply(200, [foods[i] for i in request['fdcIds'] if i in foods])
+        
+        def reply(self, status, body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps(body).encode())
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubFDC)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/fdc/v1"
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = FDCResponseCache(os.path.join(tmp, "usda_cache.db"))
+        api = USDAFoodAPI("test-key", base_url=base_url, cache=cache)
+        
+        assert api.search_foods("rice")[0]['fdc_id'] == 1
+        assert api.search_foods("rice")[0]['name'] == 'Rice, white'
+        assert api.get_nutrition_summary(1)['protein'] == 7.1
+        assert api.get_nutrition_summary(1)['protein'] == 7.1
+        assert len(hits) == 2
+        print("✓ Repeat requests served from cache")
+        
+        assert api.search_foods("nothing") == [] and api.search_foods("nothing") == []
+        assert api.get_food_details(999) is None and api.get_food_details(999) is None
+        assert len(hits) == 4
+        print("✓ Empty searches and unknown ids negatively cached")
+        
+        offline = USDAFoodAPI(None, base_url=base_url, cache=cache, offline=True)
+        assert offline.search_foods("rice")[0]['fdc_id'] == 1
+        assert offline.search_foods("lentils") == []
+        assert len(hits) == 4
+        print("✓ Offline mode serves cache only")
+        
+        stale = USDAFoodAPI("test-key", base_url=base_url, cache=cache, ttls={'search': 0})
+        stale.search_foods("white")  # cached with a zero TTL
+        assert stale.search_foods("white")[0]['fdc_id'] == 1
+        stale.wait_for_refreshes(timeout=5)
+        assert stale.stats['stale'] == 1 and len(hits) == 6
+        print("✓ Stale responses served while refreshing in the background")
+        
+        hits.clear()
+        fresh = USDAFoodAPI("test-key", base_url=base_url,
+                            cache=FDCResponseCache(os.path.join(tmp, "fresh_cache.db")))
+        comparison = fresh.compare_foods(["rice", "wheat", "lentils", "nothing"])
+        assert {name: c['protein'] for name, c in comparison.items()} == {
+            'rice': 7.1, 'wheat': 12.0, 'lentils': 24.6
+        }
+        assert sorted(path.split('?')[0] for path in hits) == ['/fdc/v1/foods'] + ['/fdc/v1/foods/search'] * 4
+        assert fresh.get_food_details(3)['name'] == 'Lentils' and len(hits) == 5
+        print("✓ compare_foods fetched all details in one bulk request")
+        
+        db_pool.close_all()
+    server.shutdown()
+    
+    print("\n✅ USDA cache tests passed!\n")
+
+def test_fdc_local():
+    """Test importing FDC bulk downloads and serving them offline"""
+    print("Testing local FDC store...")
+    import json
+    import zipfile
+    import db_pool
+    from fdc_local import import_fdc, iter_json_foods, LocalFDCStore
+    from usda_api import USDAFoodAPI, FDCResponseCache
+
+    csv_files = {
+        'food_category.csv': 'id,code,description\n20,2000,Cereal Grains and Pasta\n',
+        'measure_unit.csv': 'id,name\n1000,cup\n9999,undetermined\n',
+        'nutrient.csv': 'id,name,unit_name,nutrient_nbr,rank\n'
+                        '1003,Protein,G,203,600\n1008,Energy,KCAL,208,300\n1089,"Iron, Fe",MG,303,5400\n',
+        'food.csv': 'fdc_id,data_type,description,food_category_id,publication_date\n'
+                    '168877,sr_legacy_food,"Rice, white, long-grain, raw",20,2019-04-01\n'
+                    '168878,sr_legacy_food,"Rice, brown, long-grain, raw",20,2019-04-01\n'
+                    '900001,branded_food,"RICE CRISPS",,2021-10-28\n',
+        'branded_food.csv': 'fdc_id,brand_owner,branded_food_category,serving_size,'
+                            'serving_size_unit,household_serving_fulltext\n'
+                            '900001,Acme Foods,Snacks,28,g,1 oz\n',
+        'food_nutrient.csv': 'id,fdc_id,nutrient_id,amount\n'
+                             + ''.join(f"{i},{fdc_id},{nutrient},{amount}\n" for i, (fdc_id, nutrient, amount) in enumerate([
+                                 (168877, 1003, 7.13), (168877, 1008, 365), (168877, 1089, 0.8),
+                                 (168878, 1003, 7.54), (168878, 1008, 367), (900001, 1003, 7.1)
+                             ])),
+        'food_portion.csv': 'id,fdc_id,seq_num,amount,measure_unit_id,portion_description,modifier,gram_weight\n'
+                            '85001,168877,1,1,1000,,,185\n'
+    }
+    foundation = {'FoundationFoods': [{
+        'fdcId': 2003590, 'dataType': 'Foundation', 'description': 'Lentils, dry',
+        'foodCategory': {'description': 'Legumes and Legume Products'},
+        'foodNutrients': [{'nutrient': {'id': 1003, 'name': 'Protein', 'unitName': 'g', 'rank': 600},
+                           'amount': 23.6}],
+        'foodPortions': [{'id': 1, 'amount': 1, 'measureUnit': {'name': 'cup'}, 'gramWeight': 192}]
+    }]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_zip = os.path.join(tmp, 'sr_legacy_csv.zip')
+        with zipfile.ZipFile(csv_zip, 'w') as archive:
+            for name, content in csv_files.items():
+                archive.writestr(f"FoodData_Central_csv/{name}", content)
+        json_path = os.path.join(tmp, 'foundation.json')
+        with open(json_path, 'w') as f:
+            json.dump(foundation, f, indent=2)
+
+        with open(json_path) as f:
+            assert [food['fdcId'] for food in iter_json_foods(f, chunk_chars=16)] == [2003590]
+        print("✓ JSON foods streamed one at a time")
+
+        db_path = os.path.join(tmp, 'fdc_local.db')
+        counts = import_fdc([csv_zip, json_path], db_path, chunk_rows=2)
+        assert counts == {'food': 4, 'nutrient': 3, 'food_nutrient': 7, 'portion': 3}
+        assert import_fdc([csv_zip], db_path, chunk_rows=2)['food'] == 3  # re-import replaces
+        print(f"✓ Imported in chunks: {counts}")
+
+        # Offline, no key and an empty cache: everything must come from the local store
+        api = USDAFoodAPI(None, offline=True, local=LocalFDCStore(db_path),
+                          cache=FDCResponseCache(os.path.join(tmp, 'usda_cache.db')))
+        rice = api.search_foods("rice raw")
+        assert sorted(r['fdc_id'] for r in rice) == [168877, 168878]
+        assert rice[0]['category'] == 'Cereal Grains and Pasta'
+        assert api.search_foods("rice", data_types=['Branded'])[0]['brand'] == 'Acme Foods'
+        assert api.search_foods("chawal white")[0]['fdc_id'] == 168877  # Hindi alias
+        details = api.get_food_details(168877)
+        assert details['nutrients']['Energy'] == {'value': 365, 'unit': 'kcal'}
+        assert details['portions'] == [{'description': '1 cup', 'gram_weight': 185}]
+        assert api.get_nutrition_summary(2003590)['protein'] == 23.6
+        comparison = api.compare_foods(["white rice", "lentils", "nothing"])
+        assert {name: c['protein'] for name, c in comparison.items()} == {'white rice': 7.13, 'lentils': 23.6}
+        assert api.stats['misses'] == 0 and api.stats['offline_misses'] == 1
+        print("✓ Searches and details answered offline from the local store")
+
+        db_pool.close_all()
+
+    print("\n✅ Local FDC store tests passed!\n")
+
 def test_utils():
     """Test utility functions"""
     print("Testing utilities...")
@@ -267,8 +1322,31 @@ def run_all_tests():
         'Configuration': test_config(),
         'Database': test_database(),
         'Database Content': test_database_content(),
+        'Migrations': run_test(test_migrations),
+        'Query Plans': run_test(test_query_plans),
+        'Full-Text Search': run_test(test_search_index),
         'Utilities': test_utils(),
         'Optimizer': test_optimizer(),
+        'Solver Backends': run_test(test_solver_backends),
+        'Whole-Week Plan': run_test(test_whole_week_plan),
+        'Batch Plans': run_test(test_batch_plans),
+        'Plan Cache': run_test(test_plan_cache),
+        'Plan Cache Reuse': run_test(test_plan_cache_reuse),
+        'Export Cache': run_test(test_export_cache),
+        'Bulk Export': run_test(test_bulk_export),
+        'Meal Plan Items': run_test(test_meal_plan_items),
+        'Job Queue': run_test(test_job_queue),
+        'Lazy Subsystems': run_test(test_subsystems),
+        'Unavailable Subsystems': run_test(test_unavailable_subsystems),
+        'Connection Pool': run_test(test_db_pool),
+        'Session Store': run_test(test_session_store),
+        'USDA Cache': run_test(test_usda_cache),
+        'Local FDC Store': run_test(test_fdc_local),
+        'Growth Standards': run_test(test_growth_standards),
+        'Growth Data': run_test(test_growth_data),
+        'Risk Screening': run_test(test_risk_screening),
+        'Ingredient Catalog': run_test(test_ingredient_catalog),
+        'Home Page Cache': run_test(test_index_page_cache),
     }
     
     print("=" * 60)
@@ -6,14 +6,15 @@ Uses Google Translate API for dynamic translations
 
 import os
 import json
+import importlib.util
 from typing import Dict, Optional
 from functools import lru_cache
 
-try:
-    from googletrans import Translator
-    TRANSLATOR_AVAILABLE = True
-except ImportError:
-    TRANSLATOR_AVAILABLE = False
+# googletrans takes ~0.15s to import and is only needed for dynamic text,
+# so it is imported on the first translate() call (pre-translated keys
+# never need it)
+TRANSLATOR_AVAILABLE = importlib.util.find_spec('googletrans') is not None
+if not TRANSLATOR_AVAILABLE:
     print("⚠️ googletrans not installed. Run: pip install googletrans==4.0.0-rc1")
 
 # Supported languages
@@ -95,6 +96,7 @@ TRANSLATIONS = {
     'generate_meal_plan': 'Generate Meal Plan',
     'optimizing_meal_plan': 'Optimizing meal plan...',
     'this_may_take': 'This may take 10-20 seconds',
+    'days_planned': 'days planned',
     'download_csv': 'Download CSV',
     'download_pdf': 'Download PDF',
     'download_json': 'Download JSON',
@@ -175,6 +177,7 @@ TRANSLATIONS = {
     'generate_meal_plan': 'भोजन योजना बनाएं',
     'optimizing_meal_plan': 'भोजन योजना अनुकूलित की जा रही है...',
     'this_may_take': 'यह 10-20 सेकंड ले सकता है',
+    'days_planned': 'दिन की योजना तैयार',
     'download_csv': 'CSV डाउनलोड करें',
     'download_pdf': 'PDF डाउनलोड करें',
     'download_json': 'JSON डाउनलोड करें',
@@ -421,12 +424,20 @@ class TranslationService:
     
     def __init__(self):
         """Initialize the translation service"""
-        self.translator = None
-        if TRANSLATOR_AVAILABLE:
+        self._translator = None
+        self._translator_failed = False
+    
+    @property
+    def translator(self):
+        """Google Translate client, created on first use (None if unavailable)"""
+        if self._translator is None and TRANSLATOR_AVAILABLE and not self._translator_failed:
             try:
-                self.translator = Translator()
+                from googletrans import Translator
+                self._translator = Translator()
             except Exception as e:
+                self._translator_failed = True
                 print(f"⚠️ Translation service initialization failed: {e}")
+        return self._translator
     
     @lru_cache(maxsize=1000)
     def translate(self, text: str, target_lang: str, source_lang: str = 'en') -> str:
@@ -3,40 +3,284 @@ USDA FoodData Central API Integration
 Provides accurate nutrition information for foods
 """
 
+import os
+import threading
+import time
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
+from db_pool import get_connection
+from fdc_local import LocalFDCStore
+
+DAY = 24 * 60 * 60
+
+# How long cached responses are fresh, by request type (FDC data rarely changes)
+CACHE_TTLS = {
+    'search': 7 * DAY,
+    'food': 30 * DAY,
+    'negative': DAY  # empty searches and unknown FDC ids
+}
+
+# After expiring, a response is still served for this long while it is
+# refreshed in the background (stale-while-revalidate)
+STALE_WHILE_REVALIDATE = 7 * DAY
+
+# Concurrent FDC requests (and pooled keep-alive connections) per client
+MAX_CONCURRENT_REQUESTS = 10
+
+# fdcIds per bulk /foods request (FDC's limit)
+BULK_FOODS_LIMIT = 20
+
+# Data types searched by default (most reliable data)
+SEARCH_DATA_TYPES = ['Foundation', 'SR Legacy']
+
+
+class FDCResponseCache:
+    """
+    SQLite cache of raw FoodData Central JSON responses
+    
+    Kept in its own file (USDA_CACHE_PATH, default usda_cache.db) rather
+    than the app database, so it can be deleted at any time.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get('USDA_CACHE_PATH', 'usda_cache.db')
+        conn = get_connection(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS fdc_responses (
+                key TEXT PRIMARY KEY,
+                body TEXT,
+                negative INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached entry {'body', 'negative', 'fetched_at', 'expires_at'}, or None"""
+        conn = get_connection(self.db_path)
+        row = conn.execute(
+            "SELECT body, negative, fetched_at, expires_at FROM fdc_responses WHERE key = ?", (key,)
+        ).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        return {
+            'body': json.loads(row[0]) if row[0] is not None else None,
+            'negative': bool(row[1]),
+            'fetched_at': row[2],
+            'expires_at': row[3]
+        }
+    
+    def put(self, key: str, body, ttl: float, negative: bool = False):
+        """Store a response (body None for not-found) for ttl seconds"""
+        now = time.time()
+        conn = get_connection(self.db_path)
+        conn.execute("""
+            INSERT OR REPLACE INTO fdc_responses (key, body, negative, fetched_at, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+        """, (key, json.dumps(body) if body is not None else None, int(negative), now, now + ttl))
+        conn.commit()
+        conn.close()
+    
+    def prune(self, max_age: float = STALE_WHILE_REVALIDATE) -> int:
+        """Delete entries that expired more than max_age seconds ago"""
+        conn = get_connection(self.db_path)
+        count = conn.execute(
+            "DELETE FROM fdc_responses WHERE expires_at < ?", (time.time() - max_age,)
+        ).rowcount
+        conn.commit()
+        conn.close()
+        return count
+    
+    def clear(self):
+        conn = get_connection(self.db_path)
+        conn.execute("DELETE FROM fdc_responses")
+        conn.commit()
+        conn.close()
+
+
 class USDAFoodAPI:
-    """Wrapper for USDA FoodData Central API"""
+    """
+    Wrapper for USDA FoodData Central API
+    
+    Responses are cached on disk (see FDCResponseCache and CACHE_TTLS).
+    Expired responses are served while a background refresh runs, and if
+    FDC can't be reached. With offline=True nothing is requested and only
+    cached responses are served, however old.
+    
+    Requests share one keep-alive requests.Session. compare_foods and
+    suggest_alternatives search in parallel and fetch all details with one
+    bulk /foods call, so their latency no longer grows with the number of
+    foods.
+    
+    With a local store (fdc_local.LocalFDCStore, imported from the FDC
+    bulk downloads) searches and details are answered from it first; only
+    foods it doesn't have go to the cache and FDC.
+    """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: Optional[str], base_url: str = "https://api.nal.usda.gov/fdc/v1",
+                 cache: Optional[FDCResponseCache] = None, offline: bool = False,
+                 ttls: Optional[Dict[str, float]] = None,
+                 stale_seconds: float = STALE_WHILE_REVALIDATE,
+                 local: Optional[LocalFDCStore] = None):
         self.api_key = api_key
-        self.base_url = "https://api.nal.usda.gov/fdc/v1"
+        self.base_url = base_url
+        self.cache = cache if cache is not None else FDCResponseCache()
+        self.offline = offline
+        self.ttls = {**CACHE_TTLS, **(ttls or {})}
+        self.stale_seconds = stale_seconds
+        self.local = local
+        self.stats = {'local_hits': 0, 'hits': 0, 'stale': 0, 'misses': 0, 'offline_misses': 0}
+        self._stats_lock = threading.Lock()
+        self._refreshing = {}
+        self._refresh_lock = threading.Lock()
+        
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=MAX_CONCURRENT_REQUESTS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+    
+    def _cache_key(self, path: str, params: Dict) -> str:
+        return f"{path}?{json.dumps(params, sort_keys=True)}"
     
-    def search_foods(self, query: str, page_size: int = 10) -> List[Dict]:
+    def _cached(self, key: str, path: str, params: Dict, ttl_name: str):
+        """
+        (found, body, entry) for a cache lookup
+        
+        found is True when the cached body should be used as is: fresh, in
+        offline mode, or stale (a background refresh is started). entry is
+        the expired entry otherwise, if any, as a fallback for failures.
+        """
+        entry = self.cache.get(key)
+        now = time.time()
+        
+        if entry and (entry['expires_at'] > now or self.offline):
+            self._count('hits')
+            return True, entry['body'], entry
+        if self.offline:
+            self._count('offline_misses')
+            return True, None, None
+        if entry and entry['expires_at'] + self.stale_seconds > now:
+            self._count('stale')
+            self._revalidate(key, path, params, ttl_name)
+            return True, entry['body'], entry
+        
+        self._count('misses')
+        return False, None, entry
+    
+    def _get_json(self, path: str, params: Dict, ttl_name: str):
+        """
+        FDC JSON for path/params, from the cache when possible
+        
+        Returns None for not-found responses (and offline cache misses).
+        Raises requests.exceptions.RequestException if FDC fails and
+        nothing is cached.
+        """
+        key = self._cache_key(path, params)
+        found, body, entry = self._cached(key, path, params, ttl_name)
+        if found:
+            return body
+        
+        try:
+            return self._fetch(key, path, params, ttl_name)
+        except requests.exceptions.RequestException:
+            if entry:
+                # Old data beats no data while FDC is unreachable
+                return entry['body']
+            raise
+    
+    def _fetch(self, key: str, path: str, params: Dict, ttl_name: str):
+        """Request path from FDC and cache the response"""
+        response = self.session.get(f"{self.base_url}{path}",
+                                    params={**params, 'api_key': self.api_key}, timeout=10)
+        if response.status_code == 404:
+            self.cache.put(key, None, self.ttls['negative'], negative=True)
+            return None
+        response.raise_for_status()
+        data = response.json()
+        
+        negative = isinstance(data, dict) and 'foods' in data and not data['foods']
+        self.cache.put(key, data, self.ttls['negative' if negative else ttl_name], negative=negative)
+        return data
+    
+    def _fetch_bulk(self, fdc_ids: List[int]) -> Dict[int, Optional[Dict]]:
+        """Request up to BULK_FOODS_LIMIT foods in one /foods call and cache each one"""
+        response = self.session.post(f"{self.base_url}/foods", params={'api_key': self.api_key},
+                                     json={'fdcIds': fdc_ids, 'format': 'full'}, timeout=10)
+        response.raise_for_status()
+        
+        foods = {food.get('fdcId'): food for food in response.json()}
+        for fdc_id in fdc_ids:
+            # Cached under the same key as a single /food/{id} request
+            key = self._cache_key(f"/food/{fdc_id}", {})
+            food = foods.get(fdc_id)
+            if food is None:
+                self.cache.put(key, None, self.ttls['negative'], negative=True)
+            else:
+                self.cache.put(key, food, self.ttls['food'])
+        return {fdc_id: foods.get(fdc_id) for fdc_id in fdc_ids}
+    
+    def _revalidate(self, key: str, path: str, params: Dict, ttl_name: str):
+        """Refresh a stale entry in a background thread (once per key at a time)"""
+        def refresh():
+            try:
+                self._fetch(key, path, params, ttl_name)
+            except requests.exceptions.RequestException as e:
+                print(f"Error refreshing cached USDA response: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.pop(key, None)
+        
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            thread = threading.Thread(target=refresh, daemon=True)
+            self._refreshing[key] = thread
+        thread.start()
+    
+    def wait_for_refreshes(self, timeout: Optional[float] = None):
+        """Block until background refreshes started so far have finished"""
+        with self._refresh_lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(timeout)
+    
+    def search_foods(self, query: str, page_size: int = 10,
+                     data_types: Optional[List[str]] = None) -> List[Dict]:
         """
         Search for foods by name
         
         Args:
             query: Food name to search
             page_size: Number of results to return
+            data_types: FDC data types to search (default SEARCH_DATA_TYPES)
             
         Returns:
             List of food items with basic info
         """
-        url = f"{self.base_url}/foods/search"
+        data_types = data_types or SEARCH_DATA_TYPES
         params = {
-            'api_key': self.api_key,
             'query': query,
             'pageSize': page_size,
-            'dataType': ['Foundation', 'SR Legacy']  # Most reliable data
+            'dataType': data_types
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            local_foods = self.local.search(query, page_size, data_types) if self.local else []
+            if local_foods:
+                self._count('local_hits')
+                data = {'foods': local_foods}
+            else:
+                data = self._get_json("/foods/search", params, 'search') or {}
             
             results = []
             for food in data.get('foods', []):
@@ -63,37 +307,78 @@ class USDAFoodAPI:
         Returns:
             Dictionary with detailed nutrition data
         """
-        url = f"{self.base_url}/food/{fdc_id}"
-        params = {'api_key': self.api_key}
+        data = self.local.get_foods([fdc_id]).get(fdc_id) if self.local else None
+        if data is not None:
+            self._count('local_hits')
+            return self._parse_food(data)
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Extract nutrition information
-            nutrients = {}
-            for nutrient in data.get('foodNutrients', []):
-                name = nutrient.get('nutrient', {}).get('name')
-                value = nutrient.get('amount', 0)
-                unit = nutrient.get('nutrient', {}).get('unitName', '')
-                
-                nutrients[name] = {
-                    'value': value,
-                    'unit': unit
-                }
-            
-            return {
-                'fdc_id': data.get('fdcId'),
-                'name': data.get('description'),
-                'category': data.get('foodCategory', ''),
-                'nutrients': nutrients,
-                'portions': self._extract_portions(data)
-            }
-            
+            data = self._get_json(f"/food/{fdc_id}", {}, 'food')
         except requests.exceptions.RequestException as e:
             print(f"Error getting food details: {e}")
             return None
+        return self._parse_food(data) if data is not None else None
+    
+    def get_foods_details(self, fdc_ids: List[int]) -> Dict[int, Optional[Dict]]:
+        """
+        Detailed nutrition information for many foods at once
+        
+        Foods in the local store or the cache are served from there; the
+        rest are fetched with bulk /foods requests (BULK_FOODS_LIMIT ids
+        each, sent concurrently).
+        
+        Returns:
+            Dict of fdc_id -> details as returned by get_food_details
+            (None for unknown ids or failed requests)
+        """
+        results = self.local.get_foods(fdc_ids) if self.local else {}
+        if results:
+            self._count('local_hits')
+        missing = []
+        for fdc_id in dict.fromkeys(fdc_ids):
+            if fdc_id in results:
+                continue
+            path = f"/food/{fdc_id}"
+            found, body, entry = self._cached(self._cache_key(path, {}), path, {}, 'food')
+            if found:
+                results[fdc_id] = body
+            else:
+                missing.append(fdc_id)
+                # Fallback if the bulk request fails
+                results[fdc_id] = entry['body'] if entry else None
+        
+        chunks = [missing[i:i + BULK_FOODS_LIMIT] for i in range(0, len(missing), BULK_FOODS_LIMIT)]
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(chunks))) as pool:
+                for chunk, future in [(chunk, pool.submit(self._fetch_bulk, chunk)) for chunk in chunks]:
+                    try:
+                        results.update(future.result())
+                    except requests.exceptions.RequestException as e:
+                        print(f"Error getting food details for {len(chunk)} foods: {e}")
+        
+        return {fdc_id: self._parse_food(data) if data is not None else None
+                for fdc_id, data in results.items()}
+    
+    def _parse_food(self, data: Dict) -> Dict:
+        """Details dict (nutrients by name, portions) from an FDC food"""
+        nutrients = {}
+        for nutrient in data.get('foodNutrients', []):
+            name = nutrient.get('nutrient', {}).get('name')
+            value = nutrient.get('amount', 0)
+            unit = nutrient.get('nutrient', {}).get('unitName', '')
+            
+            nutrients[name] = {
+                'value': value,
+                'unit': unit
+            }
+        
+        return {
+            'fdc_id': data.get('fdcId'),
+            'name': data.get('description'),
+            'category': data.get('foodCategory', ''),
+            'nutrients': nutrients,
+            'portions': self._extract_portions(data)
+        }
     
     def _extract_portions(self, data: Dict) -> List[Dict]:
         """Extract portion/serving size information"""
@@ -112,7 +397,10 @@ class USDAFoodAPI:
         Returns:
             Dictionary with key nutrition values per 100g
         """
-        details = self.get_food_details(fdc_id)
+        return self._summarize(self.get_food_details(fdc_id))
+    
+    def _summarize(self, details: Optional[Dict]) -> Optional[Dict]:
+        """Key nutrient values from get_food_details output"""
         if not details:
             return None
         
@@ -146,22 +434,29 @@ class USDAFoodAPI:
         """
         Compare nutrition across multiple foods
         
+        Searches run concurrently, then every match's details come from one
+        bulk request (about two round trips, however many foods).
+        
         Args:
             food_names: List of food names to compare
             
         Returns:
             Comparison data for all foods
         """
-        results = {}
+        if not food_names:
+            return {}
         
-        for food_name in food_names:
-            # Search for the food
-            search_results = self.search_foods(food_name, page_size=1)
-            if search_results:
-                fdc_id = search_results[0]['fdc_id']
-                summary = self.get_nutrition_summary(fdc_id)
-                if summary:
-                    results[food_name] = summary
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(food_names))) as pool:
+            searches = list(pool.map(lambda name: self.search_foods(name, page_size=1), food_names))
+        
+        matches = {name: found[0]['fdc_id'] for name, found in zip(food_names, searches) if found}
+        details = self.get_foods_details(list(matches.values()))
+        
+        results = {}
+        for food_name, fdc_id in matches.items():
+            summary = self._summarize(details.get(fdc_id))
+            if summary:
+                results[food_name] = summary
         
         return results
     
@@ -179,10 +474,13 @@ class USDAFoodAPI:
         # Search for similar foods
         search_results = self.search_foods(food_name, page_size=5)
         
+        # Skip first (original); details for the rest in one bulk request
+        fdc_ids = [result['fdc_id'] for result in search_results[1:]]
+        details = self.get_foods_details(fdc_ids)
+        
         alternatives = []
-        for result in search_results[1:]:  # Skip first (original)
-            fdc_id = result['fdc_id']
-            summary = self.get_nutrition_summary(fdc_id)
+        for fdc_id in fdc_ids:
+            summary = self._summarize(details.get(fdc_id))
             if summary:
                 alternatives.append({
                     'name': summary['name'],
@@ -201,17 +499,26 @@ def get_usda_api(api_key: Optional[str] = None) -> Optional[USDAFoodAPI]:
         api = get_usda_api()
         if api:
             results = api.search_foods("rice")
-    """
-    import os
     
+    Set USDA_OFFLINE=1 to serve only cached responses (no key needed).
+    If a local store imported with fdc_local.py exists (USDA_LOCAL_DB,
+    default fdc_local.db) it is searched first; without a key it is used
+    offline.
+    """
     if api_key is None:
         api_key = os.environ.get('USDA_API_KEY')
     
-    if not api_key:
+    # Offline mode serves cached responses only, so it needs no key
+    offline = os.environ.get('USDA_OFFLINE', '').lower() in ('1', 'true', 'yes')
+    
+    local_path = os.environ.get('USDA_LOCAL_DB', 'fdc_local.db')
+    local = LocalFDCStore(local_path) if os.path.exists(local_path) else None
+    
+    if not api_key and not offline and local is None:
         print("⚠️ USDA API key not found. Set USDA_API_KEY environment variable.")
         return None
     
-    return USDAFoodAPI(api_key)
+    return USDAFoodAPI(api_key, offline=offline or not api_key, local=local)
 
 
 # Example usage
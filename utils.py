@@ -5,14 +5,13 @@ Includes PDF export, translation, and helper functions
 
 from fpdf import FPDF
 import io
+import importlib.util
 from datetime import datetime
 
-# Try to import googletrans, but make it optional
-try:
-    from googletrans import Translator
-    TRANSLATION_AVAILABLE = True
-except (ImportError, ModuleNotFoundError):
-    TRANSLATION_AVAILABLE = False
+# googletrans is optional and slow to import, so translate_text() imports it
+# on first use
+TRANSLATION_AVAILABLE = importlib.util.find_spec('googletrans') is not None
+if not TRANSLATION_AVAILABLE:
     print("⚠️ Translation module not available. Language switching disabled.")
 
 # Food category emojis
@@ -348,6 +347,7 @@ def translate_text(text, target_language='hi'):
         return text  # Return original text if translation not available
     
     try:
+        from googletrans import Translator
         translator = Translator()
         translation = translator.translate(text, dest=target_language)
         return translation.text
@@ -426,35 +426,49 @@ def suggest_alternatives(ingredient_name, ingredients_df):
     except:
         return []
 
+# Default emission factors (kg CO2e per kg of food)
+GHG_EMISSION_FACTORS = {
+    'Grains': 0.5,
+    'Pulses': 0.9,
+    'Vegetables': 0.4,
+    'Dairy': 2.5,
+    'Protein': 4.5,  # Eggs
+    'Fats': 3.0,
+    'Sweetener': 0.6,
+    'Fruits': 0.5
+}
+
+def ghg_emissions_from_totals(category_totals_g, emission_factors=None):
+    """Estimated kg CO2e for grams of food per ingredient category"""
+    emission_factors = emission_factors or GHG_EMISSION_FACTORS
+    total_emissions = sum(
+        grams / 1000 * emission_factors.get(category, 1.0)
+        for category, grams in category_totals_g.items()
+    )
+    return round(total_emissions, 2)
+
 def calculate_ghg_emissions(meal_plan, emission_factors=None):
     """
     Calculate estimated greenhouse gas emissions for meal plan
     (Optional feature for environmental awareness)
-    """
-    if emission_factors is None:
-        # Default emission factors (kg CO2e per kg of food)
-        emission_factors = {
-            'Grains': 0.5,
-            'Pulses': 0.9,
-            'Vegetables': 0.4,
-            'Dairy': 2.5,
-            'Protein': 4.5,  # Eggs
-            'Fats': 3.0,
-            'Sweetener': 0.6,
-            'Fruits': 0.5
-        }
-    
-    total_emissions = 0
     
+    Saved plans can skip the walk over the plan with
+    calculate_plan_ghg_emissions(plan_id).
+    """
+    category_totals_g = {}
     for day, day_plan in meal_plan['weekly_plan'].items():
         for meal_type, meal_data in day_plan['meals'].items():
             for item in meal_data['items']:
                 category = item['category']
-                quantity_kg = item['total_quantity_g'] / 1000
-                emission_factor = emission_factors.get(category, 1.0)
-                total_emissions += quantity_kg * emission_factor
+                category_totals_g[category] = category_totals_g.get(category, 0) + item['total_quantity_g']
     
-    return round(total_emissions, 2)
+    return ghg_emissions_from_totals(category_totals_g, emission_factors)
+
+def calculate_plan_ghg_emissions(plan_id, emission_factors=None):
+    """Estimated greenhouse gas emissions of a saved plan, from its meal_plan_items totals"""
+    import database as db
+    
+    return ghg_emissions_from_totals(db.get_plan_category_totals(plan_id), emission_factors)
 
 def validate_meal_plan(meal_plan, min_score=60):
     """